@@ -0,0 +1,96 @@
+"""Benchmark dense vs. sparse (CSR) coupling as the network grows.
+
+Builds ring-lattice systems of ``n_nodes`` subsystems, each coupled to its
+``k`` nearest neighbours with the default per-edge strength, and times the
+NumPy ``run_sim`` loop with ``C_base`` stored densely and as a CSR matrix.
+Dense runs are skipped above ``--max-dense`` nodes, where the n x n coupling
+matrix alone no longer fits comfortably in memory.
+
+    python benchmarks/bench_coupling.py --sizes 3 30 300 3000 10000
+"""
+
+import argparse
+import dataclasses
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from aging_network import default_simulation_config, default_system_config, run_sim
+except ModuleNotFoundError:
+    # Allow running the script without installing the package (dev mode).
+    import sys
+
+    repo_root = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo_root / "src"))
+    from aging_network import default_simulation_config, default_system_config, run_sim
+
+try:
+    import scipy.sparse as sparse
+except ImportError:  # pragma: no cover - optional
+    sparse = None
+
+
+def ring_system(n_nodes: int, k: int):
+    """Default per-node parameters tiled to ``n_nodes`` with ring-lattice coupling."""
+    base = default_system_config()
+    tiled = {}
+    for f in dataclasses.fields(base):
+        value = getattr(base, f.name)
+        if isinstance(value, np.ndarray) and value.ndim == 1:
+            tiled[f.name] = np.resize(value, n_nodes)
+    tiled["node_names"] = tuple(f"node{i}" for i in range(n_nodes))
+    strength = float(base.C_base[0, 1])
+
+    offsets = [o for o in range(-k, k + 1) if o != 0 and o % n_nodes != 0]
+    rows = np.repeat(np.arange(n_nodes), len(offsets))
+    cols = (rows + np.tile(offsets, n_nodes)) % n_nodes
+    data = np.full(rows.size, strength)
+    return dataclasses.replace(base, n_nodes=n_nodes, C_base=(rows, cols, data), **tiled)
+
+
+def with_coupling(system, fmt: str):
+    rows, cols, data = system.C_base
+    n = system.n_nodes
+    if fmt == "csr":
+        C = sparse.csr_matrix((data, (rows, cols)), shape=(n, n))
+        C.sum_duplicates()
+    else:
+        C = np.zeros((n, n))
+        np.add.at(C, (rows, cols), data)
+    return dataclasses.replace(system, C_base=C)
+
+
+def time_run(system, sim, repeats: int) -> float:
+    """Best wall-clock seconds per simulated step."""
+    best = np.inf
+    for seed in range(repeats):
+        t0 = time.perf_counter()
+        run_sim("none", sim_config=sim, system_config=system, rng_seed=seed, record="none")
+        best = min(best, time.perf_counter() - t0)
+    return best / sim.timesteps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 10, 30, 100, 300, 1000, 3000, 10000])
+    parser.add_argument("--k", type=int, default=2, help="Neighbours on each side in the ring lattice.")
+    parser.add_argument("--years", type=float, default=5.0, help="Simulated years per timed run.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-dense", type=int, default=3000)
+    args = parser.parse_args()
+
+    sim = dataclasses.replace(default_simulation_config(), years=args.years)
+    print(f"{'n_nodes':>8} {'dense us/step':>14} {'csr us/step':>12} {'speedup':>8}")
+    for n in args.sizes:
+        system = ring_system(n, args.k)
+        dense_t = time_run(with_coupling(system, "dense"), sim, args.repeats) if n <= args.max_dense else np.nan
+        sparse_t = time_run(with_coupling(system, "csr"), sim, args.repeats) if sparse is not None else np.nan
+        print(f"{n:>8} {dense_t * 1e6:>14.1f} {sparse_t * 1e6:>12.1f} {dense_t / sparse_t:>8.2f}")
+    if sparse is None:
+        print("scipy is not installed; CSR timings skipped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import matplotlib.pyplot as plt
 try:
     from aging_network import (
         DEFAULT_SCENARIOS,
+        ResultCache,
         default_simulation_config,
         plot_healthspan_vs_lifespan,
         plot_mean_X_D_over_time,
@@ -23,6 +24,7 @@ except ModuleNotFoundError:
     sys.path.insert(0, str(repo_root / "src"))
     from aging_network import (
         DEFAULT_SCENARIOS,
+        ResultCache,
         default_simulation_config,
         plot_healthspan_vs_lifespan,
         plot_mean_X_D_over_time,
@@ -51,6 +53,24 @@ def parse_args() -> argparse.Namespace:
         default=["none", "exercise", "drug", "organ3", "parabiosis"],
         help="Intervention scenarios to simulate.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes for the Monte Carlo ensemble (default: run in-process).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for reproducible runs (required for --cache-dir to take effect).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Directory of an on-disk result cache reused across invocations.",
+    )
     parser.add_argument(
         "--no-show",
         action="store_true",
@@ -69,9 +89,12 @@ def maybe_save(fig: plt.Figure, output_dir: Optional[Path], name: str) -> None:
 def main() -> None:
     args = parse_args()
     sim_cfg = default_simulation_config()
+    cache = ResultCache(args.cache_dir) if args.cache_dir is not None else None
 
     print("Running single trajectories...")
-    single_results = {mode: run_sim(mode, sim_config=sim_cfg) for mode in args.scenarios}
+    single_results = {
+        mode: run_sim(mode, sim_config=sim_cfg, rng_seed=args.seed, cache=cache) for mode in args.scenarios
+    }
 
     for mode, result in single_results.items():
         fig, ax = plt.subplots(figsize=(10, 5))
@@ -86,7 +109,9 @@ def main() -> None:
 
     print("Running Monte Carlo ensemble...")
     mc_results = {
-        mode: run_many(mode, n_runs=args.runs, sim_config=sim_cfg)
+        mode: run_many(
+            mode, n_runs=args.runs, sim_config=sim_cfg, rng_seed=args.seed, workers=args.workers, cache=cache
+        )
         for mode in args.scenarios
         if mode in DEFAULT_SCENARIOS
     }
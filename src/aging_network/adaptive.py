@@ -0,0 +1,203 @@
+"""Adaptive Monte Carlo: add runs until estimates reach a target precision."""
+
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import InterventionConfig, SimulationConfig, SystemConfig
+from .parallel import SeedLike
+from .simulation import run_many
+
+Array = NDArray[np.float64]
+
+
+@dataclass
+class Estimate:
+    """Point estimate with a two-sided confidence interval."""
+
+    value: float
+    low: float
+    high: float
+
+    @property
+    def width(self) -> float:
+        return self.high - self.low
+
+
+def _mean_ci(values: Array, z: float) -> Estimate:
+    values = values[~np.isnan(values)]
+    if values.size < 2:
+        return Estimate(float(values.mean()) if values.size else np.nan, -np.inf, np.inf)
+    mean = float(values.mean())
+    half = z * float(values.std(ddof=1)) / float(np.sqrt(values.size))
+    return Estimate(mean, mean - half, mean + half)
+
+
+def _median_ci(values: Array, z: float) -> Estimate:
+    """Distribution-free interval from order statistics; NaN (never reached) sorts last."""
+    ordered = np.sort(np.where(np.isnan(values), np.inf, values))
+    n = ordered.size
+    if n == 0:
+        return Estimate(np.nan, -np.inf, np.inf)
+    half = z * np.sqrt(n) / 2.0
+    lo = int(np.floor(n / 2.0 - half))
+    hi = int(np.ceil(n / 2.0 + half))
+    low = float(ordered[lo]) if lo >= 0 else -np.inf
+    high = float(ordered[hi]) if hi < n else np.inf
+    return Estimate(float(np.median(ordered)), low, high)
+
+
+def _survival_ci(lifespan: Array, age: float, z: float) -> Estimate:
+    """Wilson score interval for the share of runs alive at ``age``."""
+    n = lifespan.size
+    if n == 0:
+        return Estimate(np.nan, 0.0, 1.0)
+    p = float(np.mean(np.isnan(lifespan) | (lifespan > age)))
+    denom = 1.0 + z**2 / n
+    centre = (p + z**2 / (2 * n)) / denom
+    half = z * float(np.sqrt(p * (1.0 - p) / n + z**2 / (4 * n**2))) / denom
+    return Estimate(p, max(0.0, centre - half), min(1.0, centre + half))
+
+
+StatisticFn = Callable[[Array, Array, float, float], Estimate]
+
+STATISTICS: Dict[str, StatisticFn] = {
+    "mean_healthspan": lambda hs, ls, z, age: _mean_ci(hs, z),
+    "mean_lifespan": lambda hs, ls, z, age: _mean_ci(ls, z),
+    "median_healthspan": lambda hs, ls, z, age: _median_ci(hs, z),
+    "median_lifespan": lambda hs, ls, z, age: _median_ci(ls, z),
+    "survival": lambda hs, ls, z, age: _survival_ci(ls, age, z),
+}
+"""
+Statistics ``run_until`` can target, by name.
+
+Means skip runs that never cross the threshold (NaN); medians sort them
+last; ``survival`` is the share of runs still alive at ``survival_age``.
+"""
+
+
+@dataclass
+class AdaptiveResult:
+    """Ensemble collected by :func:`run_until` and the precision it reached."""
+
+    healthspan: Array
+    lifespan: Array
+    estimates: Dict[str, Estimate]
+    targets: Dict[str, float]
+    converged: bool
+    elapsed: float
+
+    @property
+    def n_runs(self) -> int:
+        return int(self.healthspan.shape[0])
+
+
+def run_until(
+    intervention: str,
+    targets: Optional[Dict[str, float]] = None,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    intervention_config: Optional[InterventionConfig] = None,
+    rng_seed: SeedLike = None,
+    batch_size: int = 100,
+    max_runs: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    confidence: float = 0.95,
+    survival_age: float = 80.0,
+    batched: bool = False,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    backend: str = "numpy",
+    rng_stream: str = "stepwise-v1",
+) -> AdaptiveResult:
+    """
+    Add batches of runs until every target confidence interval is narrow enough.
+
+    Batch ``k`` is a :func:`~aging_network.simulation.run_many` call seeded
+    with the ``k``-th child of ``rng_seed``, so the runs collected are always
+    a prefix of the same reproducible sequence, however early the loop stops.
+
+    Parameters
+    ----------
+    intervention:
+        Intervention key to simulate.
+    targets:
+        Maximum full confidence-interval width per statistic in
+        ``STATISTICS``, e.g. ``{"median_lifespan": 1.0, "survival": 0.05}``.
+        Defaults to one year on mean healthspan and mean lifespan.
+    sim_config, system_config, intervention_config:
+        Optional parameter overrides.
+    rng_seed:
+        Parent seed of the batch seeds.
+    batch_size:
+        Runs added per iteration.
+    max_runs, max_seconds:
+        Stop once this many runs have been collected or this much wall time
+        has passed, even if the targets are not met.
+    confidence:
+        Two-sided confidence level of the intervals.
+    survival_age:
+        Age for the ``"survival"`` statistic.
+    batched, workers, executor, backend, rng_stream:
+        Passed to :func:`~aging_network.simulation.run_many` for each batch.
+    """
+    targets = dict(targets) if targets is not None else {"mean_healthspan": 1.0, "mean_lifespan": 1.0}
+    for name in targets:
+        if name not in STATISTICS:
+            raise ValueError(f"Unknown statistic '{name}'. Valid options: {', '.join(STATISTICS)}")
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+    if not 0.0 < confidence < 1.0:
+        raise ValueError(f"confidence must be in (0, 1), got {confidence}")
+    if max_runs is None and max_seconds is None:
+        raise ValueError("Set max_runs or max_seconds so the loop is bounded")
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    parent = rng_seed if isinstance(rng_seed, np.random.SeedSequence) else np.random.SeedSequence(rng_seed)
+    hs_parts = []
+    ls_parts = []
+    n_runs = 0
+    estimates: Dict[str, Estimate] = {}
+    converged = False
+    start = time.perf_counter()
+    while True:
+        size = batch_size if max_runs is None else min(batch_size, max_runs - n_runs)
+        if size <= 0:
+            break
+        hs, ls = run_many(
+            intervention,
+            n_runs=size,
+            sim_config=sim_config,
+            system_config=system_config,
+            intervention_config=intervention_config,
+            rng_seed=parent.spawn(1)[0],
+            batched=batched,
+            workers=workers,
+            executor=executor,
+            backend=backend,
+            rng_stream=rng_stream,
+        )
+        hs_parts.append(hs)
+        ls_parts.append(ls)
+        n_runs += size
+
+        healthspan = np.concatenate(hs_parts)
+        lifespan = np.concatenate(ls_parts)
+        estimates = {name: STATISTICS[name](healthspan, lifespan, z, survival_age) for name in targets}
+        converged = all(estimates[name].width <= tol for name, tol in targets.items())
+        if converged or (max_seconds is not None and time.perf_counter() - start >= max_seconds):
+            break
+
+    return AdaptiveResult(
+        healthspan=np.concatenate(hs_parts) if hs_parts else np.array([]),
+        lifespan=np.concatenate(ls_parts) if ls_parts else np.array([]),
+        estimates=estimates,
+        targets=targets,
+        converged=converged,
+        elapsed=time.perf_counter() - start,
+    )
@@ -0,0 +1,281 @@
+"""Batched ensemble integrator advancing many trajectories in lockstep."""
+
+import dataclasses
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from .aggregate import EnsembleAggregator
+from .config import (
+    FrozenConfig,
+    InterventionConfig,
+    SimulationConfig,
+    SystemConfig,
+    default_intervention_config,
+    default_simulation_config,
+    default_system_config,
+)
+from .interventions import compile_schedule
+from .model import StepAdjustment, step_state_batch
+from .parallel import SeedLike
+from .population import Population
+
+Array = NDArray[np.float64]
+
+
+@dataclass
+class BatchResult:
+    """Per-run endpoints from a batched ensemble.
+
+    Runs that never cross a threshold have ``NaN`` healthspan/lifespan and a
+    ``cause_of_death`` of ``-1``. With ``observe_at``, ``X_observed`` and
+    ``D_observed`` hold the interpolated states ``(n_runs, n_obs, n_nodes)``
+    at the ``observe_at`` ages ``(n_runs, n_obs)``, ``NaN`` after death.
+    """
+
+    healthspan: Array
+    lifespan: Array
+    cause_of_death: NDArray[np.int64]
+    X_final: Array
+    D_final: Array
+    observe_at: Optional[Array] = None
+    X_observed: Optional[Array] = None
+    D_observed: Optional[Array] = None
+
+    @property
+    def n_runs(self) -> int:
+        return int(self.healthspan.shape[0])
+
+
+def _individual_shocks(
+    adjustment: StepAdjustment, system: SystemConfig, run_system: SystemConfig
+) -> StepAdjustment:
+    """
+    ``adjustment`` with its shock overrides rescaled to each run's own base rates.
+
+    Compiled schedules hold absolute shock rates derived from ``system``; an
+    override becomes the run's base rate times the override's ratio to
+    ``system``'s (the override itself where that base rate is zero).
+    """
+    changes = {}
+    for name, base_field in (("shock_prob", "shock_prob_base"), ("shock_mean", "shock_mean_base")):
+        override = getattr(adjustment, name)
+        own = getattr(run_system, base_field)
+        if override is None or own is getattr(system, base_field):
+            continue
+        base = np.asarray(getattr(system, base_field), dtype=float)
+        ratio = np.divide(override, base, out=np.ones_like(base), where=base != 0)
+        changes[name] = np.where(base != 0, own * ratio, override)
+    return dataclasses.replace(adjustment, **changes) if changes else adjustment
+
+
+def sample_cause_of_death(X: Array, death_threshold: float, rng: np.random.Generator) -> NDArray[np.int64]:
+    """
+    Draw a cause of death per row, weighted by each node's deficit below threshold.
+
+    Vectorized counterpart of the ``rng.choice`` draw in :func:`run_sim`.
+    """
+    deficits = np.maximum(death_threshold - X, 0.0)
+    totals = deficits.sum(axis=1)
+    cause = np.argmin(X, axis=1)
+    has_deficit = totals > 0
+    if has_deficit.any():
+        cdf = np.cumsum(deficits[has_deficit], axis=1) / totals[has_deficit, None]
+        u = rng.random(int(has_deficit.sum()))
+        drawn = (cdf < u[:, None]).sum(axis=1)
+        cause[has_deficit] = np.minimum(drawn, X.shape[1] - 1)
+    return cause
+
+
+def run_batch(
+    intervention: str = "none",
+    n_runs: int = 100,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    intervention_config: Optional[InterventionConfig] = None,
+    rng_seed: SeedLike = None,
+    aggregator: Optional[EnsembleAggregator] = None,
+    observe_at: Optional[ArrayLike] = None,
+    population: Optional[Population] = None,
+) -> BatchResult:
+    """
+    Simulate ``n_runs`` trajectories at once on ``(n_runs, n_nodes)`` arrays.
+
+    Every step advances all surviving runs with one call to
+    :func:`~aging_network.model.step_state_batch`; runs are dropped from the
+    working set as they die. Interventions are compiled once into an
+    :class:`~aging_network.interventions.InterventionSchedule` that every run
+    indexes by step. Results are statistically equivalent
+    to :func:`~aging_network.simulation.run_many` but use a single random
+    stream for the whole batch, so individual runs do not match ``run_sim``
+    seeds one-to-one.
+
+    Parameters
+    ----------
+    intervention:
+        Intervention key to simulate.
+    n_runs:
+        Number of Monte Carlo trajectories.
+    sim_config, system_config, intervention_config:
+        Optional parameter overrides.
+    rng_seed:
+        Seed for the batch random stream.
+    aggregator:
+        Optional :class:`~aging_network.aggregate.EnsembleAggregator` fed the
+        states of the surviving runs at every binned step.
+    observe_at:
+        Ages to record states at, shared ``(n_obs,)`` or per run
+        ``(n_runs, n_obs)``, interpolated between the bracketing steps as in
+        :func:`~aging_network.simulation.run_sim`. Only these states are kept
+        besides the endpoints.
+    population:
+        Per-individual parameters, e.g. from
+        :meth:`~aging_network.population.PopulationSpec.sample`; ``n_runs`` is
+        then the population size. Each run steps with its own
+        ``(n_nodes,)`` rows of the varied fields, and enters the working set
+        at its start age. Intervention shock regimes scale each run's own
+        shock rates by the regime's ratio to ``system_config``'s.
+    """
+    sim = sim_config or default_simulation_config()
+    system = system_config or default_system_config()
+    inter_cfg = intervention_config or default_intervention_config()
+    if population is not None:
+        n_runs = population.size
+        if isinstance(system, FrozenConfig):
+            # Thawed once so every working set shares the unvaried arrays.
+            system = system.thaw()
+
+    schedule = compile_schedule(intervention, sim, system, inter_cfg)
+    adjustments = schedule.adjustments()
+    rng = np.random.default_rng(rng_seed)
+
+    healthspan = np.full(n_runs, np.nan)
+    lifespan = np.full(n_runs, np.nan)
+    cause_of_death = np.full(n_runs, -1, dtype=np.int64)
+    X_final = np.empty((n_runs, system.n_nodes))
+    D_final = np.empty((n_runs, system.n_nodes))
+    if observe_at is not None:
+        observe = sim.observation_steps(observe_at)
+        if observe.ndim == 2 and observe.shape[0] != n_runs:
+            raise ValueError(f"Per-run observe_at needs {n_runs} rows, got {observe.shape[0]}")
+        observe = np.broadcast_to(observe, (n_runs, observe.shape[-1]))
+        n_obs = observe.shape[1]
+        X_observed = np.full((n_runs, n_obs, system.n_nodes), np.nan)
+        D_observed = np.full((n_runs, n_obs, system.n_nodes), np.nan)
+        # Observations grouped by the step they start from.
+        lower = np.floor(observe).astype(np.int64).ravel()
+        by_step = np.argsort(lower, kind="stable")
+        step_bounds = np.searchsorted(lower[by_step], np.arange(sim.timesteps + 1))
+        position = np.full(n_runs, -1, dtype=np.int64)
+
+    # Runs join the working set at their entry step (all at step 0 without a
+    # population with start ages).
+    entry = np.zeros(n_runs, dtype=np.int64) if population is None else population.entry_steps(sim)
+    by_entry = np.argsort(entry, kind="stable")
+    entry_bounds = np.searchsorted(entry[by_entry], np.arange(sim.timesteps + 1))
+    X0 = np.broadcast_to(system.X0, (n_runs, system.n_nodes))
+    D0 = np.broadcast_to(system.D0, (n_runs, system.n_nodes))
+    if population is not None:
+        X0 = population.parameters.get("X0", X0)
+        D0 = population.parameters.get("D0", D0)
+
+    # Working set of surviving runs, compacted whenever runs die.
+    idx = np.empty(0, dtype=np.int64)
+    X = np.empty((0, system.n_nodes))
+    D = np.empty((0, system.n_nodes))
+    healthy = np.empty(0, dtype=bool)
+    run_system = system
+    run_adjustment: Tuple[Optional[StepAdjustment], Optional[StepAdjustment]] = (None, None)
+
+    for t in range(sim.timesteps):
+        if entry_bounds[t] < entry_bounds[t + 1]:
+            joining = by_entry[entry_bounds[t] : entry_bounds[t + 1]]
+            idx = np.concatenate([idx, joining])
+            X = np.concatenate([X, X0[joining]]).astype(float)
+            D = np.concatenate([D, D0[joining]]).astype(float)
+            healthy = np.concatenate([healthy, np.ones(joining.size, dtype=bool)])
+            if population is not None:
+                run_system = population.system_for(system, idx)
+                run_adjustment = (None, None)
+            if observe_at is not None:
+                position[idx] = np.arange(idx.size)
+        if idx.size == 0:
+            if entry_bounds[t + 1] == n_runs:
+                break
+            continue
+        age = sim.start_age + t * sim.dt
+
+        adjustment = adjustments[t]
+        if population is not None:
+            if run_adjustment[0] is not adjustment:
+                run_adjustment = (adjustment, _individual_shocks(adjustment, system, run_system))
+            adjustment = run_adjustment[1]
+        X_new, D_new, _ = step_state_batch(X, D, sim, run_system, adjustment, rng)
+
+        # The compiled schedule holds at most one replacement event, applied
+        # to every surviving run at the same step.
+        if adjustment.replace_nodes is not None:
+            nodes = np.asarray(adjustment.replace_nodes)
+            if adjustment.replacement_D is not None:
+                D_new[:, nodes] = adjustment.replacement_D[nodes]
+            if adjustment.replacement_X is not None:
+                X_new[:, nodes] = adjustment.replacement_X[nodes]
+
+        newly_unhealthy = healthy & (X_new.mean(axis=1) < sim.func_threshold)
+        if newly_unhealthy.any():
+            healthspan[idx[newly_unhealthy]] = age
+            healthy &= ~newly_unhealthy
+
+        if observe_at is not None and step_bounds[t] < step_bounds[t + 1]:
+            flat = by_step[step_bounds[t] : step_bounds[t + 1]]
+            run, obs = flat // n_obs, flat % n_obs
+            row = position[run]
+            live = row >= 0
+            run, obs, row = run[live], obs[live], row[live]
+            frac = (observe[run, obs] - t)[:, None]
+            X_observed[run, obs] = X[row] + frac * (X_new[row] - X[row])
+            D_observed[run, obs] = D[row] + frac * (D_new[row] - D[row])
+
+        dead = (X_new < sim.death_threshold).any(axis=1)
+        if aggregator is not None and t % aggregator.bin_every == 0:
+            aggregator.add_states(t, X[~dead], D[~dead])
+        if dead.any():
+            dead_idx = idx[dead]
+            lifespan[dead_idx] = age
+            cause_of_death[dead_idx] = sample_cause_of_death(X_new[dead], sim.death_threshold, rng)
+            X_final[dead_idx] = X_new[dead]
+            D_final[dead_idx] = D_new[dead]
+            if observe_at is not None:
+                # Observations count up to the last step a run completed alive.
+                late = observe[dead_idx] > t - 1
+                X_observed[dead_idx] = np.where(late[:, :, None], np.nan, X_observed[dead_idx])
+                D_observed[dead_idx] = np.where(late[:, :, None], np.nan, D_observed[dead_idx])
+                position[dead_idx] = -1
+                position[idx[~dead]] = np.arange(int((~dead).sum()))
+
+            alive = ~dead
+            idx = idx[alive]
+            X_new = X_new[alive]
+            D_new = D_new[alive]
+            healthy = healthy[alive]
+            if population is not None:
+                run_system = population.system_for(system, idx)
+                run_adjustment = (None, None)
+
+        X, D = X_new, D_new
+
+    X_final[idx] = X
+    D_final[idx] = D
+
+    return BatchResult(
+        healthspan=healthspan,
+        lifespan=lifespan,
+        cause_of_death=cause_of_death,
+        X_final=X_final,
+        D_final=D_final,
+        observe_at=None if observe_at is None else sim.start_age + observe * sim.dt,
+        X_observed=None if observe_at is None else X_observed,
+        D_observed=None if observe_at is None else D_observed,
+    )
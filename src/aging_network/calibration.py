@@ -0,0 +1,609 @@
+"""Likelihood-free calibration of ``SystemConfig`` against cohort data (ABC-SMC)."""
+
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .aggregate import EnsembleAggregator
+from .batch import run_batch
+from .cohort import WaveCube
+from .config import (
+    SimulationConfig,
+    SystemConfig,
+    default_simulation_config,
+    default_system_config,
+    replace_config,
+)
+from .parallel import SeedLike, executor_width, resolve_executor, shard
+
+Array = NDArray[np.float64]
+
+CALIBRATABLE = (
+    "X0",
+    "D0",
+    "base_decay",
+    "beta_decay",
+    "base_recovery",
+    "gamma_recovery",
+    "k_ceiling",
+    "gamma_coupling",
+    "shock_prob_base",
+    "shock_mean_base",
+    "shock_std_base",
+    "alpha_damage_from_low_X_base",
+    "beta_damage_from_shock",
+)
+"""``SystemConfig`` fields a :class:`Prior` can target."""
+
+MEASURE_NODES: Dict[str, Tuple[str, int]] = {
+    "grip_strength": ("Musc", 1),
+    "gait_speed": ("Musc", 1),
+    "systolic_bp": ("Cardio", -1),
+    "hdl_cholesterol": ("Cardio", 1),
+    "memory_immediate": ("Neuro", 1),
+    "depression_score": ("Neuro", -1),
+}
+"""Node each cohort measure tracks, and whether it rises (+1) or falls (-1) with node function."""
+
+_PRIOR_NAME = re.compile(r"^(\w+)(?:\[(\d+)\])?$")
+
+
+@dataclass(frozen=True)
+class Prior:
+    """
+    Uniform prior on one parameter, optionally uniform in log space.
+
+    ``name`` is a field in ``CALIBRATABLE``; array fields take an optional
+    node index, e.g. ``"base_decay[1]"``, and without one the value is used
+    for every node.
+    """
+
+    name: str
+    low: float
+    high: float
+    log: bool = False
+
+    def __post_init__(self) -> None:
+        match = _PRIOR_NAME.match(self.name)
+        if match is None or match.group(1) not in CALIBRATABLE:
+            raise ValueError(f"Unknown parameter '{self.name}'. Valid options: {', '.join(CALIBRATABLE)}")
+        if not self.low < self.high or (self.log and self.low <= 0):
+            raise ValueError(f"Invalid bounds for '{self.name}': [{self.low}, {self.high}]")
+
+    @property
+    def field(self) -> str:
+        return _PRIOR_NAME.match(self.name).group(1)
+
+    @property
+    def index(self) -> Optional[int]:
+        node = _PRIOR_NAME.match(self.name).group(2)
+        return None if node is None else int(node)
+
+    @property
+    def bounds(self) -> Tuple[float, float]:
+        """Support in the sampling space (log space for log priors)."""
+        if self.log:
+            return float(np.log(self.low)), float(np.log(self.high))
+        return self.low, self.high
+
+
+def apply_parameters(system: SystemConfig, priors: Sequence[Prior], theta: Array) -> SystemConfig:
+    """``system`` with each prior's parameter set from ``theta`` (in natural units)."""
+    changes: Dict[str, Any] = {}
+    for prior, value in zip(priors, theta):
+        current = changes.get(prior.field, getattr(system, prior.field))
+        if np.ndim(current) == 0:
+            changes[prior.field] = float(value)
+            continue
+        updated = np.array(current, dtype=float)
+        if prior.index is None:
+            updated[:] = value
+        else:
+            updated[prior.index] = value
+        changes[prior.field] = updated
+    return replace_config(system, **changes)
+
+
+def _band_hazard(entry: Array, exit: Array, died: NDArray[np.bool_], edges: Array) -> Tuple[Array, Array]:
+    """Deaths and person-years per age band ``[edges[b], edges[b + 1])``."""
+    lo, hi = edges[:-1], edges[1:]
+    exposure = np.clip(np.minimum(exit[:, None], hi) - np.maximum(entry[:, None], lo), 0.0, None).sum(axis=0)
+    in_band = died[:, None] & (exit[:, None] >= lo) & (exit[:, None] < hi)
+    return in_band.sum(axis=0).astype(float), exposure
+
+
+@dataclass
+class CohortTargets:
+    """
+    Observed summary statistics of a cohort, and the design needed to compute them from simulations.
+
+    The summary vector stacks, in ``names`` order: standardized decline
+    slopes per measure (per year, in baseline standard deviations, signed so
+    that loss of function is negative), death rates per person-year in age
+    bands, and optionally the share of deaths by cause.
+    """
+
+    names: Tuple[str, ...]
+    observed: Array
+    measures: Tuple[str, ...]
+    nodes: NDArray[np.int64]
+    bin_every: int
+    observation_weights: Array
+    baseline_weights: Array
+    band_edges: Array
+    causes: NDArray[np.int64]
+
+    @property
+    def size(self) -> int:
+        return int(self.observed.size)
+
+
+def cohort_targets(
+    cube: WaveCube,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    measure_nodes: Optional[Mapping[str, Tuple[str, int]]] = None,
+    hazard_width: float = 5.0,
+    cause_mix: Optional[Mapping[str, float]] = None,
+    bin_every: int = 10,
+) -> CohortTargets:
+    """
+    Summary statistics of a :class:`~aging_network.cohort.WaveCube` to calibrate against.
+
+    Parameters
+    ----------
+    cube:
+        Cohort panel, e.g. from :func:`~aging_network.cohort.load_waves`.
+    sim_config, system_config:
+        Time grid and node names of the model to be calibrated.
+    measure_nodes:
+        Measure name to ``(node name, direction)``; defaults to ``MEASURE_NODES``.
+        Measures missing from the cube are skipped.
+    hazard_width:
+        Width in years of the mortality age bands.
+    cause_mix:
+        Observed share of deaths by node name, if known; the synthetic
+        extracts do not record causes.
+    bin_every:
+        Steps per age bin of the simulated summaries.
+    """
+    sim = sim_config or default_simulation_config()
+    system = system_config or default_system_config()
+    mapping = dict(measure_nodes if measure_nodes is not None else MEASURE_NODES)
+    node_names = list(system.node_names)
+    n_bins = -(-sim.timesteps // bin_every)
+    bin_width = bin_every * sim.dt
+
+    def to_bins(ages: Array) -> Array:
+        bins = np.rint((ages[~np.isnan(ages)] - sim.start_age) / bin_width).astype(np.int64)
+        return np.bincount(np.clip(bins, 0, n_bins - 1), minlength=n_bins).astype(float)
+
+    names: List[str] = []
+    observed: List[float] = []
+    measures, nodes = [], []
+    age = np.asarray(cube.age)
+    for measure, (node, direction) in mapping.items():
+        if measure not in cube.measures:
+            continue
+        values = np.asarray(cube.measure(measure))
+        first = values[:, 0][~np.isnan(values[:, 0])]
+        ok = ~np.isnan(values) & ~np.isnan(age)
+        if first.size < 2 or ok.sum() < 2:
+            continue
+        z = direction * (values[ok] - first.mean()) / first.std(ddof=1)
+        a = age[ok]
+        names.append(f"slope:{measure}")
+        observed.append(float(np.cov(a, z)[0, 1] / np.var(a, ddof=1)))
+        measures.append(measure)
+        nodes.append(node_names.index(node))
+
+    entry = cube.baseline_age
+    last_seen = np.nanmax(np.where(np.isnan(age), -np.inf, age), axis=1)
+    died = np.asarray(cube.death_observed, dtype=bool)
+    exit_age = np.where(died, np.asarray(cube.death_age), last_seen)
+    valid = ~np.isnan(entry) & np.isfinite(exit_age)
+    edges = np.arange(
+        np.floor(entry[valid].min() / hazard_width) * hazard_width,
+        exit_age[valid].max() + hazard_width,
+        hazard_width,
+    )
+    deaths, exposure = _band_hazard(entry[valid], exit_age[valid], died[valid], edges)
+    keep = np.flatnonzero(exposure > 0)
+    # Contiguous bands only, so the simulated rates can use the same edges.
+    edges = edges[keep[0] : keep[-1] + 2]
+    deaths, exposure = deaths[keep[0] : keep[-1] + 1], exposure[keep[0] : keep[-1] + 1]
+    for lo, hi, rate in zip(edges[:-1], edges[1:], deaths / np.maximum(exposure, 1e-12)):
+        names.append(f"hazard:{lo:g}-{hi:g}")
+        observed.append(float(rate))
+
+    causes = []
+    for node, share in (cause_mix or {}).items():
+        causes.append(node_names.index(node))
+        names.append(f"cause:{node}")
+        observed.append(float(share))
+
+    return CohortTargets(
+        names=tuple(names),
+        observed=np.array(observed),
+        measures=tuple(measures),
+        nodes=np.array(nodes, dtype=np.int64),
+        bin_every=bin_every,
+        observation_weights=to_bins(age.ravel()),
+        baseline_weights=to_bins(entry),
+        band_edges=edges,
+        causes=np.array(causes, dtype=np.int64),
+    )
+
+
+def simulate_summary(
+    targets: CohortTargets,
+    system_config: SystemConfig,
+    sim_config: Optional[SimulationConfig] = None,
+    n_runs: int = 200,
+    rng_seed: SeedLike = None,
+) -> Array:
+    """
+    The summary vector of ``targets`` for one batched simulated population.
+
+    Slopes come from the survivors' mean node function across the ages the
+    cohort was observed at, weighted by how often each age was observed, and
+    are scaled by the spread of node function over the mixture of the
+    cohort's baseline ages (the simulated counterpart of the wave-1 standard
+    deviation the observed slopes are divided by). Death rates and cause
+    shares use the runs' lifespans and causes.
+    """
+    sim = sim_config or default_simulation_config()
+    aggregator = EnsembleAggregator(system_config.n_nodes, sim, bin_every=targets.bin_every, hist_bins=1)
+    batch = run_batch("none", n_runs=n_runs, sim_config=sim, system_config=system_config, rng_seed=rng_seed,
+                      aggregator=aggregator)
+    mean = aggregator.mean("X")
+    sd = aggregator.std("X")
+    ages = aggregator.ages
+
+    summary: List[float] = []
+    for node in targets.nodes:
+        ok = ~np.isnan(mean[:, node]) & (targets.observation_weights > 0)
+        base = ~np.isnan(sd[:, node]) & (targets.baseline_weights > 0)
+        if ok.sum() < 2 or not base.any():
+            summary.append(np.nan)
+            continue
+        w = targets.observation_weights[ok]
+        a, x = ages[ok], mean[ok, node]
+        a_bar = np.average(a, weights=w)
+        slope = np.sum(w * (a - a_bar) * (x - np.average(x, weights=w))) / np.sum(w * (a - a_bar) ** 2)
+        # Spread of the baseline-age mixture, as the cohort's wave-1 SD pools
+        # subjects of every baseline age: within-bin variance plus the spread
+        # of the bin means around the mixture mean.
+        bw = targets.baseline_weights[base]
+        mixture_mean = np.average(mean[base, node], weights=bw)
+        scale = np.sqrt(np.average(sd[base, node] ** 2 + (mean[base, node] - mixture_mean) ** 2, weights=bw))
+        summary.append(slope / scale if scale > 0 else np.nan)
+
+    lifespan = batch.lifespan
+    died = ~np.isnan(lifespan)
+    exit_age = np.where(died, lifespan, sim.start_age + sim.timesteps * sim.dt)
+    entry = np.full(n_runs, sim.start_age)
+    deaths, exposure = _band_hazard(entry, exit_age, died, targets.band_edges)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        summary.extend(np.where(exposure > 0, deaths / exposure, np.nan))
+
+    if targets.causes.size:
+        window = died & (lifespan >= targets.band_edges[0]) & (lifespan < targets.band_edges[-1])
+        counts = np.bincount(batch.cause_of_death[window], minlength=system_config.n_nodes)
+        summary.extend(counts[targets.causes] / max(1, int(window.sum())))
+    return np.array(summary)
+
+
+def _simulate_chunk(
+    targets: CohortTargets,
+    priors: Sequence[Prior],
+    thetas: Array,
+    seeds: Sequence[int],
+    n_runs: int,
+    sim: SimulationConfig,
+    system: SystemConfig,
+) -> Array:
+    """Summaries of a shard of candidate parameter sets; module-level so process pools can pickle it."""
+    out = np.empty((len(seeds), targets.size))
+    for i, (theta, seed) in enumerate(zip(thetas, seeds)):
+        out[i] = simulate_summary(targets, apply_parameters(system, priors, theta), sim, n_runs, int(seed))
+    return out
+
+
+@dataclass
+class ABCState:
+    """
+    Particle population of one ABC-SMC generation; also the checkpoint format.
+
+    ``particles`` are in natural units, one row per accepted parameter set,
+    with normalized importance ``weights`` and the ``distances`` that
+    accepted them under tolerance ``epsilon``.
+    """
+
+    names: Tuple[str, ...]
+    generation: int
+    particles: Array
+    weights: Array
+    distances: Array
+    summaries: Array
+    epsilon: float
+    scales: Array
+    n_simulations: int
+    acceptance_rate: float
+    epsilons: List[float]
+    rng_state: Dict[str, Any]
+    elapsed: float = 0.0
+
+    def posterior_mean(self) -> Dict[str, float]:
+        return dict(zip(self.names, np.average(self.particles, axis=0, weights=self.weights).tolist()))
+
+    def best(self) -> Dict[str, float]:
+        """Parameters of the closest particle."""
+        return dict(zip(self.names, self.particles[np.argmin(self.distances)].tolist()))
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the state atomically as one ``.npz`` file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = dict(
+            names=list(self.names),
+            generation=self.generation,
+            epsilon=self.epsilon,
+            n_simulations=self.n_simulations,
+            acceptance_rate=self.acceptance_rate,
+            epsilons=self.epsilons,
+            rng_state=self.rng_state,
+            elapsed=self.elapsed,
+        )
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(
+                    fh,
+                    meta=np.array(json.dumps(meta)),
+                    particles=self.particles,
+                    weights=self.weights,
+                    distances=self.distances,
+                    summaries=self.summaries,
+                    scales=self.scales,
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ABCState":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {name: data[name] for name in ("particles", "weights", "distances", "summaries", "scales")}
+        meta["names"] = tuple(meta["names"])
+        return cls(**meta, **arrays)
+
+
+def _to_space(priors: Sequence[Prior], theta: Array) -> Array:
+    logs = np.array([p.log for p in priors])
+    return np.where(logs, np.log(np.where(logs, theta, 1.0)), theta)
+
+
+def _from_space(priors: Sequence[Prior], u: Array) -> Array:
+    logs = np.array([p.log for p in priors])
+    return np.where(logs, np.exp(np.where(logs, u, 0.0)), u)
+
+
+def abc_smc(
+    targets: CohortTargets,
+    priors: Sequence[Prior],
+    n_particles: int = 1000,
+    n_generations: int = 10,
+    quantile: float = 0.5,
+    n_runs: int = 200,
+    batch_size: Optional[int] = None,
+    max_simulations: Optional[int] = None,
+    min_acceptance: float = 0.01,
+    target_epsilon: float = 0.0,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    rng_seed: SeedLike = None,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    checkpoint: Union[str, Path, None] = None,
+) -> ABCState:
+    """
+    Approximate Bayesian computation by sequential Monte Carlo (Beaumont et al. 2009).
+
+    Generation 0 draws ``n_particles`` parameter sets from the priors. Each
+    later generation sets its tolerance to the ``quantile`` of the previous
+    generation's distances, proposes candidates by perturbing weighted
+    draws of the previous particles with a Gaussian kernel of twice their
+    covariance (in log space for log priors), and keeps those whose
+    simulated summaries fall within tolerance. Distances are Euclidean on
+    summaries scaled by their median absolute deviation under the prior.
+
+    Candidates are simulated ``batch_size`` at a time, each as one
+    :func:`~aging_network.batch.run_batch` population of ``n_runs`` runs,
+    sharded across ``workers`` processes. With ``checkpoint`` set, the state
+    is saved after every generation and a later call with the same path
+    resumes from the last completed generation.
+
+    Parameters
+    ----------
+    targets:
+        Observed summaries from :func:`cohort_targets`.
+    priors:
+        One :class:`Prior` per calibrated parameter.
+    n_particles:
+        Accepted particles per generation.
+    n_generations:
+        Generations to run, including generation 0.
+    quantile:
+        Quantile of the previous distances used as the next tolerance.
+    n_runs:
+        Simulated individuals per candidate.
+    batch_size:
+        Candidates simulated per round; defaults to ``n_particles``.
+    max_simulations:
+        Stop once this many candidates have been simulated in total.
+    min_acceptance:
+        Stop once a generation's acceptance rate falls below this. Proposals
+        outside the prior count as rejections, and a generation is abandoned
+        (keeping the previous one) after ``n_particles / min_acceptance``
+        proposals, when it can no longer reach this rate.
+    target_epsilon:
+        Stop once the tolerance reaches this value.
+    sim_config, system_config:
+        Model settings; calibrated parameters override ``system_config``.
+    rng_seed:
+        Seed of proposals and simulation seeds.
+    workers, executor:
+        Process-pool sharding as in :func:`~aging_network.simulation.run_many`.
+    checkpoint:
+        Path of the ``.npz`` checkpoint to resume from and write to.
+    """
+    if not 0.0 < quantile < 1.0:
+        raise ValueError(f"quantile must be in (0, 1), got {quantile}")
+    if n_particles < 2:
+        raise ValueError(f"n_particles must be >= 2, got {n_particles}")
+    if not 0.0 < min_acceptance <= 1.0:
+        raise ValueError(f"min_acceptance must be in (0, 1], got {min_acceptance}")
+    sim = sim_config or default_simulation_config()
+    system = system_config or default_system_config()
+    priors = list(priors)
+    names = tuple(p.name for p in priors)
+    batch_size = batch_size or n_particles
+    low, high = (np.array(b) for b in zip(*(p.bounds for p in priors)))
+    pool = resolve_executor(workers, executor)
+    n_shards = 4 * executor_width(pool) if pool is not None else 1
+
+    def simulate(thetas: Array, rng: np.random.Generator) -> Array:
+        seeds = rng.integers(0, 2**63 - 1, size=len(thetas))
+        parts = shard(list(range(len(thetas))), n_shards)
+        args = [
+            [targets] * len(parts),
+            [priors] * len(parts),
+            [thetas[p] for p in parts],
+            [seeds[p] for p in parts],
+            [n_runs] * len(parts),
+            [sim] * len(parts),
+            [system] * len(parts),
+        ]
+        out = list(pool.map(_simulate_chunk, *args)) if pool is not None else list(map(_simulate_chunk, *args))
+        return np.concatenate(out) if out else np.empty((0, targets.size))
+
+    def distance(summaries: Array, scales: Array) -> Array:
+        d = np.sqrt((((summaries - targets.observed) / scales) ** 2).sum(axis=1))
+        return np.where(np.isnan(d), np.inf, d)
+
+    state: Optional[ABCState] = None
+    if checkpoint is not None and Path(checkpoint).exists():
+        state = ABCState.load(checkpoint)
+        if state.names != names:
+            raise ValueError(f"Checkpoint calibrates {state.names}, not {names}")
+    start = time.perf_counter() - (state.elapsed if state is not None else 0.0)
+
+    if state is None:
+        rng = np.random.default_rng(rng_seed)
+        u = rng.uniform(low, high, size=(n_particles, len(priors)))
+        particles = _from_space(priors, u)
+        summaries = simulate(particles, rng)
+        finite = summaries[np.isfinite(summaries).all(axis=1)]
+        scales = np.ones(targets.size)
+        if finite.shape[0]:
+            mad = np.median(np.abs(finite - np.median(finite, axis=0)), axis=0)
+            scales = np.where(mad > 0, mad, 1.0)
+        state = ABCState(
+            names=names,
+            generation=0,
+            particles=particles,
+            weights=np.full(n_particles, 1.0 / n_particles),
+            distances=distance(summaries, scales),
+            summaries=summaries,
+            epsilon=np.inf,
+            scales=scales,
+            n_simulations=n_particles,
+            acceptance_rate=1.0,
+            epsilons=[float("inf")],
+            rng_state=rng.bit_generator.state,
+            elapsed=time.perf_counter() - start,
+        )
+        if checkpoint is not None:
+            state.save(checkpoint)
+
+    while state.generation + 1 < n_generations:
+        if state.epsilon <= target_epsilon or state.acceptance_rate < min_acceptance:
+            break
+        if max_simulations is not None and state.n_simulations >= max_simulations:
+            break
+        rng = np.random.default_rng()
+        rng.bit_generator.state = state.rng_state
+        finite = np.isfinite(state.distances)
+        epsilon = float(np.quantile(state.distances[finite], quantile)) if finite.any() else np.inf
+
+        previous = _to_space(priors, state.particles)
+        cov = 2.0 * np.atleast_2d(np.cov(previous, rowvar=False, aweights=state.weights))
+        cov += 1e-12 * np.eye(len(priors))
+        chol = np.linalg.cholesky(cov)
+
+        kept_u, kept_s, kept_d = [], [], []
+        n_kept = 0
+        proposed = 0
+        drawn = 0
+        while n_kept < n_particles:
+            if max_simulations is not None and state.n_simulations + proposed >= max_simulations:
+                break
+            # Past this many proposals the generation cannot end above min_acceptance.
+            if drawn >= n_particles / min_acceptance:
+                break
+            parents = rng.choice(n_particles, size=batch_size, p=state.weights)
+            u = previous[parents] + rng.standard_normal((batch_size, len(priors))) @ chol.T
+            drawn += batch_size
+            u = u[((u >= low) & (u <= high)).all(axis=1)]
+            if u.shape[0] == 0:
+                continue
+            summaries = simulate(_from_space(priors, u), rng)
+            proposed += u.shape[0]
+            d = distance(summaries, state.scales)
+            accept = d <= epsilon
+            kept_u.append(u[accept])
+            kept_s.append(summaries[accept])
+            kept_d.append(d[accept])
+            n_kept += int(accept.sum())
+        if n_kept < n_particles:
+            break
+
+        u = np.concatenate(kept_u)[:n_particles]
+        # Importance weights: uniform prior over the kernel mixture density.
+        inv = np.linalg.inv(cov)
+        delta = u[:, None, :] - previous[None, :, :]
+        kernel = np.exp(-0.5 * np.einsum("ijk,kl,ijl->ij", delta, inv, delta))
+        weights = 1.0 / (kernel @ state.weights)
+        state = ABCState(
+            names=names,
+            generation=state.generation + 1,
+            particles=_from_space(priors, u),
+            weights=weights / weights.sum(),
+            distances=np.concatenate(kept_d)[:n_particles],
+            summaries=np.concatenate(kept_s)[:n_particles],
+            epsilon=epsilon,
+            scales=state.scales,
+            n_simulations=state.n_simulations + proposed,
+            acceptance_rate=n_kept / max(1, drawn),
+            epsilons=state.epsilons + [epsilon],
+            rng_state=rng.bit_generator.state,
+            elapsed=time.perf_counter() - start,
+        )
+        if checkpoint is not None:
+            state.save(checkpoint)
+    return state
@@ -0,0 +1,378 @@
+"""Checkpoints of a run's state and forking of scenarios from shared prefixes.
+
+Every built-in scenario follows the ``"none"`` dynamics until its start age,
+and with the ``stepwise-v1``/``block-v1`` random streams a run consumes the
+same draws per step whatever the intervention. A :class:`Checkpoint` taken
+part-way through one run can therefore be resumed under any intervention that
+agrees with it so far, and :func:`fork` simulates each shared stretch of a
+set of scenarios once. Checkpoints run on the NumPy backend.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import (
+    DEFAULT_SCENARIOS,
+    InterventionConfig,
+    SimulationConfig,
+    SystemConfig,
+    default_intervention_config,
+    default_simulation_config,
+    default_system_config,
+)
+from .interventions import InterventionContext, InterventionSchedule, compile_schedule
+from .model import RandomBlock, StepWorkspace, draw_random_block, is_sparse_coupling
+from .parallel import SeedLike
+from .simulation import SimulationResult, _advance, _HistoryBuffer, _sample_cause_of_death
+
+Array = NDArray[np.float64]
+
+CHECKPOINT_STREAMS = ("stepwise-v1", "block-v1")
+"""Random stream layouts whose draws per step do not depend on the intervention."""
+
+
+@dataclass
+class Checkpoint:
+    """
+    Snapshot of one run at the start of ``step``.
+
+    ``X_hist``/``D_hist`` hold the full-resolution history of the steps before
+    ``step`` and are shared, read-only, between checkpoints forked from the
+    same prefix. A checkpoint of a finished run (dead, or at the end of the
+    time grid) converts to a result with :meth:`to_result`.
+    """
+
+    step: int
+    X: Array
+    D: Array
+    rng_state: Dict[str, Any]
+    context: InterventionContext
+    healthspan: Optional[float]
+    X_hist: Array
+    D_hist: Array
+    block: Optional[RandomBlock] = None
+    lifespan: Optional[float] = None
+    cause_of_death: Optional[int] = None
+
+    def age(self, sim: SimulationConfig) -> float:
+        """Age at which the checkpoint was taken."""
+        return sim.start_age + self.step * sim.dt
+
+    def finished(self, sim: SimulationConfig) -> bool:
+        return self.lifespan is not None or self.step >= sim.timesteps
+
+    def rng(self) -> np.random.Generator:
+        """A fresh generator positioned where the run left off."""
+        bit_generator = getattr(np.random, self.rng_state["bit_generator"])()
+        bit_generator.state = self.rng_state
+        return np.random.Generator(bit_generator)
+
+    def to_result(self, sim: SimulationConfig, record: str = "full", record_every: int = 10) -> SimulationResult:
+        """Result of a finished run, with histories selected by ``record`` as in ``run_sim``."""
+        if not self.finished(sim):
+            raise ValueError(f"Checkpoint at step {self.step} has not reached the end of the run")
+        history = _HistoryBuffer(record, record_every, sim.timesteps, self.X.shape[0])
+        history.fill_from(self.X_hist, self.D_hist, self.X_hist.shape[0])
+        ages, X_hist, D_hist = history.trimmed(sim)
+        return SimulationResult(
+            age=ages,
+            X_hist=X_hist,
+            D_hist=D_hist,
+            healthspan=self.healthspan,
+            lifespan=self.lifespan,
+            cause_of_death=self.cause_of_death,
+        )
+
+
+def initial_checkpoint(
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    rng_seed: SeedLike = None,
+    rng_stream: str = "stepwise-v1",
+) -> Checkpoint:
+    """
+    Checkpoint at step 0, i.e. the state ``run_sim`` starts from for ``rng_seed``.
+
+    Resuming it under any intervention reproduces ``run_sim`` with the same
+    seed and stream.
+    """
+    sim = sim_config or default_simulation_config()
+    system = system_config or default_system_config()
+    if rng_stream not in CHECKPOINT_STREAMS:
+        raise ValueError(f"Unknown rng_stream '{rng_stream}'. Valid options: {', '.join(CHECKPOINT_STREAMS)}")
+    rng = np.random.default_rng(rng_seed)
+    block = draw_random_block(rng, sim.timesteps, system.n_nodes) if rng_stream == "block-v1" else None
+    empty = np.empty((0, system.n_nodes))
+    return Checkpoint(
+        step=0,
+        X=np.array(system.X0, dtype=float),
+        D=np.array(system.D0, dtype=float),
+        rng_state=rng.bit_generator.state,
+        context=InterventionContext(),
+        healthspan=None,
+        X_hist=empty,
+        D_hist=empty,
+        block=block,
+    )
+
+
+def _advance_checkpoint(
+    checkpoint: Checkpoint,
+    schedule: InterventionSchedule,
+    sim: SimulationConfig,
+    system: SystemConfig,
+    stop: int,
+) -> Checkpoint:
+    """Run a copy of ``checkpoint`` under ``schedule`` up to the start of step ``stop``."""
+    if checkpoint.finished(sim) or stop <= checkpoint.step:
+        return checkpoint
+    n_steps = sim.timesteps
+    X_full = np.empty((n_steps, system.n_nodes))
+    D_full = np.empty((n_steps, system.n_nodes))
+    X_full[: checkpoint.step] = checkpoint.X_hist
+    D_full[: checkpoint.step] = checkpoint.D_hist
+    history = _HistoryBuffer("full", 1, n_steps, system.n_nodes, out=(X_full, D_full))
+    history.seek(checkpoint.step)
+
+    X = checkpoint.X.copy()
+    D = checkpoint.D.copy()
+    rng = checkpoint.rng()
+    ws = StepWorkspace(system.n_nodes, dense_coupling=not is_sparse_coupling(system.C_base))
+    healthspan, death_step = _advance(
+        X,
+        D,
+        rng,
+        ws,
+        schedule.adjustments(),
+        sim,
+        system,
+        history,
+        checkpoint.step,
+        stop,
+        healthspan_age=checkpoint.healthspan,
+        block=checkpoint.block,
+    )
+    lifespan: Optional[float] = None
+    cause_of_death: Optional[int] = None
+    step = stop
+    if death_step is not None:
+        lifespan = sim.start_age + death_step * sim.dt
+        cause_of_death = _sample_cause_of_death(X, sim, rng)
+        step = death_step + 1
+    return Checkpoint(
+        step=step,
+        X=X,
+        D=D,
+        rng_state=rng.bit_generator.state,
+        context=schedule.context_at(step),
+        healthspan=healthspan,
+        X_hist=X_full[:step],
+        D_hist=D_full[:step],
+        block=checkpoint.block,
+        lifespan=lifespan,
+        cause_of_death=cause_of_death,
+    )
+
+
+def resume(
+    checkpoint: Checkpoint,
+    intervention: str = "none",
+    until_age: Optional[float] = None,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    intervention_config: Optional[InterventionConfig] = None,
+) -> Checkpoint:
+    """
+    Continue a checkpoint under ``intervention`` up to ``until_age`` (default: the end).
+
+    The checkpoint itself is not modified, so it can be resumed again under
+    other interventions. Configs must match those the checkpoint was taken
+    with; the steps before the checkpoint are assumed to agree with
+    ``intervention``.
+    """
+    sim = sim_config or default_simulation_config()
+    system = system_config or default_system_config()
+    inter_cfg = intervention_config or default_intervention_config()
+    schedule = compile_schedule(intervention, sim, system, inter_cfg)
+    stop = sim.timesteps if until_age is None else _step_at(until_age, sim)
+    return _advance_checkpoint(checkpoint, schedule, sim, system, stop)
+
+
+def _step_at(age: float, sim: SimulationConfig) -> int:
+    step = int(np.ceil(round((age - sim.start_age) / sim.dt, 9)))
+    return min(max(step, 0), sim.timesteps)
+
+
+def _first_disagreement(agree: NDArray[np.bool_], start: int) -> int:
+    misses = np.flatnonzero(~agree[start:])
+    return start + int(misses[0]) if misses.size else agree.shape[0]
+
+
+def _fork_tree(
+    checkpoint: Checkpoint,
+    members: List[int],
+    schedules: Sequence[InterventionSchedule],
+    agree: Dict[tuple, NDArray[np.bool_]],
+    sim: SimulationConfig,
+    system: SystemConfig,
+    out: List[Optional[Checkpoint]],
+) -> None:
+    """Advance ``members`` together until their schedules diverge, then split into groups."""
+    lead = members[0]
+    split = min(_first_disagreement(agree[lead, m], checkpoint.step) for m in members)
+    checkpoint = _advance_checkpoint(checkpoint, schedules[lead], sim, system, split)
+    if len(members) == 1 or checkpoint.finished(sim):
+        for m in members:
+            out[m] = checkpoint
+        return
+
+    remaining = list(members)
+    while remaining:
+        head = remaining[0]
+        group = [m for m in remaining if agree[head, m][split]]
+        remaining = [m for m in remaining if m not in group]
+        _fork_tree(checkpoint, group, schedules, agree, sim, system, out)
+
+
+def fork(
+    checkpoint: Checkpoint,
+    scenarios: Sequence[str] = DEFAULT_SCENARIOS,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    intervention_config: Optional[InterventionConfig] = None,
+    record: str = "full",
+    record_every: int = 10,
+) -> Dict[str, SimulationResult]:
+    """
+    Branch several interventions from one checkpoint and run each to the end.
+
+    Scenarios are compiled and compared step by step; stretches on which a
+    group of them applies identical modifiers are simulated once for the
+    group. Each result equals resuming the checkpoint under that scenario
+    alone.
+
+    Parameters
+    ----------
+    checkpoint:
+        Starting state, e.g. from :func:`initial_checkpoint`.
+    scenarios:
+        Intervention keys to branch.
+    sim_config, system_config, intervention_config:
+        Configs the checkpoint was taken with.
+    record, record_every:
+        History mode of the returned results, as in ``run_sim``.
+    """
+    sim = sim_config or default_simulation_config()
+    system = system_config or default_system_config()
+    inter_cfg = intervention_config or default_intervention_config()
+    scenarios = list(scenarios)
+    schedules = [compile_schedule(name, sim, system, inter_cfg) for name in scenarios]
+    agree = {}
+    for i, a in enumerate(schedules):
+        for j, b in enumerate(schedules[i:], start=i):
+            agree[i, j] = agree[j, i] = a.agrees_with(b)
+
+    finished: List[Optional[Checkpoint]] = [None] * len(scenarios)
+    if scenarios:
+        _fork_tree(checkpoint, list(range(len(scenarios))), schedules, agree, sim, system, finished)
+    return {name: cp.to_result(sim, record, record_every) for name, cp in zip(scenarios, finished)}
+
+
+def run_forked(
+    scenarios: Sequence[str] = DEFAULT_SCENARIOS,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    intervention_config: Optional[InterventionConfig] = None,
+    rng_seed: SeedLike = None,
+    record: str = "full",
+    record_every: int = 10,
+    rng_stream: str = "stepwise-v1",
+) -> Dict[str, SimulationResult]:
+    """
+    Simulate a set of scenarios from one seed, sharing their common prefixes.
+
+    Equivalent to ``run_sim(name, rng_seed=rng_seed)`` for every scenario, so
+    unlike :func:`~aging_network.simulation.run_all_scenarios` all scenarios
+    see the same random stream. For the default scenarios the 30–45 span is
+    simulated once instead of seven times.
+    """
+    checkpoint = initial_checkpoint(sim_config, system_config, rng_seed, rng_stream)
+    return fork(checkpoint, scenarios, sim_config, system_config, intervention_config, record, record_every)
+
+
+def checkpoint_run(
+    intervention: str = "none",
+    every_years: float = 5.0,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    intervention_config: Optional[InterventionConfig] = None,
+    rng_seed: SeedLike = None,
+    rng_stream: str = "stepwise-v1",
+) -> List[Checkpoint]:
+    """
+    Run one trajectory, keeping a checkpoint every ``every_years``.
+
+    The list starts with the initial state and ends with the finished run, so
+    ``checkpoints[-1].to_result(sim)`` gives the run itself. Pass the list to
+    :func:`rerun_from_checkpoints` after a parameter change.
+    """
+    sim = sim_config or default_simulation_config()
+    system = system_config or default_system_config()
+    inter_cfg = intervention_config or default_intervention_config()
+    if every_years <= 0:
+        raise ValueError(f"every_years must be > 0, got {every_years}")
+    schedule = compile_schedule(intervention, sim, system, inter_cfg)
+    stride = max(1, int(round(every_years / sim.dt)))
+    checkpoints = [initial_checkpoint(sim, system, rng_seed, rng_stream)]
+    while not checkpoints[-1].finished(sim):
+        stop = min(checkpoints[-1].step + stride, sim.timesteps)
+        checkpoints.append(_advance_checkpoint(checkpoints[-1], schedule, sim, system, stop))
+    return checkpoints
+
+
+def rerun_from_checkpoints(
+    checkpoints: Sequence[Checkpoint],
+    intervention: str,
+    previous_config: InterventionConfig,
+    intervention_config: InterventionConfig,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    record: str = "full",
+    record_every: int = 10,
+) -> SimulationResult:
+    """
+    Re-simulate a run after its intervention config changed, e.g. a slider move.
+
+    The old and new schedules are compared and the run resumes from the latest
+    checkpoint before the first step where they differ. Moving
+    ``drug_start_age`` from 60 to 55 therefore re-simulates only from 55, and
+    an unchanged schedule re-uses the finished run. The result matches a
+    fresh ``run_sim`` with the new config and the original seed.
+
+    Parameters
+    ----------
+    checkpoints:
+        Checkpoints from :func:`checkpoint_run` with ``previous_config``.
+    intervention:
+        Intervention key of the original run.
+    previous_config, intervention_config:
+        Old and new intervention configs.
+    sim_config, system_config:
+        Unchanged configs of the original run.
+    record, record_every:
+        History mode of the returned result, as in ``run_sim``.
+    """
+    sim = sim_config or default_simulation_config()
+    system = system_config or default_system_config()
+    old = compile_schedule(intervention, sim, system, previous_config)
+    new = compile_schedule(intervention, sim, system, intervention_config)
+    diverge = _first_disagreement(old.agrees_with(new), 0)
+    usable = [cp for cp in checkpoints if cp.step <= diverge]
+    if not usable:
+        raise ValueError("No checkpoint precedes the first changed step; pass the initial checkpoint too")
+    start = max(usable, key=lambda cp: cp.step)
+    return _advance_checkpoint(start, new, sim, system, sim.timesteps).to_result(sim, record, record_every)
+
@@ -0,0 +1,367 @@
+"""Ingest of ELSA-style wave files into a cached ``(subject, wave, measure)`` cube."""
+
+import csv
+import io
+import itertools
+import json
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import stable_hash
+
+Array = NDArray[np.float64]
+
+FORMAT_VERSION = 2
+"""Version of the cached cube layout written to ``meta.json``; part of the cache key."""
+
+ELSA_COLUMNS: Dict[str, str] = {
+    "mmgsd": "grip_strength",
+    "gait1": "gait_speed",
+    "sys": "systolic_bp",
+    "hdl": "hdl_cholesterol",
+    "cflisen": "memory_immediate",
+    "psceda": "depression_score",
+    "crp": "crp",
+    "hehba1c": "hba1c",
+}
+"""ELSA core-file columns and the canonical measure names they load as."""
+
+CUBE_ARRAYS = (
+    "subject_ids",
+    "waves",
+    "values",
+    "observed",
+    "age",
+    "sex",
+    "death_observed",
+    "death_age",
+    "death_wave",
+)
+"""Arrays of a :class:`WaveCube`, one ``.npy`` file each in the cache."""
+
+WAVE_PATTERN = "wave_*_core.csv"
+"""Glob matching the wave files of an extract directory."""
+
+DEFAULT_CHUNK_ROWS = 100_000
+"""Rows parsed per chunk while reading a wave file."""
+
+SEX_CODES = ("F", "M")
+"""Values of the ``sex`` column; anything else loads as unknown (``""``)."""
+
+WAVE_KEY_COLUMNS = ("idauniq", "wave", "indager", "sex")
+"""Columns read from every wave file besides the ``column_map`` sources; all others are skipped."""
+
+MORTALITY_COLUMNS = ("subject_id", "death_observed", "death_age", "death_wave")
+"""Columns read from ``mortality.csv``."""
+
+_META = "meta.json"
+
+
+class WaveCube:
+    """
+    Panel measurements as a dense ``(subject, wave, measure)`` array.
+
+    ``values`` holds ``NaN`` wherever a measure was not recorded and
+    ``observed`` is the matching missingness mask. Subject-level arrays are
+    indexed like the first axis of ``values``: ``sex`` (``"F"``, ``"M"`` or
+    ``""``), ``baseline_age``, and the mortality columns ``death_observed``,
+    ``death_age`` (``NaN`` if alive) and ``death_wave`` (``-1`` if alive).
+    ``age`` is the age at interview per subject and wave.
+
+    Cubes opened from the cache are read-only memory maps.
+    """
+
+    def __init__(self, measures: Sequence[str], arrays: Mapping[str, np.ndarray]) -> None:
+        self.measures = tuple(measures)
+        for name in CUBE_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @property
+    def n_subjects(self) -> int:
+        return int(self.subject_ids.shape[0])
+
+    @property
+    def n_waves(self) -> int:
+        return int(self.waves.shape[0])
+
+    @property
+    def baseline_age(self) -> Array:
+        """Age at each subject's first interview."""
+        seen = ~np.isnan(self.age)
+        first = np.argmax(seen, axis=1)
+        return np.where(seen.any(axis=1), self.age[np.arange(self.n_subjects), first], np.nan)
+
+    @property
+    def time_from_baseline(self) -> Array:
+        """Years since each subject's first interview, per wave."""
+        return self.age - self.baseline_age[:, None]
+
+    def measure(self, name: str) -> Array:
+        """``(subject, wave)`` values of one measure."""
+        if name not in self.measures:
+            raise ValueError(f"Unknown measure '{name}'. Valid options: {', '.join(self.measures)}")
+        return self.values[:, :, self.measures.index(name)]
+
+    def subject_index(self, subject_ids: Sequence[int]) -> NDArray[np.int64]:
+        """Row of each subject id in the cube."""
+        ids = np.asarray(subject_ids, dtype=np.int64)
+        rows = np.searchsorted(self.subject_ids, ids)
+        rows = np.minimum(rows, self.n_subjects - 1)
+        missing = self.subject_ids[rows] != ids
+        if missing.any():
+            raise KeyError(f"Unknown subject ids: {ids[missing][:10].tolist()}")
+        return rows
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Write the cube as ``.npy`` files plus ``meta.json``, replacing ``path`` atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=path.parent, prefix=path.name + "."))
+        try:
+            for name in CUBE_ARRAYS:
+                np.save(tmp / f"{name}.npy", np.asarray(getattr(self, name)))
+            with open(tmp / _META, "w") as fh:
+                json.dump(dict(version=FORMAT_VERSION, measures=list(self.measures)), fh)
+            if path.exists():
+                shutil.rmtree(path)
+            os.replace(tmp, path)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "WaveCube":
+        """Memory-map a cube written by :meth:`save`."""
+        path = Path(path)
+        with open(path / _META) as fh:
+            meta = json.load(fh)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cube format version {meta.get('version')}")
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in CUBE_ARRAYS}
+        return cls(meta["measures"], arrays)
+
+
+def _fill_empty(text: str) -> str:
+    """Write ``nan`` into every empty field of comma-separated ``text``."""
+    # Two passes: ",,," leaves one empty field after the first.
+    text = text.replace(",,", ",nan,").replace(",,", ",nan,")
+    text = text.replace("\n,", "\nnan,").replace(",\n", ",nan\n")
+    if text.startswith(","):
+        text = "nan" + text
+    if text.endswith(","):
+        text += "nan"
+    return text
+
+
+def _sex_code(value: str) -> float:
+    return float(SEX_CODES.index(value)) if value in SEX_CODES else np.nan
+
+
+def _read_chunks(path: Path, chunk_rows: int, columns: Sequence[str]) -> Iterator[Tuple[List[str], Array]]:
+    """
+    ``(names, block)`` for consecutive blocks of at most ``chunk_rows`` rows.
+
+    Only the ``columns`` present in the file are parsed, so other columns
+    may hold anything (e.g. text). Blocks are parsed by NumPy's C reader as
+    floats: empty fields become ``NaN`` and a ``sex`` column is coded as an
+    index into ``SEX_CODES``. ``names`` gives the block's columns in order.
+    """
+    with open(path) as fh:
+        header = next(csv.reader([fh.readline()]))
+        usecols = [i for i, name in enumerate(header) if name in columns]
+        names = [header[i] for i in usecols]
+        converters = {header.index("sex"): _sex_code} if "sex" in names else None
+        while True:
+            lines = list(itertools.islice(fh, chunk_rows))
+            if not lines:
+                break
+            text = _fill_empty("".join(lines).rstrip("\n"))
+            block = np.loadtxt(
+                io.StringIO(text), delimiter=",", ndmin=2, usecols=usecols, converters=converters, quotechar='"'
+            )
+            yield names, block
+
+
+def _drop_missing_codes(values: Array) -> Array:
+    """``values`` with ELSA missing-value codes (negative integers: -1, -8, -9, ...) set to ``NaN``."""
+    return np.where((values < 0) & (values == np.floor(values)), np.nan, values)
+
+
+def _wave_number(path: Path) -> int:
+    match = re.search(r"wave_(\d+)", path.name)
+    if match is None:
+        raise ValueError(f"Cannot infer a wave number from '{path.name}'")
+    return int(match.group(1))
+
+
+def _parse_waves(
+    files: Sequence[Path], column_map: Mapping[str, str], measures: Sequence[str], chunk_rows: int
+) -> Dict[str, np.ndarray]:
+    """Long arrays (one entry per subject-wave row) from every wave file, read in chunks."""
+    parts: Dict[str, List[np.ndarray]] = {"id": [], "wave": [], "age": [], "sex": [], "values": []}
+    for path in files:
+        for header, block in _read_chunks(path, chunk_rows, WAVE_KEY_COLUMNS + tuple(column_map)):
+            col = {name: block[:, i] for i, name in enumerate(header)}
+            n = block.shape[0]
+            parts["id"].append(col["idauniq"].astype(np.int64))
+            wave = col["wave"] if "wave" in col else np.full(n, _wave_number(path))
+            parts["wave"].append(wave.astype(np.int64))
+            parts["age"].append(_drop_missing_codes(col.get("indager", np.full(n, np.nan))))
+            parts["sex"].append(col.get("sex", np.full(n, np.nan)))
+            values = np.full((n, len(measures)), np.nan)
+            for source, measure in column_map.items():
+                if source in col:
+                    values[:, measures.index(measure)] = _drop_missing_codes(col[source])
+            parts["values"].append(values)
+    if not parts["id"]:
+        return dict(
+            id=np.empty(0, dtype=np.int64),
+            wave=np.empty(0, dtype=np.int64),
+            age=np.empty(0),
+            sex=np.empty(0),
+            values=np.empty((0, len(measures))),
+        )
+    return {name: np.concatenate(chunks) for name, chunks in parts.items()}
+
+
+def _parse_mortality(path: Optional[Path], chunk_rows: int) -> Dict[str, np.ndarray]:
+    """Subject-level mortality columns of ``mortality.csv``."""
+    parts: Dict[str, List[np.ndarray]] = {"id": [], "observed": [], "age": [], "wave": []}
+    if path is not None:
+        for header, block in _read_chunks(path, chunk_rows, MORTALITY_COLUMNS):
+            col = {name: block[:, i] for i, name in enumerate(header)}
+            parts["id"].append(col["subject_id"].astype(np.int64))
+            parts["observed"].append(col["death_observed"] == 1)
+            parts["age"].append(col["death_age"])
+            parts["wave"].append(np.where(np.isnan(col["death_wave"]), -1, col["death_wave"]).astype(np.int64))
+    if not parts["id"]:
+        empty = np.empty(0, dtype=np.int64)
+        return dict(id=empty, observed=np.empty(0, dtype=bool), age=np.empty(0), wave=empty.copy())
+    return {name: np.concatenate(chunks) for name, chunks in parts.items()}
+
+
+def build_cube(
+    wave_files: Sequence[Union[str, Path]],
+    mortality_file: Optional[Union[str, Path]] = None,
+    column_map: Optional[Mapping[str, str]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> WaveCube:
+    """
+    Parse wave files (and optionally a mortality file) into an in-memory :class:`WaveCube`.
+
+    Subjects are every ``idauniq`` seen in a wave or mortality file, sorted;
+    waves come from the ``wave`` column, or the file name if it has none.
+    When a subject-wave appears twice the later row wins. Only
+    ``WAVE_KEY_COLUMNS`` and the ``column_map`` sources are read, and ELSA's
+    negative missing-value codes in ``indager`` and the measures load as
+    ``NaN``, i.e. unobserved.
+    """
+    column_map = dict(column_map if column_map is not None else ELSA_COLUMNS)
+    measures = list(dict.fromkeys(column_map.values()))
+    files = [Path(f) for f in wave_files]
+    rows = _parse_waves(files, column_map, measures, chunk_rows)
+    deaths = _parse_mortality(Path(mortality_file) if mortality_file is not None else None, chunk_rows)
+
+    subject_ids = np.unique(np.concatenate([rows["id"], deaths["id"]]))
+    waves = np.unique(rows["wave"])
+    s = np.searchsorted(subject_ids, rows["id"])
+    w = np.searchsorted(waves, rows["wave"])
+    n_s, n_w = subject_ids.size, waves.size
+
+    values = np.full((n_s, n_w, len(measures)), np.nan)
+    values[s, w] = rows["values"]
+    age = np.full((n_s, n_w), np.nan)
+    age[s, w] = rows["age"]
+    sex = np.full(n_s, "", dtype="U1")
+    known = ~np.isnan(rows["sex"])
+    sex[s[known]] = np.asarray(SEX_CODES)[rows["sex"][known].astype(np.int64)]
+
+    d = np.searchsorted(subject_ids, deaths["id"])
+    death_observed = np.zeros(n_s, dtype=bool)
+    death_observed[d] = deaths["observed"]
+    death_age = np.full(n_s, np.nan)
+    death_age[d] = np.where(deaths["observed"], deaths["age"], np.nan)
+    death_wave = np.full(n_s, -1, dtype=np.int64)
+    death_wave[d] = np.where(deaths["observed"], deaths["wave"], -1)
+
+    return WaveCube(
+        measures,
+        dict(
+            subject_ids=subject_ids,
+            waves=waves,
+            values=values,
+            observed=~np.isnan(values),
+            age=age,
+            sex=sex,
+            death_observed=death_observed,
+            death_age=death_age,
+            death_wave=death_wave,
+        ),
+    )
+
+
+def _source_key(files: Sequence[Path], column_map: Mapping[str, str]) -> str:
+    """Cache key from the column map and each source file's name, size and modification time."""
+    stats = []
+    for f in files:
+        st = f.stat()
+        stats.append((str(f.resolve()), st.st_size, st.st_mtime_ns))
+    return stable_hash("wave_cube", FORMAT_VERSION, dict(column_map), stats)
+
+
+def load_waves(
+    raw_dir: Union[str, Path],
+    cache_dir: Union[str, Path, None] = None,
+    column_map: Optional[Mapping[str, str]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    refresh: bool = False,
+) -> WaveCube:
+    """
+    Load an ELSA-style extract directory as a :class:`WaveCube`, via a memory-mapped cache.
+
+    Reads every ``wave_*_core.csv`` file and ``mortality.csv`` (if present)
+    under ``raw_dir`` in chunks of ``chunk_rows`` rows. The cube is saved to
+    the cache under a key built from the column map and the files' paths,
+    sizes and modification times. Later loads of unchanged files just
+    memory-map the cached arrays.
+
+    Parameters
+    ----------
+    raw_dir:
+        Directory holding the wave and mortality files.
+    cache_dir:
+        Cache root; defaults to ``$AGING_NETWORK_CACHE`` or
+        ``~/.cache/aging_network``, with cubes under ``cohorts/``.
+    column_map:
+        Source column to canonical measure name; defaults to ``ELSA_COLUMNS``.
+    chunk_rows:
+        Rows parsed per chunk.
+    refresh:
+        Rebuild the cube even if a cached copy exists.
+    """
+    raw_dir = Path(raw_dir)
+    files = sorted(raw_dir.glob(WAVE_PATTERN), key=_wave_number)
+    if not files:
+        raise FileNotFoundError(f"No {WAVE_PATTERN} files in {raw_dir}")
+    mortality = raw_dir / "mortality.csv"
+    sources = files + ([mortality] if mortality.exists() else [])
+    column_map = dict(column_map if column_map is not None else ELSA_COLUMNS)
+
+    if cache_dir is None:
+        cache_dir = os.environ.get("AGING_NETWORK_CACHE") or Path.home() / ".cache" / "aging_network"
+    entry = Path(cache_dir) / "cohorts" / _source_key(sources, column_map)
+    if not refresh:
+        try:
+            return WaveCube.open(entry)
+        except (FileNotFoundError, ValueError):
+            pass
+    cube = build_cube(files, mortality if mortality.exists() else None, column_map, chunk_rows)
+    cube.save(entry)
+    return WaveCube.open(entry)
@@ -1,10 +1,16 @@
 """Configuration objects for the aging network simulation."""
 
-from dataclasses import dataclass, field
-from typing import Dict, Sequence
+import dataclasses
+import hashlib
+import json
+import struct
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields, is_dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Generic, List, Optional, Sequence, TypeVar
 
 import numpy as np
-from numpy.typing import NDArray
+from numpy.typing import ArrayLike, NDArray
 
 Array = NDArray[np.float64]
 
@@ -24,6 +30,24 @@ class SimulationConfig:
     def timesteps(self) -> int:
         return int(self.years / self.dt)
 
+    def observation_steps(self, ages: ArrayLike) -> Array:
+        """
+        Fractional time steps of observation ages, e.g. for ``run_sim(observe_at=...)``.
+
+        Ages must lie between the start age and the age of the last step;
+        steps within rounding error of an integer are snapped to it.
+        """
+        steps = (np.asarray(ages, dtype=float) - self.start_age) / self.dt
+        last = self.timesteps - 1
+        nearest = np.rint(steps)
+        steps = np.where(np.abs(steps - nearest) < 1e-9, nearest, steps)
+        if steps.ndim not in (1, 2) or not ((steps >= 0) & (steps <= last)).all():
+            raise ValueError(
+                f"observe_at must be a 1-D or 2-D array of ages in "
+                f"[{self.start_age:g}, {self.start_age + last * self.dt:g}]"
+            )
+        return steps
+
 
 @dataclass
 class SystemConfig:
@@ -38,7 +62,7 @@ class SystemConfig:
     base_recovery: Array
     gamma_recovery: Array
     k_ceiling: Array
-    C_base: Array
+    C_base: Array  # dense (n, n) array or SciPy sparse matrix, e.g. CSR
     gamma_coupling: float
     shock_prob_base: Array
     shock_mean_base: Array
@@ -142,3 +166,350 @@ DEFAULT_SCENARIOS = (
     "organ3",
     "parabiosis",
 )
+
+
+def _dataclass_digest(value: Any) -> str:
+    """Digest of a dataclass instance, field by field."""
+    h = hashlib.sha256(type(value).__name__.encode() + b"{")
+    for f in fields(value):
+        h.update(f.name.encode() + b"=")
+        _feed_hash(h, getattr(value, f.name))
+    h.update(b"}")
+    return h.hexdigest()
+
+
+def _feed_hash(h: Any, value: Any) -> None:
+    """Feed a canonical, type-tagged encoding of ``value`` into ``h``."""
+    if isinstance(value, FrozenConfig):
+        # Same encoding as the mutable config, via the cached digest.
+        h.update(b"dc:" + value.digest.encode() + b";")
+    elif is_dataclass(value) and not isinstance(value, type):
+        h.update(b"dc:" + _dataclass_digest(value).encode() + b";")
+    elif isinstance(value, np.generic):
+        _feed_hash(h, value.item())
+    elif isinstance(value, np.ndarray):
+        arr = np.ascontiguousarray(value)
+        h.update(f"nd:{arr.dtype.str}:{arr.shape}:".encode())
+        h.update(arr.tobytes())
+    elif hasattr(value, "tocsr"):
+        csr = value.tocsr()
+        csr.sort_indices()
+        h.update(f"csr:{csr.shape}:".encode())
+        for part in (csr.indptr, csr.indices, csr.data):
+            _feed_hash(h, part)
+    elif isinstance(value, Mapping):
+        h.update(b"map{")
+        for key in sorted(value, key=repr):
+            _feed_hash(h, key)
+            _feed_hash(h, value[key])
+        h.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        h.update(f"seq:{len(value)}[".encode())
+        for item in value:
+            _feed_hash(h, item)
+        h.update(b"]")
+    elif value is None or isinstance(value, (bool, int, float, str, bytes)):
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+    else:
+        raise TypeError(f"Cannot hash value of type {type(value).__name__}")
+
+
+def stable_hash(*values: Any) -> str:
+    """
+    SHA-256 hex digest of configs and plain values, stable across processes and runs.
+
+    Dataclasses hash field by field, arrays by dtype, shape and bytes, so two
+    equal configs always share a digest (unlike ``hash``, which is salted per
+    process and undefined for arrays).
+    """
+    h = hashlib.sha256()
+    for value in values:
+        _feed_hash(h, value)
+    return h.hexdigest()
+
+
+ConfigT = TypeVar("ConfigT", SimulationConfig, SystemConfig, InterventionConfig)
+
+CONFIG_TYPES: Dict[str, type] = {cls.__name__: cls for cls in (SimulationConfig, SystemConfig, InterventionConfig)}
+"""Config classes that :class:`FrozenConfig` can wrap and deserialize, by name."""
+
+_NODE_FIELDS = (
+    "X0",
+    "D0",
+    "base_decay",
+    "beta_decay",
+    "base_recovery",
+    "gamma_recovery",
+    "k_ceiling",
+    "shock_prob_base",
+    "shock_mean_base",
+    "shock_std_base",
+)
+
+_BINARY_MAGIC = b"ANCF1"
+
+
+def validate_config(config: Any) -> None:
+    """Raise ``ValueError`` if a config is internally inconsistent."""
+    if isinstance(config, SimulationConfig):
+        if config.dt <= 0 or config.years <= 0:
+            raise ValueError(f"dt and years must be > 0, got dt={config.dt}, years={config.years}")
+        if config.noise_std < 0:
+            raise ValueError(f"noise_std must be >= 0, got {config.noise_std}")
+        if not 0.0 <= config.death_threshold <= config.func_threshold <= 1.0:
+            raise ValueError(
+                "Thresholds must satisfy 0 <= death_threshold <= func_threshold <= 1, "
+                f"got {config.death_threshold} and {config.func_threshold}"
+            )
+    elif isinstance(config, SystemConfig):
+        n = config.n_nodes
+        if len(config.node_names) != n:
+            raise ValueError(f"node_names has {len(config.node_names)} entries for n_nodes={n}")
+        for name in _NODE_FIELDS:
+            shape = np.shape(getattr(config, name))
+            if shape != (n,):
+                raise ValueError(f"{name} must have shape {(n,)}, got {shape}")
+        if tuple(config.C_base.shape) != (n, n):
+            raise ValueError(f"C_base must have shape {(n, n)}, got {tuple(config.C_base.shape)}")
+    elif isinstance(config, InterventionConfig):
+        if config.parabiosis_duration < 0:
+            raise ValueError(f"parabiosis_duration must be >= 0, got {config.parabiosis_duration}")
+        if np.shape(config.organ_replacement_X) != np.shape(config.organ_replacement_D):
+            raise ValueError("organ_replacement_X and organ_replacement_D must have the same shape")
+    else:
+        raise TypeError(f"Unknown config type {type(config).__name__}. Valid options: {', '.join(CONFIG_TYPES)}")
+
+
+def _readonly(value: Any) -> Any:
+    """Read-only copy of a config field value."""
+    if isinstance(value, np.ndarray):
+        if not value.flags.writeable and value.base is None:
+            return value  # already an owned read-only copy; share it
+        arr = np.array(value)
+        arr.setflags(write=False)
+        return arr
+    if hasattr(value, "tocsr"):
+        if not value.data.flags.writeable:
+            return value
+        csr = value.tocsr(copy=True)
+        csr.sort_indices()
+        for part in (csr.data, csr.indices, csr.indptr):
+            part.setflags(write=False)
+        return csr
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _readonly(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_readonly(item) for item in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _encode(value: Any, buffers: Optional[List[np.ndarray]]) -> Any:
+    """JSON-compatible form of a field value; arrays go to ``buffers`` when given."""
+    if isinstance(value, np.ndarray):
+        if buffers is None:
+            return value.tolist()
+        buffers.append(np.ascontiguousarray(value))
+        return {"__array__": len(buffers) - 1, "dtype": value.dtype.str, "shape": list(value.shape)}
+    if hasattr(value, "tocsr"):
+        csr = value.tocsr()
+        parts = {name: _encode(getattr(csr, name), buffers) for name in ("data", "indices", "indptr")}
+        return {"__csr__": list(csr.shape), **parts}
+    if isinstance(value, Mapping):
+        return {str(key): _encode(item, buffers) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, buffers) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value: Any, buffers: Optional[Sequence[np.ndarray]]) -> Any:
+    if isinstance(value, dict):
+        if "__array__" in value:
+            return buffers[value["__array__"]]
+        if "__csr__" in value:
+            import scipy.sparse  # optional; only needed for sparse couplings
+
+            parts = [np.asarray(_decode(value[name], buffers)) for name in ("data", "indices", "indptr")]
+            return scipy.sparse.csr_matrix(tuple(parts), shape=tuple(value["__csr__"]))
+        return {key: _decode(item, buffers) for key, item in value.items()}
+    return value
+
+
+def _coerce(tp: Any, value: Any) -> Any:
+    """Restore a decoded field value to the type its annotation declares."""
+    if tp is Array:
+        return value if hasattr(value, "tocsr") else np.asarray(value, dtype=float)
+    if tp is float:
+        return float(value)
+    if tp is int:
+        return int(value)
+    if getattr(tp, "__origin__", None) in (dict, Dict, Mapping):
+        return {key: np.asarray(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+class FrozenConfig(Generic[ConfigT]):
+    """
+    Immutable, hashable, validated view of a config dataclass.
+
+    Attribute access (including properties such as
+    ``SimulationConfig.timesteps``) is forwarded to a private copy whose
+    arrays are read-only, so a frozen config can be passed anywhere the
+    mutable one is accepted. Equality and ``hash`` use a digest computed
+    once; :func:`stable_hash` reuses it and hashes a frozen config exactly
+    like the mutable one, so frozen configs make cheap dict, memoization and
+    cache keys. :meth:`replace` shares unchanged arrays, and pickling ships the
+    compact :meth:`to_bytes` form to worker processes.
+    """
+
+    __slots__ = ("_config", "_digest")
+
+    def __init__(self, config: ConfigT) -> None:
+        if isinstance(config, FrozenConfig):
+            config = config._config
+        validate_config(config)
+        values = {}
+        for f in fields(config):
+            value = _readonly(getattr(config, f.name))
+            values[f.name] = float(value) if f.type is float and isinstance(value, (int, float)) else value
+        object.__setattr__(self, "_config", dataclasses.replace(config, **values))
+        object.__setattr__(self, "_digest", None)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in FrozenConfig.__slots__:
+            raise AttributeError(name)
+        return getattr(self._config, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise dataclasses.FrozenInstanceError(f"cannot assign to field '{name}' of a frozen config")
+
+    def __delattr__(self, name: str) -> None:
+        raise dataclasses.FrozenInstanceError(f"cannot delete field '{name}' of a frozen config")
+
+    @property
+    def digest(self) -> str:
+        """Stable SHA-256 hex digest, computed once."""
+        if self._digest is None:
+            object.__setattr__(self, "_digest", _dataclass_digest(self._config))
+        return self._digest
+
+    def __hash__(self) -> int:
+        return int(self.digest[:16], 16)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FrozenConfig):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __repr__(self) -> str:
+        return f"FrozenConfig({self._config!r})"
+
+    def __reduce__(self):
+        return (FrozenConfig.from_bytes, (self.to_bytes(),))
+
+    def replace(self, **changes: Any) -> "FrozenConfig[ConfigT]":
+        """Copy with some fields changed, like ``dataclasses.replace``."""
+        return FrozenConfig(dataclasses.replace(self._config, **changes))
+
+    def thaw(self) -> ConfigT:
+        """Mutable config with writable copies of every array."""
+        values = {}
+        for f in fields(self._config):
+            value = getattr(self._config, f.name)
+            if isinstance(value, np.ndarray):
+                value = value.copy()
+            elif hasattr(value, "tocsr"):
+                value = value.copy()
+            elif isinstance(value, Mapping):
+                value = {key: np.array(item) for key, item in value.items()}
+            values[f.name] = value
+        return dataclasses.replace(self._config, **values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-compatible field values; arrays become (nested) lists."""
+        return {f.name: _encode(getattr(self._config, f.name), None) for f in fields(self._config)}
+
+    def to_json(self) -> str:
+        return json.dumps({"type": type(self._config).__name__, "fields": self.to_dict()})
+
+    @classmethod
+    def from_dict(cls, type_name: str, values: Dict[str, Any]) -> "FrozenConfig":
+        """Rebuild from the output of :meth:`to_dict` and the config class name."""
+        config_cls = CONFIG_TYPES.get(type_name)
+        if config_cls is None:
+            raise ValueError(f"Unknown config type '{type_name}'. Valid options: {', '.join(CONFIG_TYPES)}")
+        return cls(config_cls(**{f.name: _coerce(f.type, values[f.name]) for f in fields(config_cls)}))
+
+    @classmethod
+    def from_json(cls, text: str) -> "FrozenConfig":
+        payload = json.loads(text)
+        values = {key: _decode(value, None) for key, value in payload["fields"].items()}
+        return cls.from_dict(payload["type"], values)
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary form: a JSON header followed by the raw array buffers.
+
+        Arrays are stored once with their dtype and shape, so round-trips are
+        exact and much smaller and faster than pickling the dataclass.
+        """
+        buffers: List[np.ndarray] = []
+        header = {f.name: _encode(getattr(self._config, f.name), buffers) for f in fields(self._config)}
+        head = json.dumps({"type": type(self._config).__name__, "fields": header}).encode()
+        chunks = [_BINARY_MAGIC, struct.pack("<I", len(head)), head]
+        chunks += [buf.tobytes() for buf in buffers]
+        return b"".join(chunks)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FrozenConfig":
+        if not data.startswith(_BINARY_MAGIC):
+            raise ValueError("Not a serialized FrozenConfig")
+        offset = len(_BINARY_MAGIC)
+        (head_len,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        payload = json.loads(data[offset : offset + head_len])
+        offset += head_len
+
+        specs: List[Dict[str, Any]] = []
+
+        def collect(node: Any) -> None:
+            if isinstance(node, dict):
+                if "__array__" in node:
+                    specs.append(node)
+                for item in node.values():
+                    collect(item)
+            elif isinstance(node, list):
+                for item in node:
+                    collect(item)
+
+        collect(payload["fields"])
+        buffers: List[np.ndarray] = []
+        for spec in sorted(specs, key=lambda spec: spec["__array__"]):
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            buffers.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(spec["shape"]))
+            offset += count * dtype.itemsize
+        fields_ = {key: _decode(value, buffers) for key, value in payload["fields"].items()}
+        return cls.from_dict(payload["type"], fields_)
+
+
+def freeze(config: ConfigT) -> FrozenConfig[ConfigT]:
+    """Frozen, hashable view of ``config`` (see :class:`FrozenConfig`)."""
+    return FrozenConfig(config)
+
+
+def replace_config(config: ConfigT, **changes: Any) -> ConfigT:
+    """
+    Copy of a mutable or frozen config with some fields changed, like ``dataclasses.replace``.
+
+    A :class:`FrozenConfig` gives a frozen, validated copy sharing its
+    unchanged arrays (:meth:`FrozenConfig.replace`).
+    """
+    if isinstance(config, FrozenConfig):
+        return config.replace(**changes)
+    return dataclasses.replace(config, **changes)
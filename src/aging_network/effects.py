@@ -0,0 +1,301 @@
+"""Intervention effect estimates with vectorized bootstrap intervals."""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from .adaptive import Estimate
+from .paired import PairedResult
+from .parallel import SeedLike
+
+Array = NDArray[np.float64]
+
+EFFECT_METRICS = ("healthspan", "lifespan", "gap")
+"""Per-run quantities effects are computed on; ``gap`` is years lived below the functional threshold."""
+
+BOOTSTRAP_CELLS = 1 << 22
+"""Upper bound on ``replicates x runs`` resampled per chunk."""
+
+COUNT_CELLS = 1 << 18
+"""Resampling indices counted per ``bincount`` call; small enough for indices and counts to stay in cache."""
+
+Endpoints = Tuple[ArrayLike, ArrayLike]
+StatisticSpec = Union[str, float]
+
+
+@dataclass
+class Effect:
+    """Difference ``treated - baseline`` of one statistic of one metric, with its bootstrap interval."""
+
+    metric: str
+    statistic: str
+    treated: float
+    baseline: float
+    estimate: Estimate
+
+    @property
+    def value(self) -> float:
+        return self.estimate.value
+
+
+def metric_values(healthspan: ArrayLike, lifespan: ArrayLike, metric: str) -> Array:
+    """
+    Per-run values of ``metric`` from endpoint arrays.
+
+    ``NaN`` marks runs that never reach the event: ``healthspan`` never
+    dropped below threshold, ``lifespan`` survived the simulated range. The
+    ``gap`` is ``lifespan - healthspan``, zero for runs that die while still
+    healthy and ``NaN`` for runs alive at the end.
+    """
+    hs = np.asarray(healthspan, dtype=float)
+    ls = np.asarray(lifespan, dtype=float)
+    if metric == "healthspan":
+        return hs
+    if metric == "lifespan":
+        return ls
+    if metric == "gap":
+        return ls - np.where(np.isnan(hs), ls, hs)
+    raise ValueError(f"Unknown metric '{metric}'. Valid options: {', '.join(EFFECT_METRICS)}")
+
+
+def _statistic_name(statistic: StatisticSpec) -> Tuple[str, Optional[float]]:
+    """Name and quantile level of a statistic spec: ``"mean"``, ``"median"`` or a level in (0, 1)."""
+    if statistic == "mean":
+        return "mean", None
+    if statistic == "median":
+        return "median", 0.5
+    if isinstance(statistic, (int, float)) and 0.0 <= statistic <= 1.0:
+        return f"q{100 * statistic:g}", float(statistic)
+    raise ValueError(f"Unknown statistic '{statistic}'. Valid options: mean, median, a quantile level in [0, 1]")
+
+
+class _Sample:
+    """
+    Values of one metric, pre-sorted so resampled statistics only need per-run multiplicities.
+
+    The ``j``-th order statistic of a resample of ``n`` runs almost surely
+    sits within a few ``sqrt(n q (1 - q))`` ranks of ``j``, so quantiles are
+    located from one matrix product (the weight below a window of ranks) and
+    a cumulative sum over the window only; rows falling outside it use the
+    full cumulative sum.
+    """
+
+    def __init__(self, values: Array, levels: Sequence[float]) -> None:
+        n = values.size
+        finite = ~np.isnan(values)
+        # NaN (never reached) sorts last, as in the adaptive median.
+        self.order = np.argsort(np.where(finite, values, np.inf), kind="stable")
+        self.sorted = values[self.order]
+        rank = np.empty(n, dtype=np.int64)
+        rank[self.order] = np.arange(n)
+        columns = [np.where(finite, values, 0.0), finite.astype(float)]
+        self.windows: Dict[float, Tuple[int, int, int]] = {}
+        for q in levels:
+            j = int(np.floor((n - 1) * q))
+            half = int(10 * np.sqrt(n * q * (1.0 - q))) + 10
+            lo, hi = max(0, j - half), min(n, j + 2 + half)
+            self.windows[q] = (lo, hi, len(columns))
+            columns.append((rank < lo).astype(float))
+        self.columns = np.stack(columns, axis=1)
+
+    @property
+    def n(self) -> int:
+        return int(self.sorted.size)
+
+    def statistics(
+        self,
+        weights: Array,
+        specs: Sequence[Tuple[str, Optional[float]]],
+        sums: Optional[Array] = None,
+    ) -> Dict[str, Array]:
+        """
+        Every statistic in ``specs`` for each resample, given run multiplicities ``weights`` ``(B, n)``.
+
+        ``sums`` is ``weights @ self.columns`` when the caller has already
+        computed it as part of a larger product.
+        """
+        if sums is None:
+            sums = weights @ self.columns
+        out = {}
+        for name, q in specs:
+            if q is None:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    out[name] = sums[:, 0] / sums[:, 1]
+            else:
+                out[name] = self._quantile(weights, sums, q)
+        return out
+
+    def _quantile(self, weights: Array, sums: Array, q: float) -> Array:
+        """Linear interpolation between order statistics ``j`` and ``j + 1``, as np.quantile."""
+        h = (self.n - 1) * q
+        j = int(np.floor(h))
+        lo, hi, column = self.windows[q]
+        below = sums[:, column]
+        cdf = below[:, None] + np.cumsum(weights[:, self.order[lo:hi]], axis=1)
+        pos_lo = lo + (cdf <= j).sum(axis=1)
+        pos_hi = lo + (cdf <= j + 1).sum(axis=1)
+        outside = (below > j) | ((cdf[:, -1] <= j + 1) & (hi < self.n))
+        if outside.any():
+            full = np.cumsum(weights[outside][:, self.order], axis=1)
+            pos_lo[outside] = (full <= j).sum(axis=1)
+            pos_hi[outside] = (full <= j + 1).sum(axis=1)
+        low = self.sorted[np.minimum(pos_lo, self.n - 1)]
+        if h == j:
+            return low
+        return low + (h - j) * (self.sorted[np.minimum(pos_hi, self.n - 1)] - low)
+
+
+def _multiplicities(rng: np.random.Generator, rows: int, n: int) -> Array:
+    """
+    Per-run counts of ``rows`` resamples of ``n`` runs, ``(rows, n)``.
+
+    Indices are drawn as int32 in blocks of about ``COUNT_CELLS``, offset by
+    their row within the block so one ``bincount`` counts the whole block
+    while indices and counts stay in cache.
+    """
+    out = np.empty((rows, n))
+    block = max(1, COUNT_CELLS // n)
+    for start in range(0, rows, block):
+        k = min(block, rows - start)
+        flat = rng.integers(0, n, size=(k, n), dtype=np.int32)
+        flat += (np.arange(k, dtype=np.int32) * n)[:, None]
+        out[start : start + k] = np.bincount(flat.ravel(), minlength=k * n).reshape(k, n)
+    return out
+
+
+def bootstrap_effects(
+    treated: Endpoints,
+    baseline: Endpoints,
+    statistics: Sequence[StatisticSpec] = ("mean", "median"),
+    metrics: Sequence[str] = EFFECT_METRICS,
+    paired: bool = False,
+    n_boot: int = 10_000,
+    confidence: float = 0.95,
+    rng_seed: SeedLike = None,
+) -> Dict[Tuple[str, str], Effect]:
+    """
+    Effects of an intervention on statistics of healthspan, lifespan and their gap.
+
+    Each chunk of replicates draws one ``(B, n_runs)`` array of resampling
+    indices and turns it into per-run multiplicities, from which every
+    statistic of every metric follows without Python loops over replicates:
+    means as weighted sums, quantiles from cumulative weights over a window
+    of the pre-sorted runs.
+
+    The cost is linear in ``n_boot x n_runs`` per resampled arm: 10,000
+    replicates of 100,000 paired runs take about 16 s on one core, of which
+    drawing and counting the 10^9 resampling indices is more than half.
+
+    Parameters
+    ----------
+    treated, baseline:
+        ``(healthspan, lifespan)`` endpoint arrays, as returned by
+        :func:`~aging_network.simulation.run_many`.
+    statistics:
+        ``"mean"``, ``"median"`` or quantile levels such as ``0.9``. Means
+        skip ``NaN`` runs; quantiles sort them last.
+    metrics:
+        Subset of ``EFFECT_METRICS``.
+    paired:
+        Resample runs jointly, for ensembles on common random numbers where
+        run ``i`` of both arms shares a random stream (see
+        :func:`bootstrap_paired`). Otherwise each arm is resampled
+        independently.
+    n_boot:
+        Bootstrap replicates.
+    confidence:
+        Two-sided level of the percentile intervals.
+    rng_seed:
+        Seed of the resampling indices.
+
+    Returns
+    -------
+    Effects keyed by ``(metric, statistic name)``, e.g. ``("lifespan", "q90")``.
+    """
+    if not 0.0 < confidence < 1.0:
+        raise ValueError(f"confidence must be in (0, 1), got {confidence}")
+    if n_boot < 1:
+        raise ValueError(f"n_boot must be >= 1, got {n_boot}")
+    specs = [_statistic_name(s) for s in statistics]
+    levels = sorted({q for _, q in specs if q is not None})
+    arms = []
+    for healthspan, lifespan in (treated, baseline):
+        arms.append({m: _Sample(metric_values(healthspan, lifespan, m), levels) for m in metrics})
+    n_t = arms[0][metrics[0]].n if metrics else 0
+    n_b = arms[1][metrics[0]].n if metrics else 0
+    if paired and n_t != n_b:
+        raise ValueError(f"Paired arms need the same number of runs, got {n_t} and {n_b}")
+    if n_t == 0 or n_b == 0:
+        raise ValueError("Both arms need at least one run")
+
+    points = {}
+    for m in metrics:
+        stats = [arms[k][m].statistics(np.ones((1, n)), specs) for k, n in ((0, n_t), (1, n_b))]
+        for name, _ in specs:
+            points[m, name] = [float(stats[0][name][0]), float(stats[1][name][0])]
+
+    # One matrix product per weight matrix covers every metric, and both arms when paired.
+    products = []
+    for group in ([0, 1],) if paired else ([0], [1]):
+        blocks, spans, width = [], [], 0
+        for k in group:
+            for m in metrics:
+                columns = arms[k][m].columns
+                spans.append((k, m, slice(width, width + columns.shape[1])))
+                blocks.append(columns)
+                width += columns.shape[1]
+        products.append((np.hstack(blocks), spans))
+
+    rng = np.random.default_rng(rng_seed)
+    chunk = max(1, BOOTSTRAP_CELLS // max(n_t, n_b))
+    diffs: Dict[Tuple[str, str], List[Array]] = {key: [] for key in points}
+    for start in range(0, n_boot, chunk):
+        rows = min(chunk, n_boot - start)
+        w_t = _multiplicities(rng, rows, n_t)
+        weights = [w_t] if paired else [w_t, _multiplicities(rng, rows, n_b)]
+        stats = {}
+        for w, (columns, spans) in zip(weights, products):
+            sums = w @ columns
+            for k, m, span in spans:
+                stats[k, m] = arms[k][m].statistics(w, specs, sums[:, span])
+        for m in metrics:
+            for name, _ in specs:
+                diffs[m, name].append(stats[0, m][name] - stats[1, m][name])
+
+    tail = (1.0 - confidence) / 2.0
+    effects = {}
+    for (m, name), (treated_value, baseline_value) in points.items():
+        samples = np.concatenate(diffs[m, name])
+        samples = samples[~np.isnan(samples)]
+        if samples.size:
+            low, high = (float(v) for v in np.percentile(samples, (100 * tail, 100 * (1.0 - tail))))
+        else:
+            low, high = np.nan, np.nan
+        effects[m, name] = Effect(
+            metric=m,
+            statistic=name,
+            treated=treated_value,
+            baseline=baseline_value,
+            estimate=Estimate(treated_value - baseline_value, low, high),
+        )
+    return effects
+
+
+def bootstrap_paired(
+    result: PairedResult,
+    scenario: str,
+    baseline: str = "none",
+    **kwargs,
+) -> Dict[Tuple[str, str], Effect]:
+    """
+    :func:`bootstrap_effects` of ``scenario`` against ``baseline`` in a paired ensemble.
+
+    Runs are resampled jointly, so the intervals keep the variance reduction
+    of common random numbers. Keyword arguments are passed through.
+    """
+    arms = [
+        (result.metric(name, "healthspan"), result.metric(name, "lifespan")) for name in (scenario, baseline)
+    ]
+    return bootstrap_effects(arms[0], arms[1], paired=True, **kwargs)
@@ -0,0 +1,390 @@
+"""Per-subject particle filtering of hidden function and damage from cohort waves."""
+
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .calibration import MEASURE_NODES
+from .cohort import WaveCube
+from .config import SimulationConfig, SystemConfig, default_simulation_config, default_system_config
+from .model import StepAdjustment, step_state_batch
+from .parallel import SeedLike, resolve_executor, shard, spawn_seeds
+
+Array = NDArray[np.float64]
+
+FILTER_PARTICLES = 1 << 20
+"""Default upper bound on ``subjects x particles`` filtered per chunk."""
+
+CALIBRATION_DRAWS = 16
+"""Prior states drawn per sampled subject to calibrate the default observation model."""
+
+_LOG_2PI = float(np.log(2.0 * np.pi))
+
+
+@dataclass
+class ObservationModel:
+    """
+    Gaussian measurement model ``y_m = intercept_m + slope_m * X[node_m] + noise``.
+
+    One entry per cohort measure, in ``measures`` order; measures absent from
+    a wave (``NaN``) do not contribute to the likelihood.
+    """
+
+    measures: Tuple[str, ...]
+    nodes: NDArray[np.int64]
+    intercept: Array
+    slope: Array
+    noise_sd: Array
+
+    @classmethod
+    def calibrate(
+        cls,
+        cube: WaveCube,
+        X_baseline: Array,
+        node_names: Sequence[str],
+        measure_nodes: Optional[Mapping[str, Tuple[str, int]]] = None,
+        reliability: float = 0.5,
+    ) -> "ObservationModel":
+        """
+        Match each measure's baseline mean and spread to model states at baseline.
+
+        ``reliability`` is the share of a measure's between-subject variance
+        attributed to its node's X; the rest is measurement noise. The slope
+        sign follows the measure's direction in ``measure_nodes`` (defaults to
+        ``MEASURE_NODES``).
+        """
+        if not 0.0 < reliability < 1.0:
+            raise ValueError(f"reliability must be in (0, 1), got {reliability}")
+        mapping = measure_nodes if measure_nodes is not None else MEASURE_NODES
+        node_names = list(node_names)
+        measures, nodes, intercept, slope, noise_sd = [], [], [], [], []
+        for measure, (node, direction) in mapping.items():
+            if measure not in cube.measures:
+                continue
+            first = np.asarray(cube.measure(measure))[:, 0]
+            first = first[~np.isnan(first)]
+            k = node_names.index(node)
+            x_sd = X_baseline[:, k].std()
+            if first.size < 2 or x_sd == 0:
+                continue
+            y_sd = first.std(ddof=1)
+            b = direction * np.sqrt(reliability) * y_sd / x_sd
+            measures.append(measure)
+            nodes.append(k)
+            slope.append(b)
+            intercept.append(first.mean() - b * X_baseline[:, k].mean())
+            noise_sd.append(np.sqrt(1.0 - reliability) * y_sd)
+        return cls(
+            measures=tuple(measures),
+            nodes=np.array(nodes, dtype=np.int64),
+            intercept=np.array(intercept),
+            slope=np.array(slope),
+            noise_sd=np.array(noise_sd),
+        )
+
+    def log_likelihood(self, y: Array, X: Array) -> Array:
+        """Log density of observations ``y`` ``(k, n_measures)`` under particles ``X`` ``(k, P, n_nodes)``."""
+        predicted = self.intercept + self.slope * X[:, :, self.nodes]
+        z = (y[:, None, :] - predicted) / self.noise_sd
+        terms = -0.5 * z**2 - np.log(self.noise_sd) - 0.5 * _LOG_2PI
+        return np.where(np.isnan(y)[:, None, :], 0.0, terms).sum(axis=2)
+
+
+@dataclass
+class FilterResult:
+    """
+    Filtered state estimates per subject and wave.
+
+    Moments are of the weighted particles just after each wave's update and
+    are ``NaN`` for waves without an interview. ``log_likelihood`` is each
+    subject's log marginal likelihood of all its measurements given survival
+    to each interview. ``degenerate`` flags subjects for which no particle
+    survived to some interview; their survival constraint was dropped there.
+    """
+
+    subject_ids: NDArray[np.int64]
+    ages: Array
+    X_mean: Array
+    X_std: Array
+    D_mean: Array
+    D_std: Array
+    ess: Array
+    log_likelihood: Array
+    degenerate: NDArray[np.bool_]
+    particles_X: Optional[Array] = None
+    particles_D: Optional[Array] = None
+    weights: Optional[Array] = None
+
+
+def systematic_resample(weights: Array, rng: np.random.Generator) -> NDArray[np.int64]:
+    """
+    Systematic resampling indices for each row of ``weights`` ``(k, P)``.
+
+    All rows are resampled with one ``searchsorted`` by offsetting row ``r``'s
+    cumulative weights and stratified points into ``[r, r + 1]``.
+    """
+    k, P = weights.shape
+    cdf = np.cumsum(weights, axis=1)
+    cdf /= cdf[:, -1:]
+    offsets = np.arange(k)[:, None]
+    points = (rng.random((k, 1)) + np.arange(P)) / P + offsets
+    flat = np.searchsorted((cdf + offsets).ravel(), points.ravel(), side="right").reshape(k, P)
+    return np.minimum(flat - offsets * P, P - 1)
+
+
+def _baseline_pool(
+    origins: Array,
+    n_pool: int,
+    sim: SimulationConfig,
+    system: SystemConfig,
+    rng: np.random.Generator,
+) -> Dict[int, Tuple[Array, Array]]:
+    """States of simulated runs still alive at each origin step, the filters' priors."""
+    wanted = set(int(s) for s in origins)
+    pool: Dict[int, Tuple[Array, Array]] = {}
+    X = np.broadcast_to(system.X0, (n_pool, system.n_nodes)).astype(float)
+    D = np.broadcast_to(system.D0, (n_pool, system.n_nodes)).astype(float)
+    adjustment = StepAdjustment()
+    for t in range(max(wanted) + 1):
+        if t in wanted:
+            if X.shape[0] == 0:
+                raise ValueError(f"No prior run survives to age {sim.start_age + t * sim.dt:g}; raise n_prior")
+            pool[t] = (X.copy(), D.copy())
+        X, D, _ = step_state_batch(X, D, sim, system, adjustment, rng)
+        alive = ~(X < sim.death_threshold).any(axis=1)
+        X, D = X[alive], D[alive]
+    return pool
+
+
+def _filter_chunk(
+    values: Array,
+    steps: NDArray[np.int64],
+    pool: Dict[int, Tuple[Array, Array]],
+    origins: NDArray[np.int64],
+    observation: ObservationModel,
+    n_particles: int,
+    ess_threshold: float,
+    keep_particles: bool,
+    sim: SimulationConfig,
+    system: SystemConfig,
+    seed: np.random.SeedSequence,
+) -> Dict[str, Array]:
+    """
+    Filter one chunk of subjects; module-level so process pools can pickle it.
+
+    ``steps[i, w]`` is the step of wave ``w`` counted from subject ``i``'s
+    origin (-1 without interview). The dynamics do not depend on age, so all
+    subjects advance together on their own clocks. Subjects are ordered by
+    their last interview, so the ones still being filtered are a leading
+    slice of the particle arrays and each step works on views.
+    """
+    rng = np.random.default_rng(seed)
+    n_subjects, n_waves = steps.shape
+    n_nodes = system.n_nodes
+    P = n_particles
+    order = np.argsort(-steps.max(axis=1), kind="stable")
+    steps, values, origins = steps[order], values[order], origins[order]
+    last = steps.max(axis=1)
+
+    X = np.empty((n_subjects, P, n_nodes))
+    D = np.empty((n_subjects, P, n_nodes))
+    for origin in np.unique(origins):
+        rows = np.flatnonzero(origins == origin)
+        X_pool, D_pool = pool[int(origin)]
+        draw = rng.integers(0, X_pool.shape[0], size=(rows.size, P))
+        X[rows], D[rows] = X_pool[draw], D_pool[draw]
+    log_w = np.zeros((n_subjects, P))
+    alive = np.ones((n_subjects, P), dtype=bool)
+
+    out = {
+        name: np.full((n_subjects, n_waves, n_nodes), np.nan) for name in ("X_mean", "X_std", "D_mean", "D_std")
+    }
+    out["ess"] = np.full((n_subjects, n_waves), np.nan)
+    out["log_likelihood"] = np.zeros(n_subjects)
+    out["degenerate"] = np.zeros(n_subjects, dtype=bool)
+    events = {}
+    for i, w in zip(*np.nonzero(steps >= 0)):
+        events.setdefault(int(steps[i, w]), []).append((i, w))
+    adjustment = StepAdjustment()
+
+    for t in range(int(last.max()) + 1 if n_subjects else 0):
+        if t in events:
+            rows, waves = (np.array(v) for v in zip(*events[t]))
+            ll = observation.log_likelihood(values[rows, waves], X[rows])
+            prior = log_w[rows]
+            ok = alive[rows] & np.isfinite(prior)
+            collapsed = ~ok.any(axis=1)
+            out["degenerate"][rows[collapsed]] = True
+            # A collapsed subject restarts from its current particles with equal weights.
+            ok[collapsed] = True
+            prior[collapsed] = 0.0
+            alive[rows[collapsed]] = True
+            prior = np.where(ok, prior, -np.inf)
+            prior = prior - np.logaddexp.reduce(prior, axis=1, keepdims=True)
+            post = np.where(ok, prior + ll, -np.inf)
+            norm = np.logaddexp.reduce(post, axis=1, keepdims=True)
+            out["log_likelihood"][rows] += norm[:, 0]
+            log_w[rows] = post - norm
+
+            w = np.exp(log_w[rows])
+            for name, arr in (("X", X), ("D", D)):
+                mean = np.einsum("kp,kpn->kn", w, arr[rows])
+                var = np.einsum("kp,kpn->kn", w, arr[rows] ** 2) - mean**2
+                out[f"{name}_mean"][rows, waves] = mean
+                out[f"{name}_std"][rows, waves] = np.sqrt(np.maximum(var, 0.0))
+            ess = 1.0 / (w**2).sum(axis=1)
+            out["ess"][rows, waves] = ess
+
+            resample = (ess < ess_threshold * P) & (last[rows] > t)
+            if resample.any():
+                sel = rows[resample]
+                idx = systematic_resample(w[resample], rng)
+                X[sel] = np.take_along_axis(X[sel], idx[:, :, None], axis=1)
+                D[sel] = np.take_along_axis(D[sel], idx[:, :, None], axis=1)
+                log_w[sel] = -np.log(P)
+                alive[sel] = True
+
+        # Subjects with interviews after step t are rows [0, active).
+        active = int((last > t).sum())
+        if active == 0:
+            break
+        X_step, D_step, _ = step_state_batch(
+            X[:active].reshape(-1, n_nodes), D[:active].reshape(-1, n_nodes), sim, system, adjustment, rng
+        )
+        X[:active] = X_step.reshape(active, P, n_nodes)
+        D[:active] = D_step.reshape(active, P, n_nodes)
+        alive[:active] &= ~(X[:active] < sim.death_threshold).any(axis=2)
+
+    if keep_particles:
+        out["particles_X"], out["particles_D"] = X, D
+        out["weights"] = np.exp(log_w)
+    inverse = np.argsort(order)
+    return {name: arr[inverse] for name, arr in out.items()}
+
+
+def particle_filter(
+    cube: WaveCube,
+    n_particles: int = 1000,
+    observation_model: Optional[ObservationModel] = None,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    n_prior: int = 5000,
+    prior_every: int = 10,
+    ess_threshold: float = 0.5,
+    reliability: float = 0.5,
+    chunk_subjects: Optional[int] = None,
+    keep_particles: bool = False,
+    rng_seed: SeedLike = None,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> FilterResult:
+    """
+    Sequential Monte Carlo estimates of each subject's hidden X and D at every wave.
+
+    Each subject starts from ``n_particles`` states drawn from a simulated
+    population (``n_prior`` runs of the model) still alive at the subject's
+    baseline age, rounded down to ``prior_every`` steps. Particles of all
+    subjects in a chunk are held in ``(n_subjects, n_particles, n_nodes)``
+    arrays and advanced together with
+    :func:`~aging_network.model.step_state_batch`. At each interview they are
+    weighted by the measurements and by having survived, and subjects whose
+    effective sample size falls below ``ess_threshold * n_particles`` are
+    resampled systematically.
+
+    Parameters
+    ----------
+    cube:
+        Cohort panel, e.g. from :func:`~aging_network.cohort.load_waves`.
+    n_particles:
+        Particles per subject.
+    observation_model:
+        Measurement model; defaults to :meth:`ObservationModel.calibrate`
+        on the prior states at the subjects' baselines.
+    sim_config, system_config:
+        Model settings; only the "none" intervention is filtered.
+    n_prior:
+        Simulated runs the baseline priors are drawn from.
+    prior_every:
+        Step resolution of the baseline priors.
+    ess_threshold:
+        Resampling trigger as a share of ``n_particles``.
+    reliability:
+        Passed to :meth:`ObservationModel.calibrate` when no model is given.
+    chunk_subjects:
+        Subjects filtered per chunk; defaults to ``FILTER_PARTICLES // n_particles``.
+    keep_particles:
+        Also return the particles and weights at each subject's last interview.
+    rng_seed:
+        Seed of the prior population and of every chunk's filter.
+    workers, executor:
+        Process-pool sharding of the chunks, as in :func:`~aging_network.simulation.run_many`.
+    """
+    if not 0.0 <= ess_threshold <= 1.0:
+        raise ValueError(f"ess_threshold must be in [0, 1], got {ess_threshold}")
+    if prior_every < 1:
+        raise ValueError(f"prior_every must be >= 1, got {prior_every}")
+    sim = sim_config or default_simulation_config()
+    system = system_config or default_system_config()
+
+    baseline = cube.baseline_age
+    seen = ~np.isnan(baseline)
+    ages = np.asarray(cube.age)[seen]
+    start_steps = np.rint((baseline[seen] - sim.start_age) / sim.dt).astype(np.int64)
+    if (start_steps < 0).any():
+        raise ValueError(f"Subjects enter the cohort before the simulation start age {sim.start_age:g}")
+    origins = start_steps // prior_every * prior_every
+    steps = np.where(np.isnan(ages), -1, np.rint((np.nan_to_num(ages) - sim.start_age) / sim.dt) - origins[:, None])
+    steps = steps.astype(np.int64)
+
+    n_chunks = max(1, -(-int(seen.sum()) // (chunk_subjects or max(1, FILTER_PARTICLES // n_particles))))
+    seeds = spawn_seeds(rng_seed, n_chunks + 1)
+    rng = np.random.default_rng(seeds[0])
+    pool = _baseline_pool(np.unique(origins), n_prior, sim, system, rng)
+    if observation_model is None:
+        # About 1000 subjects, CALIBRATION_DRAWS prior states each from their origin's pool.
+        sampled, counts = np.unique(origins[:: max(1, origins.size // 1000)], return_counts=True)
+        X_baseline = np.concatenate(
+            [
+                pool[int(o)][0][rng.integers(0, pool[int(o)][0].shape[0], size=n * CALIBRATION_DRAWS)]
+                for o, n in zip(sampled, counts)
+            ]
+        )
+        observation_model = ObservationModel.calibrate(cube, X_baseline, system.node_names, reliability=reliability)
+    measure_idx = [cube.measures.index(m) for m in observation_model.measures]
+    values = np.asarray(cube.values)[seen][:, :, measure_idx]
+
+    parts = shard(list(range(int(seen.sum()))), n_chunks)
+    args: List[list] = [[], [], [], []]
+    for rows in parts:
+        rows = np.asarray(rows, dtype=np.int64)
+        used = np.unique(origins[rows])
+        args[0].append(values[rows])
+        args[1].append(steps[rows])
+        args[2].append({int(o): pool[int(o)] for o in used})
+        args[3].append(origins[rows])
+    fixed = [observation_model, n_particles, ess_threshold, keep_particles, sim, system]
+    mapped = [*args, *([value] * len(parts) for value in fixed), seeds[1 : len(parts) + 1]]
+    pool_exec = resolve_executor(workers, executor)
+    if pool_exec is not None:
+        chunks = list(pool_exec.map(_filter_chunk, *mapped))
+    else:
+        chunks = list(map(_filter_chunk, *mapped))
+
+    merged = {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+    return FilterResult(
+        subject_ids=np.asarray(cube.subject_ids)[seen],
+        ages=ages,
+        X_mean=merged["X_mean"],
+        X_std=merged["X_std"],
+        D_mean=merged["D_mean"],
+        D_std=merged["D_std"],
+        ess=merged["ess"],
+        log_likelihood=merged["log_likelihood"],
+        degenerate=merged["degenerate"],
+        particles_X=merged.get("particles_X"),
+        particles_D=merged.get("particles_D"),
+        weights=merged.get("weights"),
+    )
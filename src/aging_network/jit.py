@@ -0,0 +1,350 @@
+"""Optional Numba-compiled backend for the ``run_sim`` time loop.
+
+The whole integration loop runs in one compiled call. Random numbers are drawn
+from the caller's ``np.random.Generator`` in the same order as the NumPy
+kernel (or read from a pre-drawn ``block-v1`` block), so a given seed produces
+the same shocks and noise; trajectories agree
+with the NumPy backend up to floating-point summation order. When Numba is not
+installed (e.g. under Pyodide), ``NUMBA_AVAILABLE`` is False and callers fall
+back to the NumPy engine.
+
+Config-dependent inputs (CSR coupling, replacement masks, contiguous parameter
+arrays) are built once by :func:`prepare_numba`; ``run_sim`` caches them per
+intervention and config digest. A default 900-step run then costs about
+130-160 µs per call, of which the compiled loop itself is about 100 µs: it
+draws two normals and a uniform per node and step from the ``Generator``,
+which bounds it from below. Tens of microseconds per full-length run are not
+reachable with the ``stepwise-v1`` stream; batches of runs should use
+``run_batch`` instead.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import SimulationConfig, SystemConfig
+from .interventions import InterventionSchedule
+from .model import RandomBlock, is_sparse_coupling
+
+try:
+    import numba
+
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    numba = None
+    NUMBA_AVAILABLE = False
+
+Array = NDArray[np.float64]
+
+
+def _integrate(
+    X,
+    D,
+    rng,
+    dt,
+    noise_std,
+    func_threshold,
+    death_threshold,
+    base_decay,
+    beta_decay,
+    base_recovery,
+    gamma_recovery,
+    k_ceiling,
+    C_indptr,
+    C_indices,
+    C_data,
+    gamma_coupling,
+    shock_std,
+    alpha_base,
+    beta_shock,
+    decay_scale,
+    recovery_scale,
+    alpha_damage_scale,
+    shock_damage_scale,
+    shock_regime,
+    shock_prob,
+    shock_mean,
+    replace_step,
+    replace_X_mask,
+    replace_D_mask,
+    replacement_X,
+    replacement_D,
+    use_block,
+    block_uniform,
+    block_shock_normal,
+    block_noise_normal,
+    record,
+    X_hist,
+    D_hist,
+):
+    """
+    Compiled time loop; mirrors ``run_sim`` with ``step_state_inplace``.
+
+    Returns ``(healthspan_step, death_step)``, each -1 if never reached. X and
+    D hold the final (post-death) state on return.
+    """
+    n_steps = decay_scale.shape[0]
+    n = X.shape[0]
+    Dc = np.empty(n)
+    hits = np.empty(n, dtype=np.bool_)
+    local = np.empty(n)
+    total = np.empty(n)
+    healthspan_step = -1
+    death_step = -1
+
+    for t in range(n_steps):
+        if record:
+            X_hist[t] = X
+            D_hist[t] = D
+
+        regime = shock_regime[t]
+        for i in range(n):
+            Dc[i] = min(max(D[i], 0.0), 1.0)
+        for i in range(n):
+            u = block_uniform[t, i] if use_block else rng.random()
+            hits[i] = u < shock_prob[regime, i]
+        for i in range(n):
+            z = block_shock_normal[t, i] if use_block else rng.standard_normal()
+            mag = z * shock_std[i] + shock_mean[regime, i]
+            local[i] = max(mag, 0.0) if hits[i] else 0.0
+        for i in range(n):
+            propagated = 0.0
+            for k in range(C_indptr[i], C_indptr[i + 1]):
+                j = C_indices[k]
+                c = C_data[k] * (1.0 + gamma_coupling * ((Dc[j] + Dc[i]) / 2.0))
+                propagated += c * local[j]
+            total[i] = local[i] + propagated
+
+        for i in range(n):
+            dec = base_decay[i] * (1.0 + beta_decay[i] * Dc[i]) * decay_scale[t]
+            rec = base_recovery[i] * (1.0 - gamma_recovery[i] * Dc[i]) * recovery_scale[t]
+            rec = max(rec, 0.0)
+            xmax = 1.0 - k_ceiling[i] * Dc[i]
+            x = X[i] + -dec * X[i] * dt - total[i]
+            X[i] = x + rec * (xmax - x) * dt
+        for i in range(n):
+            z = block_noise_normal[t, i] if use_block else rng.standard_normal()
+            x = X[i] + noise_std * z
+            X[i] = min(max(x, 0.0), 1.0)
+
+        alpha = alpha_base * alpha_damage_scale[t]
+        for i in range(n):
+            d = D[i] + alpha * (1.0 - X[i]) * dt
+            d += beta_shock * (total[i] * shock_damage_scale[t]) * dt
+            D[i] = min(max(d, 0.0), 1.5)
+
+        if t == replace_step:
+            for i in range(n):
+                if replace_D_mask[i]:
+                    D[i] = replacement_D[i]
+                if replace_X_mask[i]:
+                    X[i] = replacement_X[i]
+
+        if healthspan_step < 0 and X.mean() < func_threshold:
+            healthspan_step = t
+
+        dead = False
+        for i in range(n):
+            if X[i] < death_threshold:
+                dead = True
+        if dead:
+            death_step = t
+            if record:
+                X_hist[t] = X
+                D_hist[t] = D
+            break
+
+    return healthspan_step, death_step
+
+
+if NUMBA_AVAILABLE:
+    _integrate = numba.njit(cache=True)(_integrate)
+
+
+def _coupling_csr(C: Any) -> Tuple[NDArray[np.int64], NDArray[np.int64], Array]:
+    """
+    CSR arrays for the compiled coupling loop.
+
+    A dense matrix keeps every entry, zeros included, so its row sums are
+    accumulated in the same order as the NumPy kernel's matrix product.
+    """
+    if is_sparse_coupling(C):
+        csr = C.tocsr()
+        csr.sort_indices()
+        return csr.indptr.astype(np.int64), csr.indices.astype(np.int64), csr.data.astype(float)
+    dense = np.asarray(C, dtype=float)
+    n = dense.shape[0]
+    indptr = np.arange(0, n * n + 1, n, dtype=np.int64)
+    indices = np.tile(np.arange(n, dtype=np.int64), n)
+    return indptr, indices, dense.ravel()
+
+
+@dataclass
+class NumbaInputs:
+    """
+    Arguments of the compiled loop that depend only on the configs and schedule.
+
+    Built once by :func:`prepare_numba` and reused across runs; the compiled
+    loop only reads these arrays (``X0``/``D0`` are copied per run).
+    """
+
+    dt: float
+    noise_std: float
+    func_threshold: float
+    death_threshold: float
+    X0: Array
+    D0: Array
+    base_decay: Array
+    beta_decay: Array
+    base_recovery: Array
+    gamma_recovery: Array
+    k_ceiling: Array
+    C_indptr: NDArray[np.int64]
+    C_indices: NDArray[np.int64]
+    C_data: Array
+    gamma_coupling: float
+    shock_std: Array
+    alpha_base: float
+    beta_shock: float
+    schedule: InterventionSchedule
+    replace_X_mask: NDArray[np.bool_]
+    replace_D_mask: NDArray[np.bool_]
+    replacement_X: Array
+    replacement_D: Array
+    unused_block: RandomBlock
+
+    @property
+    def n_steps(self) -> int:
+        """Steps of the compiled schedule."""
+        return int(self.schedule.decay_scale.shape[0])
+
+    @property
+    def n_nodes(self) -> int:
+        """Nodes of the network."""
+        return int(self.X0.shape[0])
+
+
+def prepare_numba(schedule: InterventionSchedule, sim: SimulationConfig, system: SystemConfig) -> NumbaInputs:
+    """Convert a compiled schedule and its configs to the contiguous arrays of the compiled loop."""
+    n_nodes = system.n_nodes
+    C_indptr, C_indices, C_data = _coupling_csr(system.C_base)
+    replace_X_mask = np.zeros(n_nodes, dtype=bool)
+    replace_D_mask = np.zeros(n_nodes, dtype=bool)
+    replacement_X = np.zeros(n_nodes)
+    replacement_D = np.zeros(n_nodes)
+    if schedule.replace_step >= 0:
+        if schedule.replacement_X is not None:
+            replace_X_mask[schedule.replace_nodes] = True
+            replacement_X = np.array(schedule.replacement_X, dtype=float)
+        if schedule.replacement_D is not None:
+            replace_D_mask[schedule.replace_nodes] = True
+            replacement_D = np.array(schedule.replacement_D, dtype=float)
+    unused = np.empty((0, n_nodes))
+    return NumbaInputs(
+        dt=float(sim.dt),
+        noise_std=float(sim.noise_std),
+        func_threshold=float(sim.func_threshold),
+        death_threshold=float(sim.death_threshold),
+        X0=np.array(system.X0, dtype=float),
+        D0=np.array(system.D0, dtype=float),
+        base_decay=np.array(system.base_decay, dtype=float),
+        beta_decay=np.array(system.beta_decay, dtype=float),
+        base_recovery=np.array(system.base_recovery, dtype=float),
+        gamma_recovery=np.array(system.gamma_recovery, dtype=float),
+        k_ceiling=np.array(system.k_ceiling, dtype=float),
+        C_indptr=C_indptr,
+        C_indices=C_indices,
+        C_data=np.array(C_data, dtype=float),
+        gamma_coupling=float(system.gamma_coupling),
+        shock_std=np.array(system.shock_std_base, dtype=float),
+        alpha_base=float(system.alpha_damage_from_low_X_base),
+        beta_shock=float(system.beta_damage_from_shock),
+        schedule=schedule,
+        replace_X_mask=replace_X_mask,
+        replace_D_mask=replace_D_mask,
+        replacement_X=replacement_X,
+        replacement_D=replacement_D,
+        unused_block=RandomBlock(uniform=unused, shock_normal=unused, noise_normal=unused),
+    )
+
+
+def integrate_numba(
+    inputs: NumbaInputs,
+    rng: np.random.Generator,
+    record: bool = True,
+    out: Optional[Tuple[Array, Array]] = None,
+    block: Optional[RandomBlock] = None,
+) -> Tuple[Array, Array, Array, Array, int, int]:
+    """
+    Run the compiled loop for one trajectory from prepared inputs.
+
+    Draws come from ``rng`` step by step (``stepwise-v1``) unless a pre-drawn
+    ``block`` (``block-v1``) is given.
+
+    Returns
+    -------
+    X, D, X_hist, D_hist, healthspan_step, death_step:
+        Final state, full-resolution histories (unfilled when ``record`` is
+        False) and the step indices of healthspan loss and death (-1 if none).
+    """
+    if not NUMBA_AVAILABLE:
+        raise RuntimeError("Numba is not installed; use the NumPy backend instead.")
+    n_steps = inputs.n_steps
+    n_nodes = inputs.n_nodes
+    if out is not None:
+        X_hist, D_hist = out
+    elif record:
+        X_hist = np.empty((n_steps, n_nodes))
+        D_hist = np.empty((n_steps, n_nodes))
+    else:
+        X_hist = D_hist = inputs.unused_block.uniform
+
+    X = inputs.X0.copy()
+    D = inputs.D0.copy()
+    use_block = block is not None
+    if block is None:
+        block = inputs.unused_block
+    schedule = inputs.schedule
+    healthspan_step, death_step = _integrate(
+        X,
+        D,
+        rng,
+        inputs.dt,
+        inputs.noise_std,
+        inputs.func_threshold,
+        inputs.death_threshold,
+        inputs.base_decay,
+        inputs.beta_decay,
+        inputs.base_recovery,
+        inputs.gamma_recovery,
+        inputs.k_ceiling,
+        inputs.C_indptr,
+        inputs.C_indices,
+        inputs.C_data,
+        inputs.gamma_coupling,
+        inputs.shock_std,
+        inputs.alpha_base,
+        inputs.beta_shock,
+        schedule.decay_scale,
+        schedule.recovery_scale,
+        schedule.alpha_damage_scale,
+        schedule.shock_damage_scale,
+        schedule.shock_regime,
+        schedule.shock_prob,
+        schedule.shock_mean,
+        schedule.replace_step,
+        inputs.replace_X_mask,
+        inputs.replace_D_mask,
+        inputs.replacement_X,
+        inputs.replacement_D,
+        use_block,
+        block.uniform,
+        block.shock_normal,
+        block.noise_normal,
+        record,
+        X_hist,
+        D_hist,
+    )
+    return X, D, X_hist, D_hist, int(healthspan_step), int(death_step)
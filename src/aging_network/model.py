@@ -1,7 +1,7 @@
 """Core dynamical equations for the aging network model."""
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional, Tuple
 
 import numpy as np
 from numpy.typing import NDArray
@@ -26,11 +26,22 @@ def max_health(D: Array, system: SystemConfig) -> Array:
     return 1.0 - system.k_ceiling * np.clip(D, 0.0, 1.0)
 
 
+def is_sparse_coupling(C: Any) -> bool:
+    """Whether a coupling matrix is a SciPy sparse matrix/array rather than a dense ndarray."""
+    return hasattr(C, "tocsr")
+
+
 def coupling_matrix(D: Array, system: SystemConfig) -> Array:
-    """Shock propagation matrix amplified by mean damage between subsystems."""
+    """
+    Shock propagation matrix amplified by mean damage between subsystems.
+
+    Always dense (a sparse ``C_base`` is densified); the integrators use
+    :func:`propagate_shocks` for sparse couplings instead.
+    """
+    C_base = system.C_base.toarray() if is_sparse_coupling(system.C_base) else system.C_base
     D_clipped = np.clip(D, 0.0, 1.0)
     avg_damage = (D_clipped[None, :] + D_clipped[:, None]) / 2.0
-    return system.C_base * (1.0 + system.gamma_coupling * avg_damage)
+    return C_base * (1.0 + system.gamma_coupling * avg_damage)
 
 
 def update_structural_damage(
@@ -74,6 +85,243 @@ class StepResult:
     replacement_applied: bool
 
 
+RNG_STREAMS = ("stepwise-v1", "block-v1", "event-v1")
+"""Random stream layouts; a layout fixes which draw feeds which quantity.
+
+``stepwise-v1``
+    Per step: ``rng.random(n)`` shock uniforms, ``n`` standard normals for
+    shock magnitudes, ``n`` standard normals for noise. The original layout.
+``block-v1``
+    Per run, before the first step: ``rng.random((timesteps, n))`` shock
+    uniforms, then ``rng.standard_normal((timesteps, 2, n))`` with magnitude
+    normals in ``[:, 0]`` and noise normals in ``[:, 1]``.
+``event-v1``
+    Per run: ``rng.standard_normal((timesteps, n))`` noise normals, then
+    ``rng.geometric(p)`` waiting times per node. On each shock, one normal
+    per shocked node for its magnitude followed by a geometric draw for its
+    next wait; when shock probabilities change, waits for all nodes are
+    redrawn at that step. See :class:`EventShockSampler`.
+
+In every layout the cause-of-death draw follows on the same generator.
+"""
+
+
+@dataclass
+class RandomBlock:
+    """Pre-drawn random numbers for a whole run (``block-v1`` layout)."""
+
+    uniform: Array
+    shock_normal: Array
+    noise_normal: Array
+
+
+def draw_random_block(rng: np.random.Generator, n_steps: int, n_nodes: int) -> RandomBlock:
+    """Draw every uniform and normal a run can consume in two generator calls."""
+    uniform = rng.random((n_steps, n_nodes))
+    normals = rng.standard_normal((n_steps, 2, n_nodes))
+    return RandomBlock(uniform=uniform, shock_normal=normals[:, 0], noise_normal=normals[:, 1])
+
+
+class EventShockSampler:
+    """
+    Event-driven shock sampling for the ``event-v1`` stream layout.
+
+    Rather than a Bernoulli trial per node and step, each node carries the
+    step of its next shock, drawn from a geometric distribution with the
+    current per-step shock probability. Magnitudes are drawn only when a shock
+    lands. Waiting times are memoryless, so redrawing them whenever the shock
+    probability changes (e.g. when a drug starts) leaves the shock statistics
+    identical to per-step Bernoulli sampling.
+    """
+
+    _NEVER = np.iinfo(np.int64).max
+
+    def __init__(self, rng: np.random.Generator, n_nodes: int) -> None:
+        self.rng = rng
+        self.next_step = np.full(n_nodes, self._NEVER, dtype=np.int64)
+        self.next_any = self._NEVER
+        self.shock_prob = np.full(n_nodes, np.nan)
+        self.local_shock = np.zeros(n_nodes)
+        self._prob_source: Optional[Array] = None
+
+    def _waits(self, prob: Array) -> NDArray[np.int64]:
+        waits = np.full(prob.shape, self._NEVER, dtype=np.int64)
+        active = prob > 0.0
+        if active.any():
+            waits[active] = self.rng.geometric(np.minimum(prob[active], 1.0))
+        return waits
+
+    def sample(self, t: int, shock_prob: Array, shock_mean: Array, shock_std: Array) -> Array:
+        """Return the local shocks landing at step ``t`` (a reused buffer)."""
+        if shock_prob is not self._prob_source and not np.array_equal(shock_prob, self.shock_prob):
+            np.copyto(self.shock_prob, shock_prob)
+            waits = self._waits(self.shock_prob)
+            # Step t is the first trial, so a wait of 1 lands now.
+            self.next_step = np.where(waits == self._NEVER, self._NEVER, t + waits - 1)
+            self.next_any = int(self.next_step.min())
+        self._prob_source = shock_prob
+
+        local = self.local_shock
+        local.fill(0.0)
+        if t < self.next_any:
+            return local
+        hits = np.flatnonzero(self.next_step == t)
+        mean = np.broadcast_to(shock_mean, local.shape)[hits]
+        std = np.broadcast_to(shock_std, local.shape)[hits]
+        local[hits] = np.maximum(mean + std * self.rng.standard_normal(hits.size), 0.0)
+        waits = self._waits(self.shock_prob[hits])
+        self.next_step[hits] = np.where(waits == self._NEVER, self._NEVER, t + waits)
+        self.next_any = int(self.next_step.min())
+        return local
+
+
+class StepWorkspace:
+    """
+    Preallocated scratch buffers for :func:`step_state_inplace`.
+
+    One workspace serves every step of a run, so the integrator does not
+    allocate temporaries per step. Use ``dense_coupling=False`` for a sparse
+    ``C_base``.
+    """
+
+    def __init__(self, n_nodes: int, dense_coupling: bool = True) -> None:
+        self.D_clipped = np.empty(n_nodes)
+        self.decay = np.empty(n_nodes)
+        self.recovery = np.empty(n_nodes)
+        self.ceiling = np.empty(n_nodes)
+        # Sparse couplings never materialize the n x n matrix.
+        self.coupling: Optional[Array] = np.empty((n_nodes, n_nodes)) if dense_coupling else None
+        self.uniform = np.empty(n_nodes)
+        self.hits = np.empty(n_nodes, dtype=bool)
+        self.magnitude = np.empty(n_nodes)
+        self.local_shock = np.empty(n_nodes)
+        self.propagated = np.empty(n_nodes)
+        self.total_shock = np.empty(n_nodes)
+        self.noise = np.empty(n_nodes)
+        self.tmp = np.empty(n_nodes)
+
+
+def step_state_inplace(
+    X: Array,
+    D: Array,
+    sim: SimulationConfig,
+    system: SystemConfig,
+    adjustment: StepAdjustment,
+    rng: np.random.Generator,
+    ws: StepWorkspace,
+    draws: Optional[Tuple[Optional[Array], Optional[Array], Array]] = None,
+    local_shock: Optional[Array] = None,
+) -> bool:
+    """
+    Fused, allocation-free version of :func:`step_state` that updates X and D in place.
+
+    Clipped damage is computed once and shared by the decay, recovery, ceiling
+    and coupling terms; all intermediates live in ``ws``. The arithmetic and
+    random draws match :func:`step_state` exactly. The total shock applied is
+    left in ``ws.total_shock``.
+
+    ``draws`` optionally supplies this step's ``(uniform, shock_normal,
+    noise_normal)`` rows from a :class:`RandomBlock`; ``rng`` is then unused.
+    ``local_shock`` optionally supplies pre-sampled local shocks (e.g. from
+    :class:`EventShockSampler`), skipping the per-step shock draws.
+
+    Returns
+    -------
+    bool
+        Whether an organ replacement was applied this step.
+    """
+    Dc = np.clip(D, 0.0, 1.0, out=ws.D_clipped)
+
+    dec = np.multiply(system.beta_decay, Dc, out=ws.decay)
+    dec += 1.0
+    dec *= system.base_decay
+    dec *= adjustment.decay_scale
+
+    rec = np.multiply(system.gamma_recovery, Dc, out=ws.recovery)
+    np.subtract(1.0, rec, out=rec)
+    rec *= system.base_recovery
+    rec *= adjustment.recovery_scale
+    np.clip(rec, 0.0, None, out=rec)
+
+    Xmax = np.multiply(system.k_ceiling, Dc, out=ws.ceiling)
+    np.subtract(1.0, Xmax, out=Xmax)
+
+    C = ws.coupling
+    if C is not None:
+        np.add(Dc[None, :], Dc[:, None], out=C)
+        C /= 2.0
+        C *= system.gamma_coupling
+        C += 1.0
+        C *= system.C_base
+
+    shock_prob = adjustment.shock_prob if adjustment.shock_prob is not None else system.shock_prob_base
+    shock_mean = adjustment.shock_mean if adjustment.shock_mean is not None else system.shock_mean_base
+
+    # sample local shocks (same draw order as step_state)
+    noise_normal = draws[2] if draws is not None else None
+    if local_shock is None:
+        if draws is None:
+            uniform = rng.random(out=ws.uniform)
+            mag = rng.standard_normal(out=ws.magnitude)
+        else:
+            uniform, shock_normal, _ = draws
+            mag = ws.magnitude
+            np.copyto(mag, shock_normal)
+        np.less(uniform, shock_prob, out=ws.hits)
+        mag *= system.shock_std_base
+        mag += shock_mean
+        np.maximum(mag, 0.0, out=mag)
+        local = ws.local_shock
+        local.fill(0.0)
+        np.copyto(local, mag, where=ws.hits)
+    else:
+        local = local_shock
+
+    if C is not None:
+        propagated = np.matmul(C, local, out=ws.propagated)
+    else:
+        propagated = propagate_shocks(local, Dc, system)
+    total = np.add(local, propagated, out=ws.total_shock)
+
+    tmp = np.negative(dec, out=ws.tmp)
+    tmp *= X
+    tmp *= sim.dt
+    X += tmp
+    X -= total
+
+    np.subtract(Xmax, X, out=tmp)
+    tmp *= rec
+    tmp *= sim.dt
+    X += tmp
+    if noise_normal is None:
+        noise = rng.standard_normal(out=ws.noise)
+        noise *= sim.noise_std
+    else:
+        noise = np.multiply(noise_normal, sim.noise_std, out=ws.noise)
+    X += noise
+    np.clip(X, 0.0, 1.0, out=X)
+
+    alpha_damage = system.alpha_damage_from_low_X_base * adjustment.alpha_damage_scale
+    np.subtract(1.0, X, out=tmp)
+    tmp *= alpha_damage
+    tmp *= sim.dt
+    D += tmp
+    np.multiply(total, adjustment.shock_damage_scale, out=tmp)
+    tmp *= system.beta_damage_from_shock
+    tmp *= sim.dt
+    D += tmp
+    np.clip(D, 0.0, 1.5, out=D)
+
+    if adjustment.replace_nodes is None:
+        return False
+    nodes = adjustment.replace_nodes
+    if adjustment.replacement_D is not None:
+        D[nodes] = adjustment.replacement_D[nodes]
+    if adjustment.replacement_X is not None:
+        X[nodes] = adjustment.replacement_X[nodes]
+    return True
+
+
 def step_state(
     X: Array,
     D: Array,
@@ -86,6 +334,9 @@ def step_state(
     """
     Advance the system by one time step, applying intervention adjustments.
 
+    Allocating wrapper around :func:`step_state_inplace`; the inputs are not
+    modified.
+
     Parameters
     ----------
     X, D:
@@ -99,32 +350,82 @@ def step_state(
     rng:
         Random generator for shocks and noise.
     """
-    dec = effective_decay(D, system) * adjustment.decay_scale
-    rec = effective_recovery(D, system) * adjustment.recovery_scale
-    Xmax = max_health(D, system)
-    C = coupling_matrix(D, system)
+    ws = StepWorkspace(system.n_nodes, dense_coupling=not is_sparse_coupling(system.C_base))
+    X_new = np.array(X, dtype=float)
+    D_new = np.array(D, dtype=float)
+    replacement_applied = step_state_inplace(X_new, D_new, sim, system, adjustment, rng, ws)
+    return StepResult(
+        X_new=X_new,
+        D_new=D_new,
+        total_shock=ws.total_shock,
+        replacement_applied=replacement_applied,
+    )
+
+
+def propagate_shocks(local_shock: Array, D_clipped: Array, system: SystemConfig) -> Array:
+    """
+    Damage-amplified shock propagation without building the coupling matrix.
+
+    Equivalent to ``coupling_matrix(D) @ local_shock`` but expands
+    ``C_base * (1 + gamma * (D_i + D_j) / 2)`` into two products with
+    ``C_base``, so it also applies row-wise to a batch of states and costs
+    O(nnz) per state when ``C_base`` is a SciPy sparse (e.g. CSR) matrix.
+
+    Parameters
+    ----------
+    local_shock:
+        Local shock magnitudes, shape ``(n_nodes,)`` or ``(n_runs, n_nodes)``.
+    D_clipped:
+        Structural damage clipped to [0, 1], same shape as ``local_shock``.
+    system:
+        System configuration providing ``C_base`` and ``gamma_coupling``.
+    """
+    half_gamma = 0.5 * system.gamma_coupling
+    C = system.C_base
+    # C @ x.T keeps the sparse operand on the left for batched states.
+    direct = np.asarray(C @ local_shock.T).T
+    weighted = np.asarray(C @ (D_clipped * local_shock).T).T
+    return direct * (1.0 + half_gamma * D_clipped) + half_gamma * weighted
+
+
+def step_state_batch(
+    X: Array,
+    D: Array,
+    sim: SimulationConfig,
+    system: SystemConfig,
+    adjustment: StepAdjustment,
+    rng: np.random.Generator,
+) -> Tuple[Array, Array, Array]:
+    """
+    Advance a batch of independent trajectories by one time step.
+
+    Vectorized counterpart of :func:`step_state` for states of shape
+    ``(n_runs, n_nodes)``. Organ replacement is left to the caller, which
+    tracks per-run replacement masks.
+
+    Returns
+    -------
+    X_new, D_new, total_shock:
+        Updated states and the total shock applied to each node.
+    """
+    shape = X.shape
+    D_clipped = np.clip(D, 0.0, 1.0)
+    dec = system.base_decay * (1.0 + system.beta_decay * D_clipped) * adjustment.decay_scale
+    rec = system.base_recovery * (1.0 - system.gamma_recovery * D_clipped) * adjustment.recovery_scale
+    Xmax = 1.0 - system.k_ceiling * D_clipped
 
     shock_prob = adjustment.shock_prob if adjustment.shock_prob is not None else system.shock_prob_base
     shock_mean = adjustment.shock_mean if adjustment.shock_mean is not None else system.shock_mean_base
-    shock_std = system.shock_std_base
 
-    # sample local shocks
-    hits = rng.random(system.n_nodes) < shock_prob
-    magnitudes = rng.normal(shock_mean, shock_std)
-    magnitudes = np.maximum(magnitudes, 0.0)
+    hits = rng.random(shape) < shock_prob
+    magnitudes = np.maximum(shock_mean + system.shock_std_base * rng.standard_normal(shape), 0.0)
     local_shock = np.where(hits, magnitudes, 0.0)
+    total_shock = local_shock + propagate_shocks(local_shock, D_clipped, system)
 
-    propagated_shock = C @ local_shock
-    total_shock = local_shock + propagated_shock
-
-    dX_decay = -dec * X * sim.dt
-    X_after_shock = X + dX_decay - total_shock
-
-    rec_clamped = np.clip(rec, 0.0, None)
-    dX_recovery = rec_clamped * (Xmax - X_after_shock) * sim.dt
-    X_new = X_after_shock + dX_recovery
-    X_new += rng.normal(0.0, sim.noise_std, size=system.n_nodes)
-    X_new = np.clip(X_new, 0.0, 1.0)
+    X_after_shock = X - dec * X * sim.dt - total_shock
+    X_new = X_after_shock + np.clip(rec, 0.0, None) * (Xmax - X_after_shock) * sim.dt
+    X_new += sim.noise_std * rng.standard_normal(shape)
+    np.clip(X_new, 0.0, 1.0, out=X_new)
 
     alpha_damage = system.alpha_damage_from_low_X_base * adjustment.alpha_damage_scale
     D_new = update_structural_damage(
@@ -136,19 +437,4 @@ def step_state(
         sim.dt,
         shock_damage_scale=adjustment.shock_damage_scale,
     )
-
-    replacement_applied = False
-    if adjustment.replace_nodes is not None:
-        nodes = adjustment.replace_nodes
-        if adjustment.replacement_D is not None:
-            D_new[nodes] = adjustment.replacement_D[nodes]
-        if adjustment.replacement_X is not None:
-            X_new[nodes] = adjustment.replacement_X[nodes]
-        replacement_applied = True
-
-    return StepResult(
-        X_new=X_new,
-        D_new=D_new,
-        total_shock=total_shock,
-        replacement_applied=replacement_applied,
-    )
+    return X_new, D_new, total_shock
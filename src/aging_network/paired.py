@@ -0,0 +1,151 @@
+"""Paired scenario ensembles driven by common random numbers."""
+
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .checkpoint import CHECKPOINT_STREAMS, run_forked
+from .config import DEFAULT_SCENARIOS, InterventionConfig, SimulationConfig, SystemConfig
+from .parallel import SeedLike, executor_width, resolve_executor, shard, spawn_seeds
+from .simulation import BACKENDS, run_sim
+
+Array = NDArray[np.float64]
+
+METRICS = ("healthspan", "lifespan")
+"""Per-run endpoints stored in a :class:`PairedResult`."""
+
+
+@dataclass
+class PairedResult:
+    """
+    Endpoints of ``n_runs`` paired runs per scenario.
+
+    Column ``i`` of every array comes from the same random stream, so
+    differences between rows are paired per run. Runs that never cross a
+    threshold hold ``NaN``.
+    """
+
+    scenarios: Tuple[str, ...]
+    healthspan: Array
+    lifespan: Array
+
+    @property
+    def n_runs(self) -> int:
+        return int(self.healthspan.shape[1])
+
+    def metric(self, scenario: str, metric: str = "healthspan") -> Array:
+        """Per-run values of ``metric`` for one scenario."""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Valid options: {', '.join(METRICS)}")
+        if scenario not in self.scenarios:
+            raise ValueError(f"Unknown scenario '{scenario}'. Valid options: {', '.join(self.scenarios)}")
+        return getattr(self, metric)[self.scenarios.index(scenario)]
+
+    def effect(self, scenario: str, baseline: str = "none", metric: str = "healthspan") -> Array:
+        """Per-run difference ``scenario - baseline``; NaN where either run is NaN."""
+        return self.metric(scenario, metric) - self.metric(baseline, metric)
+
+    def mean_effect(self, scenario: str, baseline: str = "none", metric: str = "healthspan") -> Tuple[float, float]:
+        """
+        Mean paired effect and its standard error over runs where both values exist.
+
+        The standard error uses the variance of the per-run differences, which
+        common random numbers keep far below the sum of the two scenarios'
+        variances.
+        """
+        diff = self.effect(scenario, baseline, metric)
+        diff = diff[~np.isnan(diff)]
+        if diff.size == 0:
+            return float("nan"), float("nan")
+        se = float(diff.std(ddof=1) / np.sqrt(diff.size)) if diff.size > 1 else float("nan")
+        return float(diff.mean()), se
+
+
+def _run_paired_chunk(
+    scenarios: Sequence[str],
+    seeds: Sequence[np.random.SeedSequence],
+    backend: str,
+    run_kwargs: Dict[str, Any],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Run one shard of paired runs; module-level so process pools can pickle it."""
+    hs = np.full((len(scenarios), len(seeds)), np.nan)
+    ls = np.full((len(scenarios), len(seeds)), np.nan)
+    for i, seed in enumerate(seeds):
+        if backend == "numpy":
+            results = run_forked(scenarios, rng_seed=seed, record="none", **run_kwargs)
+        else:
+            results = {s: run_sim(s, rng_seed=seed, record="none", backend=backend, **run_kwargs) for s in scenarios}
+        for k, name in enumerate(scenarios):
+            result = results[name]
+            if result.healthspan is not None:
+                hs[k, i] = result.healthspan
+            if result.lifespan is not None:
+                ls[k, i] = result.lifespan
+    return hs, ls
+
+
+def run_paired(
+    scenarios: Sequence[str] = DEFAULT_SCENARIOS,
+    n_runs: int = 100,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    intervention_config: Optional[InterventionConfig] = None,
+    rng_seed: SeedLike = None,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    backend: str = "numpy",
+    rng_stream: str = "stepwise-v1",
+) -> PairedResult:
+    """
+    Run every scenario on the same ``n_runs`` random streams (common random numbers).
+
+    Run ``i`` of each scenario is ``run_sim(scenario, rng_seed=seeds[i])`` with
+    the ``i``-th seed spawned from ``rng_seed``, so all scenarios see the same
+    shocks and noise and their differences are free of between-run noise.
+    On the NumPy backend each run's scenarios are forked from their shared
+    prefixes (see :func:`~aging_network.checkpoint.fork`).
+
+    Parameters
+    ----------
+    scenarios:
+        Intervention keys to compare.
+    n_runs:
+        Number of paired Monte Carlo runs.
+    sim_config, system_config, intervention_config:
+        Optional parameter overrides.
+    rng_seed:
+        Parent seed for the per-run streams.
+    workers, executor:
+        Process-pool sharding as in :func:`~aging_network.simulation.run_many`.
+    backend, rng_stream:
+        As in :func:`~aging_network.simulation.run_sim`. Only streams whose
+        draws do not depend on the intervention (``stepwise-v1``,
+        ``block-v1``) keep runs paired.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Valid options: {', '.join(BACKENDS)}")
+    if rng_stream not in CHECKPOINT_STREAMS:
+        raise ValueError(f"Unknown rng_stream '{rng_stream}'. Valid options: {', '.join(CHECKPOINT_STREAMS)}")
+    scenarios = tuple(scenarios)
+    pool = resolve_executor(workers, executor)
+    n_shards = 4 * executor_width(pool) if pool is not None else 1
+    chunks = shard(spawn_seeds(rng_seed, n_runs), n_shards)
+    run_kwargs: Dict[str, Any] = dict(
+        sim_config=sim_config,
+        system_config=system_config,
+        intervention_config=intervention_config,
+        rng_stream=rng_stream,
+    )
+    args = [[scenarios] * len(chunks), chunks, [backend] * len(chunks), [run_kwargs] * len(chunks)]
+    parts = list(pool.map(_run_paired_chunk, *args)) if pool is not None else list(map(_run_paired_chunk, *args))
+    if not parts:
+        empty = np.empty((len(scenarios), 0))
+        return PairedResult(scenarios=scenarios, healthspan=empty, lifespan=empty.copy())
+    return PairedResult(
+        scenarios=scenarios,
+        healthspan=np.concatenate([hs for hs, _ in parts], axis=1),
+        lifespan=np.concatenate([ls for _, ls in parts], axis=1),
+    )
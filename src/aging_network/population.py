@@ -0,0 +1,220 @@
+"""Heterogeneous populations: per-individual parameters sampled from marginals and a Gaussian copula."""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional, Tuple, Union
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from .config import FrozenConfig, SimulationConfig, SystemConfig, default_system_config, replace_config
+from .parallel import SeedLike
+
+Array = NDArray[np.float64]
+
+POPULATION_FIELDS = (
+    "X0",
+    "D0",
+    "base_decay",
+    "beta_decay",
+    "base_recovery",
+    "gamma_recovery",
+    "k_ceiling",
+    "shock_prob_base",
+    "shock_mean_base",
+    "shock_std_base",
+)
+"""Per-node ``SystemConfig`` fields that can vary between individuals."""
+
+MARGINALS = ("fixed", "normal", "lognormal", "uniform", "empirical")
+"""Marginal distributions of :class:`Marginal`; each is a transform of a standard normal score."""
+
+_VARIABLE = re.compile(r"^(\w+)(?:\[(\d+)\])?$")
+
+
+def _normal_cdf(z: Array) -> Array:
+    """Standard normal CDF (Abramowitz & Stegun 7.1.26, absolute error below 1.5e-7)."""
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+@dataclass(frozen=True)
+class Marginal:
+    """
+    Distribution of one population variable.
+
+    ``params`` by ``distribution``:
+
+    - ``"fixed"``: ``(value,)``
+    - ``"normal"``: ``(mean, sd)``
+    - ``"lognormal"``: ``(median, sigma)``, ``sigma`` on the log scale
+    - ``"uniform"``: ``(low, high)``
+    - ``"empirical"``: observed values, e.g. cohort baseline ages, sampled
+      by their quantile function
+    """
+
+    distribution: str
+    params: Tuple[float, ...]
+
+    def __post_init__(self) -> None:
+        if self.distribution not in MARGINALS:
+            raise ValueError(f"Unknown distribution '{self.distribution}'. Valid options: {', '.join(MARGINALS)}")
+        expected = {"fixed": 1, "normal": 2, "lognormal": 2, "uniform": 2}.get(self.distribution)
+        if expected is not None and len(self.params) != expected:
+            raise ValueError(f"'{self.distribution}' takes {expected} parameters, got {len(self.params)}")
+        if self.distribution == "empirical" and len(self.params) == 0:
+            raise ValueError("'empirical' needs at least one value")
+        if self.distribution in ("normal", "lognormal") and self.params[1] < 0:
+            raise ValueError(f"Scale of '{self.distribution}' must be >= 0, got {self.params[1]}")
+        if self.distribution == "uniform" and not self.params[0] <= self.params[1]:
+            raise ValueError(f"Uniform bounds must satisfy low <= high, got {self.params}")
+
+    def from_normal(self, z: Array) -> Array:
+        """Values with this marginal from standard normal scores ``z``."""
+        p = self.params
+        if self.distribution == "fixed":
+            return np.full(z.shape, float(p[0]))
+        if self.distribution == "normal":
+            return p[0] + p[1] * z
+        if self.distribution == "lognormal":
+            return p[0] * np.exp(p[1] * z)
+        u = _normal_cdf(z)
+        if self.distribution == "uniform":
+            return p[0] + (p[1] - p[0]) * u
+        return np.quantile(np.asarray(p, dtype=float), u)
+
+
+@dataclass
+class Population:
+    """
+    Per-individual parameters of a simulated population.
+
+    ``parameters`` maps fields of ``POPULATION_FIELDS`` to
+    ``(n_individuals, n_nodes)`` arrays; fields not listed keep their
+    ``SystemConfig`` value for everyone. ``start_age`` gives each
+    individual's age at entry (``None``: the simulation start age).
+    """
+
+    parameters: Dict[str, Array]
+    start_age: Optional[Array] = None
+    size: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        sizes = {arr.shape[0] for arr in self.parameters.values()}
+        if self.start_age is not None:
+            sizes.add(self.start_age.shape[0])
+        if len(sizes) != 1:
+            raise ValueError(f"Population arrays disagree on the number of individuals: {sorted(sizes)}")
+        for name, arr in self.parameters.items():
+            if name not in POPULATION_FIELDS:
+                raise ValueError(f"Unknown field '{name}'. Valid options: {', '.join(POPULATION_FIELDS)}")
+            if arr.ndim != 2:
+                raise ValueError(f"Population field '{name}' must be (n_individuals, n_nodes), got {arr.shape}")
+        self.size = sizes.pop()
+
+    def subset(self, rows: Union[slice, NDArray[np.int64]]) -> "Population":
+        """The individuals selected by ``rows``, e.g. one shard of a batched ensemble."""
+        return Population(
+            parameters={name: arr[rows] for name, arr in self.parameters.items()},
+            start_age=None if self.start_age is None else self.start_age[rows],
+        )
+
+    def system_for(self, system: SystemConfig, rows: Union[slice, NDArray[np.int64]]) -> SystemConfig:
+        """
+        ``system`` with the varied fields set to the ``(len(rows), n_nodes)`` parameters of ``rows``.
+
+        Used by :func:`~aging_network.batch.run_batch` for its working set;
+        :func:`~aging_network.model.step_state_batch` broadcasts the rows
+        against the batched states. The result is always mutable: a frozen
+        ``system`` is thawed, since per-row arrays are not a valid config.
+        """
+        if isinstance(system, FrozenConfig):
+            system = system.thaw()
+        return replace_config(system, **{name: arr[rows] for name, arr in self.parameters.items()})
+
+    def individual(self, system: SystemConfig, i: int) -> SystemConfig:
+        """The ``SystemConfig`` of individual ``i``, e.g. for a single ``run_sim``; frozen if ``system`` is."""
+        return replace_config(system, **{name: np.array(arr[i]) for name, arr in self.parameters.items()})
+
+    def entry_steps(self, sim: SimulationConfig) -> NDArray[np.int64]:
+        """Step at which each individual enters the simulation."""
+        if self.start_age is None:
+            return np.zeros(self.size, dtype=np.int64)
+        steps = np.rint((self.start_age - sim.start_age) / sim.dt).astype(np.int64)
+        if ((steps < 0) | (steps >= sim.timesteps)).any():
+            raise ValueError(
+                f"Start ages must lie in [{sim.start_age:g}, {sim.start_age + (sim.timesteps - 1) * sim.dt:g}]"
+            )
+        return steps
+
+
+@dataclass
+class PopulationSpec:
+    """
+    Distributions of per-individual parameters, sampled into a :class:`Population`.
+
+    ``marginals`` keys are a field of ``POPULATION_FIELDS``, optionally with
+    a node index (``"base_decay[2]"``), or ``"start_age"``. A key without an
+    index draws one value per individual for all nodes; indexed keys listed
+    after it override single nodes. Dependence between the variables, in
+    ``marginals`` order, comes from a Gaussian copula with correlation matrix
+    ``correlation`` (``None``: independent).
+    """
+
+    marginals: Mapping[str, Marginal]
+    correlation: Optional[ArrayLike] = None
+
+    def __post_init__(self) -> None:
+        for name in self.marginals:
+            match = _VARIABLE.match(name)
+            valid = match is not None and (
+                match.group(1) in POPULATION_FIELDS or (name == "start_age" and match.group(2) is None)
+            )
+            if not valid:
+                options = ", ".join(POPULATION_FIELDS + ("start_age",))
+                raise ValueError(f"Unknown variable '{name}'. Valid options: {options}")
+        if self.correlation is not None:
+            corr = np.asarray(self.correlation, dtype=float)
+            d = len(self.marginals)
+            if corr.shape != (d, d) or not np.allclose(corr, corr.T) or not np.allclose(np.diag(corr), 1.0):
+                raise ValueError(f"correlation must be a symmetric ({d}, {d}) matrix with unit diagonal")
+
+    def sample(
+        self,
+        n: int,
+        system_config: Optional[SystemConfig] = None,
+        rng_seed: SeedLike = None,
+    ) -> Population:
+        """Draw ``n`` individuals; unlisted nodes of a varied field keep their ``system_config`` value."""
+        system = system_config or default_system_config()
+        rng = np.random.default_rng(rng_seed)
+        names = list(self.marginals)
+        z = rng.standard_normal((n, len(names)))
+        if self.correlation is not None:
+            try:
+                chol = np.linalg.cholesky(np.asarray(self.correlation, dtype=float))
+            except np.linalg.LinAlgError:
+                raise ValueError("correlation must be positive definite") from None
+            z = z @ chol.T
+
+        parameters: Dict[str, Array] = {}
+        start_age = None
+        for j, name in enumerate(names):
+            values = self.marginals[name].from_normal(z[:, j])
+            if name == "start_age":
+                start_age = values
+                continue
+            match = _VARIABLE.match(name)
+            target = match.group(1)
+            if target not in parameters:
+                base = np.asarray(getattr(system, target), dtype=float)
+                parameters[target] = np.repeat(base[None, :], n, axis=0)
+            if match.group(2) is None:
+                parameters[target][:] = values[:, None]
+            else:
+                parameters[target][:, int(match.group(2))] = values
+        return Population(parameters=parameters, start_age=start_age)
+
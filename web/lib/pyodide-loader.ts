@@ -142,35 +142,11 @@ async function loadModelDefaults(pyodide: any): Promise<any> {
   const defaultsJson = await pyodide.runPythonAsync(
     python([
       'import json',
-      'from aging_network.config import default_intervention_config, default_simulation_config',
-      '',
-      'inter = default_intervention_config()',
-      'sim = default_simulation_config()',
+      'from aging_network.config import default_intervention_config, default_simulation_config, freeze',
       '',
       'output = {',
-      '  "simulation": {',
-      '    "start_age": float(sim.start_age),',
-      '    "years": float(sim.years),',
-      '    "dt": float(sim.dt),',
-      '    "func_threshold": float(sim.func_threshold),',
-      '    "death_threshold": float(sim.death_threshold),',
-      '    "noise_std": float(sim.noise_std),',
-      '  },',
-      '  "intervention": {',
-      '    "exercise_start_age": float(inter.exercise_start_age),',
-      '    "exercise_recovery_gain": float(inter.exercise_recovery_gain),',
-      '    "exercise_damage_reduction": float(inter.exercise_damage_reduction),',
-      '    "drug_start_age": float(inter.drug_start_age),',
-      '    "drug_shock_factor": float(inter.drug_shock_factor),',
-      '    "organ_replacement_age": float(inter.organ_replacement_age),',
-      '    "parabiosis_start_age": float(inter.parabiosis_start_age),',
-      '    "parabiosis_duration": float(inter.parabiosis_duration),',
-      '    "parabiosis_strength_k": float(inter.parabiosis_strength_k),',
-      '    "parabiosis_recovery_gain": float(inter.parabiosis_recovery_gain),',
-      '    "parabiosis_decay_reduction": float(inter.parabiosis_decay_reduction),',
-      '    "parabiosis_alpha_reduction": float(inter.parabiosis_alpha_reduction),',
-      '    "parabiosis_shock_damage_reduction": float(inter.parabiosis_shock_damage_reduction),',
-      '  }',
+      '  "simulation": freeze(default_simulation_config()).to_dict(),',
+      '  "intervention": freeze(default_intervention_config()).to_dict(),',
       '}',
       '',
       'json.dumps(output)',
@@ -241,10 +217,10 @@ export async function runSimulation(
     'import numpy as np',
     '',
     `config = json.loads(${JSON.stringify(configStr)})`,
-    'from aging_network.config import SimulationConfig',
+    'from aging_network.config import SimulationConfig, freeze',
     'from aging_network.simulation import run_sim',
     '',
-    'sim_config = SimulationConfig(**config) if config else None',
+    'sim_config = freeze(SimulationConfig(**config)) if config else None',
     '',
     `result = run_sim(${interventionStr}, sim_config=sim_config)`,
     '',
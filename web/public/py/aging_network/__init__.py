@@ -7,18 +7,46 @@ UI renders charts in JavaScript.
 
 from .config import (
     DEFAULT_SCENARIOS,
+    FrozenConfig,
     SimulationConfig,
     SystemConfig,
     default_intervention_config,
     default_simulation_config,
     default_system_config,
+    freeze,
+    stable_hash,
 )
+from .adaptive import AdaptiveResult, run_until
+from .aggregate import EnsembleAggregator
+from .batch import BatchResult, run_batch
+from .cache import CacheStats, MemoCache, ResultCache
+from .calibration import ABCState, CohortTargets, Prior, abc_smc, cohort_targets
+from .checkpoint import (
+    Checkpoint,
+    checkpoint_run,
+    fork,
+    initial_checkpoint,
+    rerun_from_checkpoints,
+    resume,
+    run_forked,
+)
+from .cohort import WaveCube, load_waves
+from .effects import Effect, bootstrap_effects, bootstrap_paired
+from .ensemble import EnsembleResult, run_ensemble
+from .filtering import FilterResult, ObservationModel, particle_filter
+from .paired import PairedResult, run_paired
+from .parallel import shutdown_executors
+from .population import Marginal, Population, PopulationSpec
 from .simulation import SimulationResult, run_all_scenarios, run_many, run_sim
+from .survival import SurvivalAnalysis, analyze_survival
 
 __all__ = [
     "DEFAULT_SCENARIOS",
     "SimulationConfig",
     "SystemConfig",
+    "FrozenConfig",
+    "freeze",
+    "stable_hash",
     "SimulationResult",
     "default_simulation_config",
     "default_system_config",
@@ -26,4 +54,42 @@ __all__ = [
     "run_sim",
     "run_many",
     "run_all_scenarios",
+    "EnsembleResult",
+    "run_ensemble",
+    "EnsembleAggregator",
+    "SurvivalAnalysis",
+    "analyze_survival",
+    "AdaptiveResult",
+    "run_until",
+    "PairedResult",
+    "run_paired",
+    "WaveCube",
+    "load_waves",
+    "Prior",
+    "CohortTargets",
+    "cohort_targets",
+    "ABCState",
+    "abc_smc",
+    "ObservationModel",
+    "FilterResult",
+    "particle_filter",
+    "Marginal",
+    "PopulationSpec",
+    "Population",
+    "Effect",
+    "bootstrap_effects",
+    "bootstrap_paired",
+    "BatchResult",
+    "run_batch",
+    "ResultCache",
+    "MemoCache",
+    "CacheStats",
+    "Checkpoint",
+    "initial_checkpoint",
+    "resume",
+    "fork",
+    "run_forked",
+    "checkpoint_run",
+    "rerun_from_checkpoints",
+    "shutdown_executors",
 ]
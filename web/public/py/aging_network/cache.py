@@ -0,0 +1,326 @@
+"""Content-addressed result caches: on disk, and in-process memoization."""
+
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import stable_hash
+from .parallel import SeedLike
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows / Pyodide
+    fcntl = None
+
+MODEL_VERSION = "1"
+"""Model-code version folded into every cache key; bump it whenever a change
+alters the output of a simulation for a given seed."""
+
+DEFAULT_CACHE_BYTES = 1 << 30
+"""Default size bound of a :class:`ResultCache` (1 GiB)."""
+
+DEFAULT_MEMO_ENTRIES = 128
+"""Default entry bound of a :class:`MemoCache`."""
+
+DEFAULT_MEMO_BYTES = 256 << 20
+"""Default byte budget of a :class:`MemoCache` (256 MiB)."""
+
+_SUFFIX = ".npz"
+
+
+@dataclass
+class CacheStats:
+    """Lookup counters of a cache since creation (or the last ``reset_stats``)."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def seed_key(rng_seed: SeedLike) -> Optional[tuple]:
+    """
+    Canonical description of a seed for cache keys, or None if it is not reproducible.
+
+    An int and the ``SeedSequence`` built from it describe the same stream
+    and get the same key.
+    """
+    if rng_seed is None:
+        return None
+    seq = rng_seed if isinstance(rng_seed, np.random.SeedSequence) else np.random.SeedSequence(rng_seed)
+    entropy = seq.entropy if isinstance(seq.entropy, int) else tuple(np.atleast_1d(seq.entropy).tolist())
+    # Children already spawned shift the seeds a later spawn hands out; a
+    # cache hit must spawn the same children (see ``run_many``).
+    return (entropy, tuple(seq.spawn_key), seq.pool_size, seq.n_children_spawned)
+
+
+class ResultCache:
+    """
+    Size-bounded, process-safe cache of NumPy arrays keyed by content hashes.
+
+    Each entry is one ``.npz`` file named by its key. Writes go to a temporary
+    file that is atomically renamed into place, so readers in other processes
+    see either the whole entry or none of it. Reads refresh the entry's
+    modification time, and when the directory grows past ``max_bytes`` the
+    least recently used entries are deleted. Eviction holds an advisory lock
+    where the platform supports one; a reader racing an eviction simply
+    misses. Each instance keeps a running estimate of the directory size (a
+    scan on its first write plus its own writes since) and only rescans when
+    the estimate exceeds ``max_bytes``, so writes stay O(1); entries written
+    by other processes are counted at the next scan.
+
+    Parameters
+    ----------
+    path:
+        Cache directory; defaults to ``$AGING_NETWORK_CACHE`` or
+        ``~/.cache/aging_network``.
+    max_bytes:
+        Upper bound on the total size of cached entries.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        if path is None:
+            path = os.environ.get("AGING_NETWORK_CACHE") or Path.home() / ".cache" / "aging_network"
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must be >= 0, got {max_bytes}")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._estimated_bytes: Optional[int] = None
+
+    @staticmethod
+    def key(kind: str, **parts: Any) -> str:
+        """Hash a result kind, its inputs and ``MODEL_VERSION`` into an entry key."""
+        return stable_hash(kind, MODEL_VERSION, parts)
+
+    def _entry(self, key: str) -> Path:
+        return self.path / key[:2] / (key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[Dict[str, NDArray[Any]]]:
+        """Arrays stored under ``key``, or None on a miss."""
+        entry = self._entry(key)
+        try:
+            with np.load(entry, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(entry)
+        except (FileNotFoundError, OSError, ValueError):
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return arrays
+
+    def put(self, key: str, arrays: Dict[str, NDArray[Any]]) -> Dict[str, NDArray[Any]]:
+        """Store ``arrays`` under ``key``, evicting down to ``max_bytes`` if needed; returns ``arrays``."""
+        if self._estimated_bytes is None:
+            self._estimated_bytes = self.size_bytes()
+        entry = self._entry(key)
+        entry.parent.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(fh, **arrays)
+                written = fh.tell()
+            os.replace(tmp, entry)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        self._estimated_bytes += written
+        if self._estimated_bytes > self.max_bytes:
+            self.evict()
+        return arrays
+
+    def entries(self):
+        """``(mtime, size, path)`` for every entry, least recently used first."""
+        found = []
+        for entry in self.path.glob("*/*" + _SUFFIX):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            found.append((st.st_mtime, st.st_size, entry))
+        found.sort()
+        return found
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Delete least recently used entries until the cache fits; returns the bytes freed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock():
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            freed = 0
+            for _, size, entry in entries:
+                if total - freed <= limit:
+                    break
+                try:
+                    entry.unlink()
+                except FileNotFoundError:
+                    pass
+                freed += size
+                self.stats.evictions += 1
+            self._estimated_bytes = total - freed
+        return freed
+
+    def clear(self) -> None:
+        self.evict(max_bytes=0)
+
+    def _lock(self):
+        return _FileLock(self.path / ".lock")
+
+
+class MemoCache:
+    """
+    Bounded in-process LRU cache with the same interface as :class:`ResultCache`.
+
+    Pass it as ``cache=`` to memoize ``run_sim``/``run_all_scenarios`` calls
+    within a session, e.g. while a notebook or the web app re-requests the
+    same run. Stored arrays are made read-only, so results handed out on a
+    hit (and the result that filled the entry) cannot be mutated by callers;
+    copy them before modifying. Entries are evicted least recently used first
+    once either ``max_entries`` or ``max_bytes`` is exceeded; ``stats``
+    counts hits, misses and evictions to help size the bounds.
+
+    Parameters
+    ----------
+    max_entries:
+        Maximum number of cached results.
+    max_bytes:
+        Maximum total ``nbytes`` of cached arrays. A single result larger than
+        this is not cached.
+    """
+
+    key = staticmethod(ResultCache.key)
+
+    def __init__(self, max_entries: int = DEFAULT_MEMO_ENTRIES, max_bytes: int = DEFAULT_MEMO_BYTES) -> None:
+        if max_entries < 0 or max_bytes < 0:
+            raise ValueError(f"max_entries and max_bytes must be >= 0, got {max_entries} and {max_bytes}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._estimated_bytes: Optional[int] = None
+        self._entries: "OrderedDict[str, Dict[str, NDArray[Any]]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def size_bytes(self) -> int:
+        return self._nbytes
+
+    def get(self, key: str) -> Optional[Dict[str, NDArray[Any]]]:
+        with self._lock:
+            arrays = self._entries.get(key)
+            if arrays is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return dict(arrays)
+
+    def put(self, key: str, arrays: Dict[str, NDArray[Any]]) -> Dict[str, NDArray[Any]]:
+        """Store read-only versions of ``arrays`` under ``key`` and return them."""
+        stored = {name: _frozen_array(arr) for name, arr in arrays.items()}
+        size = sum(arr.nbytes for arr in stored.values())
+        if size > self.max_bytes or self.max_entries == 0:
+            return stored
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._sizes[key]
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._nbytes += size
+            while len(self._entries) > self.max_entries or self._nbytes > self.max_bytes:
+                old, _ = self._entries.popitem(last=False)
+                self._nbytes -= self._sizes.pop(old)
+                self.stats.evictions += 1
+        return dict(stored)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._nbytes = 0
+
+    def reset_stats(self) -> None:
+        self.stats = CacheStats()
+
+
+def _frozen_array(arr: NDArray[Any]) -> NDArray[Any]:
+    """Read-only array owning its data; views are copied so the budget counts what is held."""
+    arr = np.asarray(arr)
+    if arr.base is not None:
+        arr = arr.copy()
+    arr.setflags(write=False)
+    return arr
+
+
+class _FileLock:
+    """Exclusive advisory lock on a file; a no-op where ``fcntl`` is unavailable."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fh = None
+
+    def __enter__(self) -> "_FileLock":
+        if fcntl is not None:
+            self._fh = open(self.path, "a")
+            fcntl.flock(self._fh, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._fh is not None:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+
+
+def _optional(value: Optional[float]) -> NDArray[np.float64]:
+    return np.array(np.nan if value is None else value)
+
+
+def _from_optional(value: NDArray[Any], cast=float) -> Optional[Any]:
+    return None if np.isnan(value) else cast(value)
+
+
+def result_to_arrays(result: Any) -> Dict[str, NDArray[Any]]:
+    """Flatten a ``SimulationResult`` into arrays for a cache entry."""
+    return dict(
+        age=result.age,
+        X_hist=result.X_hist,
+        D_hist=result.D_hist,
+        healthspan=_optional(result.healthspan),
+        lifespan=_optional(result.lifespan),
+        cause_of_death=_optional(result.cause_of_death),
+    )
+
+
+def result_from_arrays(arrays: Dict[str, NDArray[Any]]) -> Dict[str, Any]:
+    """Keyword arguments rebuilding a ``SimulationResult`` from :func:`result_to_arrays`."""
+    return dict(
+        age=arrays["age"],
+        X_hist=arrays["X_hist"],
+        D_hist=arrays["D_hist"],
+        healthspan=_from_optional(arrays["healthspan"]),
+        lifespan=_from_optional(arrays["lifespan"]),
+        cause_of_death=_from_optional(arrays["cause_of_death"], int),
+    )
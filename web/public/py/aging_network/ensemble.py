@@ -0,0 +1,390 @@
+"""Columnar on-disk storage for ensembles of full trajectories."""
+
+import json
+import os
+import shutil
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .config import (
+    InterventionConfig,
+    SimulationConfig,
+    SystemConfig,
+    default_simulation_config,
+    default_system_config,
+)
+from .parallel import SeedLike, executor_width, resolve_executor, shard, spawn_seeds
+from .simulation import SimulationResult, run_sim
+
+Array = NDArray[np.float64]
+
+FORMAT_VERSION = 1
+"""Version of the on-disk layout written to ``meta.json``."""
+
+ENSEMBLE_COLUMNS = ("healthspan", "lifespan", "cause_of_death", "offsets", "steps", "X", "D")
+"""Files of one shard: per-run endpoint columns, row offsets, and the flat history rows."""
+
+_META = "meta.json"
+
+
+@dataclass
+class _Shard:
+    """Memory-mapped columns of one shard; run ``r`` owns rows ``offsets[r]:offsets[r + 1]``."""
+
+    healthspan: Array
+    lifespan: Array
+    cause_of_death: NDArray[np.int64]
+    offsets: NDArray[np.int64]
+    steps: NDArray[np.int64]
+    X: Array
+    D: Array
+
+    @property
+    def n_runs(self) -> int:
+        return int(self.healthspan.shape[0])
+
+
+def _pack_shard(
+    results: Sequence[SimulationResult], start_age: float, dt: float, n_nodes: int
+) -> Dict[str, np.ndarray]:
+    """Flatten results into shard columns; histories are concatenated in run order."""
+    lengths = np.array([r.X_hist.shape[0] for r in results], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    n_rows = int(offsets[-1])
+    X = np.empty((n_rows, n_nodes))
+    D = np.empty((n_rows, n_nodes))
+    steps = np.empty(n_rows, dtype=np.int64)
+    for r, (lo, hi) in zip(results, zip(offsets[:-1], offsets[1:])):
+        X[lo:hi] = r.X_hist
+        D[lo:hi] = r.D_hist
+        steps[lo:hi] = np.rint((np.asarray(r.age) - start_age) / dt)
+    return dict(
+        healthspan=np.array([np.nan if r.healthspan is None else r.healthspan for r in results]),
+        lifespan=np.array([np.nan if r.lifespan is None else r.lifespan for r in results]),
+        cause_of_death=np.array(
+            [-1 if r.cause_of_death is None else r.cause_of_death for r in results], dtype=np.int64
+        ),
+        offsets=offsets,
+        steps=steps,
+        X=X,
+        D=D,
+    )
+
+
+class EnsembleResult:
+    """
+    Ensemble of full trajectories stored column-wise in a directory of shards.
+
+    Each shard holds per-run endpoint columns (``healthspan``, ``lifespan``,
+    ``cause_of_death``) and the runs' ragged histories as one flat
+    ``(n_rows, n_nodes)`` array per variable, with ``offsets`` marking where
+    each run's rows start and ``steps`` giving each row's time step. Shards
+    are ``.npy`` files opened as read-only memory maps, so opening an
+    ensemble and slicing a run or an age reads only the pages involved.
+    :meth:`append` adds a shard without touching existing ones; a shard
+    becomes visible only once ``meta.json`` is atomically replaced, so
+    readers never see a partial shard. One writer at a time is assumed.
+
+    Use :meth:`create` to start an ensemble and :meth:`open` to load one.
+    """
+
+    def __init__(self, path: Union[str, Path], meta: Dict[str, Any]) -> None:
+        self.path = Path(path)
+        self.meta = meta
+        self._shards: Dict[str, _Shard] = {}
+
+    @classmethod
+    def create(
+        cls,
+        path: Union[str, Path],
+        sim_config: Optional[SimulationConfig] = None,
+        system_config: Optional[SystemConfig] = None,
+        overwrite: bool = False,
+    ) -> "EnsembleResult":
+        """Start an empty ensemble at ``path`` for the given time grid and node set."""
+        sim = sim_config or default_simulation_config()
+        system = system_config or default_system_config()
+        path = Path(path)
+        if path.exists():
+            if not overwrite:
+                raise FileExistsError(f"{path} already exists; pass overwrite=True to replace it")
+            shutil.rmtree(path)
+        path.mkdir(parents=True)
+        meta = dict(
+            version=FORMAT_VERSION,
+            start_age=float(sim.start_age),
+            dt=float(sim.dt),
+            n_steps=int(sim.timesteps),
+            n_nodes=int(system.n_nodes),
+            node_names=list(system.node_names),
+            shards=[],
+        )
+        ensemble = cls(path, meta)
+        ensemble._write_meta()
+        return ensemble
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "EnsembleResult":
+        """Open an existing ensemble; no shard data is read until accessed."""
+        path = Path(path)
+        with open(path / _META) as fh:
+            meta = json.load(fh)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported ensemble format version {meta.get('version')}")
+        return cls(path, meta)
+
+    def check_grid(self, sim: SimulationConfig, system: SystemConfig) -> None:
+        """Raise ``ValueError`` unless ``sim`` and ``system`` have this ensemble's time grid and node count."""
+        expected = dict(
+            start_age=float(sim.start_age),
+            dt=float(sim.dt),
+            n_steps=int(sim.timesteps),
+            n_nodes=int(system.n_nodes),
+        )
+        mismatched = [
+            f"{key} {value!r} != {self.meta[key]!r}" for key, value in expected.items() if value != self.meta[key]
+        ]
+        if mismatched:
+            raise ValueError(f"Configs do not match the ensemble at {self.path}: {', '.join(mismatched)}")
+
+    def _write_meta(self) -> None:
+        tmp = self.path / (_META + ".tmp")
+        with open(tmp, "w") as fh:
+            json.dump(self.meta, fh)
+        os.replace(tmp, self.path / _META)
+
+    @property
+    def n_runs(self) -> int:
+        return sum(int(s["n_runs"]) for s in self.meta["shards"])
+
+    @property
+    def n_shards(self) -> int:
+        return len(self.meta["shards"])
+
+    def __len__(self) -> int:
+        return self.n_runs
+
+    def append(self, results: Sequence[SimulationResult]) -> None:
+        """Write ``results`` as a new shard."""
+        if not results:
+            return
+        columns = _pack_shard(results, self.meta["start_age"], self.meta["dt"], self.meta["n_nodes"])
+        name = f"shard-{self.n_shards:05d}"
+        tmp_dir = self.path / (name + ".tmp")
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir()
+        for column, values in columns.items():
+            np.save(tmp_dir / f"{column}.npy", values)
+        target = self.path / name
+        if target.exists():
+            # Left by a writer that died before listing it in meta.json.
+            shutil.rmtree(target)
+        os.replace(tmp_dir, target)
+        self.meta["shards"].append(dict(name=name, n_runs=len(results), n_rows=int(columns["offsets"][-1])))
+        self._write_meta()
+
+    def _shard(self, k: int) -> _Shard:
+        name = self.meta["shards"][k]["name"]
+        loaded = self._shards.get(name)
+        if loaded is None:
+            columns = {c: np.load(self.path / name / f"{c}.npy", mmap_mode="r") for c in ENSEMBLE_COLUMNS}
+            loaded = _Shard(**columns)
+            self._shards[name] = loaded
+        return loaded
+
+    def _locate(self, run: int) -> Tuple[int, int]:
+        """Shard index and run index within the shard of global run ``run``."""
+        if run < 0:
+            run += self.n_runs
+        if run < 0:
+            raise IndexError("run index out of range")
+        for k, info in enumerate(self.meta["shards"]):
+            if run < info["n_runs"]:
+                return k, run
+            run -= info["n_runs"]
+        raise IndexError("run index out of range")
+
+    def _column(self, name: str) -> np.ndarray:
+        parts = [getattr(self._shard(k), name) for k in range(self.n_shards)]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    @property
+    def healthspan(self) -> Array:
+        """Healthspan per run (NaN if never lost)."""
+        return self._column("healthspan")
+
+    @property
+    def lifespan(self) -> Array:
+        """Lifespan per run (NaN if the run survived the whole grid)."""
+        return self._column("lifespan")
+
+    @property
+    def cause_of_death(self) -> NDArray[np.int64]:
+        """Index of the failing node per run (-1 if the run survived)."""
+        return self._column("cause_of_death").astype(np.int64)
+
+    def endpoints(self) -> Tuple[Array, Array]:
+        """``(healthspan, lifespan)`` in the shape returned by ``run_many``."""
+        return self.healthspan, self.lifespan
+
+    def run(self, i: int) -> SimulationResult:
+        """Trajectory of run ``i``; histories are read-only views into the memory maps."""
+        k, r = self._locate(i)
+        shard_ = self._shard(k)
+        lo, hi = int(shard_.offsets[r]), int(shard_.offsets[r + 1])
+        healthspan = float(shard_.healthspan[r])
+        lifespan = float(shard_.lifespan[r])
+        cause = int(shard_.cause_of_death[r])
+        return SimulationResult(
+            age=self.meta["start_age"] + np.asarray(shard_.steps[lo:hi]) * self.meta["dt"],
+            X_hist=shard_.X[lo:hi],
+            D_hist=shard_.D[lo:hi],
+            healthspan=None if np.isnan(healthspan) else healthspan,
+            lifespan=None if np.isnan(lifespan) else lifespan,
+            cause_of_death=None if cause < 0 else cause,
+        )
+
+    def __getitem__(self, i: int) -> SimulationResult:
+        return self.run(i)
+
+    def __iter__(self) -> Iterator[SimulationResult]:
+        for i in range(self.n_runs):
+            yield self.run(i)
+
+    def at_age(self, age: float) -> Tuple[Array, Array, NDArray[np.bool_]]:
+        """
+        State of every run at ``age``.
+
+        Uses each run's latest recorded row at or before ``age``, so with a
+        sparse ``record`` mode the state is that of the last kept step. Only
+        the ``steps`` column and one row per run of ``X``/``D`` are read.
+
+        Returns
+        -------
+        X, D, alive:
+            ``(n_runs, n_nodes)`` states, NaN for runs dead by ``age`` or
+            with no row recorded by then, and the mask of runs still alive
+            at ``age``.
+        """
+        target = int(np.floor(round((age - self.meta["start_age"]) / self.meta["dt"], 9)))
+        n_nodes = self.meta["n_nodes"]
+        X_parts: List[Array] = []
+        D_parts: List[Array] = []
+        alive_parts: List[NDArray[np.bool_]] = []
+        for k in range(self.n_shards):
+            shard_ = self._shard(k)
+            offsets = np.asarray(shard_.offsets)
+            upto = np.concatenate([[0], np.cumsum(np.asarray(shard_.steps) <= target)])
+            counts = upto[offsets[1:]] - upto[offsets[:-1]]
+            lifespan = np.asarray(shard_.lifespan)
+            alive = np.isnan(lifespan) | (lifespan > age)
+            valid = alive & (counts > 0)
+            rows = offsets[:-1][valid] + counts[valid] - 1
+            X = np.full((shard_.n_runs, n_nodes), np.nan)
+            D = np.full((shard_.n_runs, n_nodes), np.nan)
+            X[valid] = shard_.X[rows]
+            D[valid] = shard_.D[rows]
+            X_parts.append(X)
+            D_parts.append(D)
+            alive_parts.append(alive)
+        if not X_parts:
+            empty = np.empty((0, n_nodes))
+            return empty, empty.copy(), np.empty(0, dtype=bool)
+        return np.concatenate(X_parts), np.concatenate(D_parts), np.concatenate(alive_parts)
+
+
+def _run_ensemble_chunk(
+    intervention: str,
+    seeds: Sequence[np.random.SeedSequence],
+    run_kwargs: Dict[str, Any],
+) -> List[SimulationResult]:
+    """Run one shard of trajectories; module-level so process pools can pickle it."""
+    return [run_sim(intervention, rng_seed=seed, **run_kwargs) for seed in seeds]
+
+
+def run_ensemble(
+    intervention: str,
+    path: Union[str, Path],
+    n_runs: int = 100,
+    sim_config: Optional[SimulationConfig] = None,
+    system_config: Optional[SystemConfig] = None,
+    intervention_config: Optional[InterventionConfig] = None,
+    rng_seed: SeedLike = None,
+    shard_runs: int = 1000,
+    record: str = "every_k",
+    record_every: int = 10,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    backend: str = "numpy",
+    rng_stream: str = "stepwise-v1",
+    append: bool = False,
+) -> EnsembleResult:
+    """
+    Run an ensemble and persist every trajectory to an :class:`EnsembleResult`.
+
+    Runs are seeded like :func:`~aging_network.simulation.run_many` and
+    written in shards of ``shard_runs``, so memory stays bounded by one shard
+    and an interrupted job keeps every completed shard.
+
+    Parameters
+    ----------
+    intervention:
+        Intervention key to simulate.
+    path:
+        Ensemble directory. A new ensemble is created unless ``append`` is
+        set, in which case the runs are added to the existing one. Its time
+        grid and node count must match ``sim_config``/``system_config``,
+        and the new runs are seeded as runs ``n_existing, n_existing + 1, ...``
+        of ``rng_seed``.
+    n_runs:
+        Number of Monte Carlo trajectories.
+    sim_config, system_config, intervention_config:
+        Optional parameter overrides.
+    rng_seed:
+        Parent seed of the per-run seeds.
+    shard_runs:
+        Runs per shard.
+    record, record_every:
+        History mode of the stored trajectories, as in ``run_sim``.
+    workers, executor:
+        Process-pool sharding as in ``run_many``.
+    backend, rng_stream:
+        As in ``run_sim``.
+    """
+    if shard_runs < 1:
+        raise ValueError(f"shard_runs must be >= 1, got {shard_runs}")
+    if append:
+        ensemble = EnsembleResult.open(path)
+        ensemble.check_grid(sim_config or default_simulation_config(), system_config or default_system_config())
+    else:
+        ensemble = EnsembleResult.create(path, sim_config, system_config)
+    pool = resolve_executor(workers, executor)
+    run_kwargs: Dict[str, Any] = dict(
+        sim_config=sim_config,
+        system_config=system_config,
+        intervention_config=intervention_config,
+        record=record,
+        record_every=record_every,
+        backend=backend,
+        rng_stream=rng_stream,
+    )
+    # Appended runs take the children after the stored runs, so reusing the
+    # seed extends the ensemble instead of repeating it.
+    first = ensemble.n_runs if append else 0
+    seeds = spawn_seeds(rng_seed, first + n_runs)[first:]
+    for lo in range(0, n_runs, shard_runs):
+        block = seeds[lo : lo + shard_runs]
+        if pool is not None:
+            chunks = shard(block, executor_width(pool))
+            parts = pool.map(_run_ensemble_chunk, [intervention] * len(chunks), chunks, [run_kwargs] * len(chunks))
+            results = [result for part in parts for result in part]
+        else:
+            results = _run_ensemble_chunk(intervention, block, run_kwargs)
+        ensemble.append(results)
+    return ensemble
@@ -1,13 +1,16 @@
 """Definitions of interventions applied to the aging network."""
 
 from dataclasses import dataclass
-from typing import Callable, Dict
+from typing import Callable, Dict, List, Optional
 
 import numpy as np
+from numpy.typing import NDArray
 
 from .config import InterventionConfig, SimulationConfig, SystemConfig
 from .model import StepAdjustment
 
+Array = NDArray[np.float64]
+
 
 @dataclass
 class InterventionContext:
@@ -133,3 +136,271 @@ INTERVENTIONS: Dict[str, InterventionFn] = {
     "organ3": make_organ_handler("organ3"),
     "parabiosis": apply_parabiosis,
 }
+
+# Handlers the vectorized compilers mirror; a replaced registry entry falls
+# back to step-by-step tabulation.
+_BUILTIN_INTERVENTIONS: Dict[str, InterventionFn] = dict(INTERVENTIONS)
+
+
+def select_intervention(name: str) -> InterventionFn:
+    """Look up a registered intervention handler by name."""
+    if name not in INTERVENTIONS:
+        valid = ", ".join(INTERVENTIONS.keys())
+        raise ValueError(f"Unknown intervention '{name}'. Valid options: {valid}")
+    return INTERVENTIONS[name]
+
+
+@dataclass
+class InterventionSchedule:
+    """
+    Intervention modifiers compiled into per-timestep arrays.
+
+    Shock overrides are stored as a small table of regimes: row ``k`` of
+    ``shock_prob``/``shock_mean`` applies on every step with
+    ``shock_regime == k``, so a change of regime marks a change point. At most
+    one replacement event happens, at ``replace_step`` (-1 if none).
+    """
+
+    decay_scale: Array
+    recovery_scale: Array
+    alpha_damage_scale: Array
+    shock_damage_scale: Array
+    shock_regime: NDArray[np.int64]
+    shock_prob: Array
+    shock_mean: Array
+    replace_step: int = -1
+    replace_nodes: Optional[np.ndarray] = None
+    replacement_X: Optional[Array] = None
+    replacement_D: Optional[Array] = None
+
+    @property
+    def n_steps(self) -> int:
+        return int(self.decay_scale.shape[0])
+
+    def context_at(self, step: int) -> InterventionContext:
+        """The handler context at the start of ``step``."""
+        return InterventionContext(organ_done=0 <= self.replace_step < step)
+
+    def agrees_with(self, other: "InterventionSchedule") -> NDArray[np.bool_]:
+        """
+        Per-step mask of steps on which both schedules apply identical modifiers.
+
+        Two runs from the same state and random stream stay identical up to
+        the first False entry.
+        """
+        same = (
+            (self.decay_scale == other.decay_scale)
+            & (self.recovery_scale == other.recovery_scale)
+            & (self.alpha_damage_scale == other.alpha_damage_scale)
+            & (self.shock_damage_scale == other.shock_damage_scale)
+        )
+        regimes_equal = np.array(
+            [
+                [
+                    np.array_equal(self.shock_prob[i], other.shock_prob[j])
+                    and np.array_equal(self.shock_mean[i], other.shock_mean[j])
+                    for j in range(other.shock_prob.shape[0])
+                ]
+                for i in range(self.shock_prob.shape[0])
+            ],
+            dtype=bool,
+        ).reshape(self.shock_prob.shape[0], other.shock_prob.shape[0])
+        same &= regimes_equal[self.shock_regime, other.shock_regime]
+        for step in {self.replace_step, other.replace_step} - {-1}:
+            same[step] &= (
+                self.replace_step == other.replace_step
+                and _same_array(self.replace_nodes, other.replace_nodes)
+                and _same_array(self.replacement_X, other.replacement_X)
+                and _same_array(self.replacement_D, other.replacement_D)
+            )
+        return same
+
+    def adjustments(self) -> List[StepAdjustment]:
+        """One :class:`StepAdjustment` per step; runs of identical steps share one object."""
+        columns = np.column_stack(
+            [
+                self.decay_scale,
+                self.recovery_scale,
+                self.alpha_damage_scale,
+                self.shock_damage_scale,
+                self.shock_regime,
+            ]
+        )
+        starts = np.flatnonzero(np.r_[True, (columns[1:] != columns[:-1]).any(axis=1)])
+        ends = np.r_[starts[1:], self.n_steps]
+        prob_rows = list(self.shock_prob)
+        mean_rows = list(self.shock_mean)
+        steps: List[StepAdjustment] = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            regime = int(self.shock_regime[start])
+            adjustment = StepAdjustment(
+                decay_scale=float(self.decay_scale[start]),
+                recovery_scale=float(self.recovery_scale[start]),
+                alpha_damage_scale=float(self.alpha_damage_scale[start]),
+                shock_prob=prob_rows[regime],
+                shock_mean=mean_rows[regime],
+                shock_damage_scale=float(self.shock_damage_scale[start]),
+            )
+            steps.extend([adjustment] * (end - start))
+        if self.replace_step >= 0:
+            event = StepAdjustment(**vars(steps[self.replace_step]))
+            event.replace_nodes = self.replace_nodes
+            event.replacement_X = self.replacement_X
+            event.replacement_D = self.replacement_D
+            steps[self.replace_step] = event
+        return steps
+
+
+def _same_array(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> bool:
+    if a is None or b is None:
+        return a is b
+    return np.array_equal(a, b)
+
+
+ScheduleCompiler = Callable[[SimulationConfig, SystemConfig, InterventionConfig], InterventionSchedule]
+
+
+def _step_ages(sim: SimulationConfig) -> Array:
+    return sim.start_age + np.arange(sim.timesteps) * sim.dt
+
+
+def _base_schedule(sim: SimulationConfig, system: SystemConfig) -> InterventionSchedule:
+    n_steps = sim.timesteps
+    return InterventionSchedule(
+        decay_scale=np.ones(n_steps),
+        recovery_scale=np.ones(n_steps),
+        alpha_damage_scale=np.ones(n_steps),
+        shock_damage_scale=np.ones(n_steps),
+        shock_regime=np.zeros(n_steps, dtype=np.int64),
+        shock_prob=np.array(system.shock_prob_base, dtype=float)[None, :],
+        shock_mean=np.array(system.shock_mean_base, dtype=float)[None, :],
+    )
+
+
+def compile_none(sim: SimulationConfig, system: SystemConfig, cfg: InterventionConfig) -> InterventionSchedule:
+    """Baseline schedule: every modifier at its neutral value."""
+    return _base_schedule(sim, system)
+
+
+def compile_exercise(sim: SimulationConfig, system: SystemConfig, cfg: InterventionConfig) -> InterventionSchedule:
+    """Vectorized :func:`apply_exercise`."""
+    schedule = _base_schedule(sim, system)
+    active = _step_ages(sim) >= cfg.exercise_start_age
+    schedule.recovery_scale[active] = 1.0 + cfg.exercise_recovery_gain
+    schedule.alpha_damage_scale[active] = 1.0 - cfg.exercise_damage_reduction
+    return schedule
+
+
+def compile_drug(sim: SimulationConfig, system: SystemConfig, cfg: InterventionConfig) -> InterventionSchedule:
+    """Vectorized :func:`apply_drug`: a second shock regime from onset."""
+    schedule = _base_schedule(sim, system)
+    schedule.shock_regime[_step_ages(sim) >= cfg.drug_start_age] = 1
+    schedule.shock_prob = np.vstack([schedule.shock_prob, system.shock_prob_base * cfg.drug_shock_factor])
+    schedule.shock_mean = np.vstack([schedule.shock_mean, system.shock_mean_base * cfg.drug_shock_factor])
+    return schedule
+
+
+def compile_parabiosis(sim: SimulationConfig, system: SystemConfig, cfg: InterventionConfig) -> InterventionSchedule:
+    """Vectorized :func:`apply_parabiosis`."""
+    schedule = _base_schedule(sim, system)
+    ages = _step_ages(sim)
+    active = ages >= cfg.parabiosis_start_age
+    years_on_para = ages[active] - cfg.parabiosis_start_age
+    within = years_on_para <= cfg.parabiosis_duration
+    active[active] = within
+    strength = np.exp(-cfg.parabiosis_strength_k * years_on_para[within])
+    schedule.recovery_scale[active] = 1.0 + cfg.parabiosis_recovery_gain * strength
+    schedule.decay_scale[active] = 1.0 - cfg.parabiosis_decay_reduction * strength
+    schedule.alpha_damage_scale[active] = 1.0 - cfg.parabiosis_alpha_reduction * strength
+    schedule.shock_damage_scale[active] = 1.0 - cfg.parabiosis_shock_damage_reduction * strength
+    return schedule
+
+
+def make_organ_compiler(scenario: str) -> ScheduleCompiler:
+    """Create a schedule compiler for a given organ replacement scenario."""
+
+    def compiler(sim: SimulationConfig, system: SystemConfig, cfg: InterventionConfig) -> InterventionSchedule:
+        schedule = _base_schedule(sim, system)
+        due = np.flatnonzero(_step_ages(sim) >= cfg.organ_replacement_age)
+        if due.size:
+            schedule.replace_step = int(due[0])
+            schedule.replace_nodes = cfg.organ_scenarios[scenario]
+            schedule.replacement_X = cfg.organ_replacement_X
+            schedule.replacement_D = cfg.organ_replacement_D
+        return schedule
+
+    return compiler
+
+
+SCHEDULE_COMPILERS: Dict[str, ScheduleCompiler] = {
+    "none": compile_none,
+    "exercise": compile_exercise,
+    "drug": compile_drug,
+    "organ1": make_organ_compiler("organ1"),
+    "organ2": make_organ_compiler("organ2"),
+    "organ3": make_organ_compiler("organ3"),
+    "parabiosis": compile_parabiosis,
+}
+
+
+def tabulate_intervention(
+    handler: InterventionFn,
+    sim: SimulationConfig,
+    system: SystemConfig,
+    cfg: InterventionConfig,
+) -> InterventionSchedule:
+    """
+    Build a schedule by calling a handler once per step.
+
+    Fallback for handlers without a vectorized compiler. Assumes, like every
+    built-in intervention, that the handler depends only on age and on
+    ``InterventionContext.organ_done``; at most one replacement is recorded.
+    """
+    schedule = _base_schedule(sim, system)
+    regimes: Dict[tuple, int] = {}
+    prob_rows: List[Array] = []
+    mean_rows: List[Array] = []
+    context = InterventionContext()
+    for t, age in enumerate(_step_ages(sim).tolist()):
+        adj = handler(age, system, sim, cfg, context)
+        schedule.decay_scale[t] = adj.decay_scale
+        schedule.recovery_scale[t] = adj.recovery_scale
+        schedule.alpha_damage_scale[t] = adj.alpha_damage_scale
+        schedule.shock_damage_scale[t] = adj.shock_damage_scale
+        prob = np.asarray(adj.shock_prob if adj.shock_prob is not None else system.shock_prob_base, dtype=float)
+        mean = np.asarray(adj.shock_mean if adj.shock_mean is not None else system.shock_mean_base, dtype=float)
+        key = (prob.tobytes(), mean.tobytes())
+        if key not in regimes:
+            regimes[key] = len(prob_rows)
+            prob_rows.append(prob)
+            mean_rows.append(mean)
+        schedule.shock_regime[t] = regimes[key]
+        if adj.replace_nodes is not None and schedule.replace_step < 0:
+            schedule.replace_step = t
+            schedule.replace_nodes = adj.replace_nodes
+            schedule.replacement_X = adj.replacement_X
+            schedule.replacement_D = adj.replacement_D
+            context.organ_done = True
+    schedule.shock_prob = np.array(prob_rows)
+    schedule.shock_mean = np.array(mean_rows)
+    return schedule
+
+
+def compile_schedule(
+    intervention: str,
+    sim: SimulationConfig,
+    system: SystemConfig,
+    cfg: InterventionConfig,
+) -> InterventionSchedule:
+    """
+    Compile an intervention and its config into per-timestep arrays.
+
+    Built-in interventions use the vectorized compilers in
+    ``SCHEDULE_COMPILERS``; other registered handlers are tabulated step by
+    step with :func:`tabulate_intervention`.
+    """
+    handler = select_intervention(intervention)
+    compiler = SCHEDULE_COMPILERS.get(intervention)
+    if compiler is not None and INTERVENTIONS.get(intervention) is _BUILTIN_INTERVENTIONS.get(intervention):
+        return compiler(sim, system, cfg)
+    return tabulate_intervention(handler, sim, system, cfg)
@@ -0,0 +1,74 @@
+"""Process-pool helpers and reproducible seed streams for ensemble runs."""
+
+import atexit
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Sequence, TypeVar, Union
+
+import numpy as np
+
+SeedLike = Union[int, np.random.SeedSequence, None]
+
+T = TypeVar("T")
+
+_EXECUTORS: Dict[int, Executor] = {}
+
+
+def spawn_seeds(rng_seed: SeedLike, n: int) -> List[np.random.SeedSequence]:
+    """
+    Derive ``n`` independent child seeds from a parent seed.
+
+    Children come from ``SeedSequence.spawn``, so run ``i`` always receives the
+    same stream regardless of how runs are later sharded across workers.
+    """
+    parent = rng_seed if isinstance(rng_seed, np.random.SeedSequence) else np.random.SeedSequence(rng_seed)
+    return parent.spawn(n)
+
+
+def get_executor(workers: int) -> Executor:
+    """
+    Return a process pool with ``workers`` processes, creating it on first use.
+
+    Pools are cached per worker count and reused by later calls, so repeated
+    sweeps do not pay process start-up and import cost each time.
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be >= 1, got {workers}")
+    executor = _EXECUTORS.get(workers)
+    if executor is None:
+        # Imported lazily: multiprocessing is unavailable under Pyodide.
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+        _EXECUTORS[workers] = executor
+    return executor
+
+
+def shutdown_executors() -> None:
+    """Shut down all cached process pools."""
+    while _EXECUTORS:
+        _, executor = _EXECUTORS.popitem()
+        executor.shutdown(wait=True)
+
+
+atexit.register(shutdown_executors)
+
+
+def resolve_executor(workers: Optional[int], executor: Optional[Executor]) -> Optional[Executor]:
+    """Pick the executor for a call: an explicit one wins, else a cached pool if ``workers > 1``."""
+    if executor is not None:
+        return executor
+    if workers is None or workers <= 1:
+        return None
+    return get_executor(workers)
+
+
+def executor_width(executor: Executor) -> int:
+    """Best-effort number of workers behind an executor, used to size shards."""
+    return int(getattr(executor, "_max_workers", 1) or 1)
+
+
+def shard(items: Sequence[T], n_shards: int) -> List[Sequence[T]]:
+    """Split ``items`` into at most ``n_shards`` contiguous, order-preserving chunks."""
+    n_shards = max(1, min(n_shards, len(items)))
+    bounds = np.linspace(0, len(items), n_shards + 1).astype(int)
+    return [items[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
@@ -1,13 +1,16 @@
 """Simulation orchestration for the aging network model."""
 
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
 
 import numpy as np
-from numpy.typing import NDArray
+from numpy.typing import ArrayLike, NDArray
 
 from .config import (
     DEFAULT_SCENARIOS,
+    FrozenConfig,
     InterventionConfig,
     SimulationConfig,
     SystemConfig,
@@ -15,11 +18,40 @@ from .config import (
     default_simulation_config,
     default_system_config,
 )
-from .interventions import INTERVENTIONS, InterventionContext, InterventionFn
-from .model import StepResult, step_state
+from .aggregate import EnsembleAggregator
+from .batch import run_batch
+from .cache import ResultCache, result_from_arrays, result_to_arrays, seed_key
+from .interventions import compile_schedule, select_intervention
+from .jit import NUMBA_AVAILABLE, NumbaInputs, integrate_numba, prepare_numba
+from .model import (
+    RNG_STREAMS,
+    EventShockSampler,
+    RandomBlock,
+    StepAdjustment,
+    StepWorkspace,
+    draw_random_block,
+    is_sparse_coupling,
+    step_state_inplace,
+)
+from .parallel import SeedLike, executor_width, resolve_executor, shard, spawn_seeds
+from .population import Population
 
 Array = NDArray[np.float64]
 
+BATCH_SHARD_RUNS = 4096
+"""Runs per independently seeded shard when ``run_many`` is batched."""
+
+RECORD_MODES = ("full", "every_k", "endpoints", "none")
+"""History modes accepted by ``run_sim(record=...)``."""
+
+BACKENDS = ("numpy", "numba")
+"""Integration backends accepted by ``run_sim(backend=...)``."""
+
+NUMBA_INPUT_ENTRIES = 32
+"""Prepared compiled-loop inputs kept by ``run_sim(backend="numba")``, least recently used evicted first."""
+
+_NUMBA_INPUTS: "OrderedDict[Tuple[Any, ...], NumbaInputs]" = OrderedDict()
+
 
 @dataclass
 class SimulationResult:
@@ -33,11 +65,147 @@ class SimulationResult:
     cause_of_death: Optional[int]
 
 
-def _select_intervention(name: str) -> InterventionFn:
-    if name not in INTERVENTIONS:
-        valid = ", ".join(INTERVENTIONS.keys())
-        raise ValueError(f"Unknown intervention '{name}'. Valid options: {valid}")
-    return INTERVENTIONS[name]
+class _HistoryBuffer:
+    """
+    Row sink for ``run_sim`` histories under a ``record`` mode.
+
+    Every mode keeps a subset of the rows ``"full"`` would keep: the state at
+    the start of each kept step, with the final row replaced by the post-step
+    state when the run dies.
+
+    With ``observe`` (fractional steps of ``observe_at`` ages) the buffer only
+    keeps the steps bracketing each observation plus the endpoints, and
+    :meth:`trimmed` interpolates the observations between them. The death
+    state is then appended rather than replacing the last row, and
+    observations are reported up to the last step the run completed alive.
+    """
+
+    def __init__(
+        self,
+        record: str,
+        record_every: int,
+        n_steps: int,
+        n_nodes: int,
+        out: Optional[Tuple[Array, Array]] = None,
+        observe: Optional[Array] = None,
+    ) -> None:
+        if observe is not None:
+            record = "observe"
+        elif record not in RECORD_MODES:
+            raise ValueError(f"Unknown record mode '{record}'. Valid options: {', '.join(RECORD_MODES)}")
+        if record == "every_k" and record_every < 1:
+            raise ValueError(f"record_every must be >= 1, got {record_every}")
+
+        self.record = record
+        self.stride = record_every if record == "every_k" else 1
+        self.last_step = n_steps - 1
+        self.observe = observe
+        self.died = False
+        if observe is not None:
+            bracket = np.concatenate([np.floor(observe), np.ceil(observe), [0, self.last_step]])
+            self.needed = np.unique(bracket.astype(np.int64))
+            self.needed_set = set(self.needed.tolist())
+            # One extra row for the appended death state.
+            capacity = self.needed.size + 1
+        elif record == "full":
+            capacity = n_steps
+        elif record == "every_k":
+            capacity = -(-n_steps // record_every) + 1
+        elif record == "endpoints":
+            capacity = min(n_steps, 2)
+        else:
+            capacity = 0
+
+        if out is None:
+            self.X = np.empty((capacity, n_nodes))
+            self.D = np.empty((capacity, n_nodes))
+        else:
+            self.X, self.D = out
+            for buf in out:
+                if buf.shape != (capacity, n_nodes):
+                    raise ValueError(f"out buffers must have shape {(capacity, n_nodes)}, got {buf.shape}")
+        self.steps = np.empty(capacity, dtype=np.int64)
+        self.n_rows = 0
+
+    def keeps(self, t: int) -> bool:
+        if self.record == "full":
+            return True
+        if self.record == "every_k":
+            return t % self.stride == 0 or t == self.last_step
+        if self.record == "endpoints":
+            return t == 0 or t == self.last_step
+        if self.record == "observe":
+            return t in self.needed_set
+        return False
+
+    def append(self, t: int, X: Array, D: Array) -> None:
+        row = self.n_rows
+        self.X[row] = X
+        self.D[row] = D
+        self.steps[row] = t
+        self.n_rows += 1
+
+    def record_step(self, t: int, X: Array, D: Array) -> None:
+        """Record the pre-step state of step ``t`` if the mode keeps it."""
+        if self.keeps(t):
+            self.append(t, X, D)
+
+    def record_death(self, t: int, X: Array, D: Array) -> None:
+        """Store the post-step state of the step ``t`` at which the run died."""
+        if self.record == "none":
+            return
+        self.died = True
+        if self.record != "observe" and self.n_rows and self.steps[self.n_rows - 1] == t:
+            self.n_rows -= 1
+        self.append(t, X, D)
+
+    def fill_from(self, X_full: Array, D_full: Array, n_recorded: int, died: bool = False) -> None:
+        """Select this mode's rows from full-resolution histories of ``n_recorded`` steps."""
+        if self.record == "none" or n_recorded == 0:
+            return
+        steps = np.arange(n_recorded)
+        self.died = died
+        if self.record == "full":
+            keep = steps
+        elif self.record == "observe":
+            # The death row overwrote the pre-step state of the death step, which is never needed.
+            alive_rows = self.needed[self.needed < n_recorded - int(died)]
+            keep = np.append(alive_rows, n_recorded - 1) if died else alive_rows
+        else:
+            mask = steps == n_recorded - 1
+            if self.record == "every_k":
+                mask |= steps % self.stride == 0
+            else:
+                mask |= steps == 0
+            keep = steps[mask]
+        n = keep.size
+        if self.X is not X_full:
+            self.X[:n] = X_full[keep]
+            self.D[:n] = D_full[keep]
+        self.steps[:n] = keep
+        self.n_rows = n
+
+    def seek(self, n_steps: int) -> None:
+        """Treat the first ``n_steps`` rows of a ``"full"`` buffer as already recorded."""
+        self.steps[:n_steps] = np.arange(n_steps)
+        self.n_rows = n_steps
+
+    def trimmed(self, sim: SimulationConfig) -> Tuple[Array, Array, Array]:
+        n = self.n_rows
+        if self.record != "observe":
+            return sim.start_age + self.steps[:n] * sim.dt, self.X[:n], self.D[:n]
+        steps, X, D = self.steps[:n], self.X[:n], self.D[:n]
+        grid = n - 1 if self.died else n
+        last_alive = steps[-1] - 1 if self.died else self.last_step
+        s = self.observe[self.observe <= last_alive]
+        lo = np.searchsorted(steps[:grid], s, side="right") - 1
+        hi = np.minimum(lo + 1, grid - 1)
+        span = steps[hi] - steps[lo]
+        frac = np.where(span > 0, (s - steps[lo]) / np.where(span > 0, span, 1), 0.0)[:, None]
+        X_obs = X[lo] + frac * (X[hi] - X[lo])
+        D_obs = D[lo] + frac * (D[hi] - D[lo])
+        ages = sim.start_age + np.concatenate([steps[:1], s, steps[-1:]]) * sim.dt
+        return ages, np.vstack([X[:1], X_obs, X[-1:]]), np.vstack([D[:1], D_obs, D[-1:]])
 
 
 def run_sim(
@@ -45,7 +213,14 @@ def run_sim(
     sim_config: Optional[SimulationConfig] = None,
     system_config: Optional[SystemConfig] = None,
     intervention_config: Optional[InterventionConfig] = None,
-    rng_seed: Optional[int] = None,
+    rng_seed: SeedLike = None,
+    out: Optional[Tuple[Array, Array]] = None,
+    record: str = "full",
+    record_every: int = 10,
+    backend: str = "numpy",
+    rng_stream: str = "stepwise-v1",
+    cache: Optional[ResultCache] = None,
+    observe_at: Optional[ArrayLike] = None,
 ) -> SimulationResult:
     """
     Run one simulation for a chosen intervention.
@@ -57,77 +232,346 @@ def run_sim(
     sim_config, system_config:
         Optional overrides; defaults mirror the notebook.
     rng_seed:
-        Seed for reproducibility; if None, uses NumPy's default.
+        Seed (int or ``SeedSequence``) for reproducibility; if None, uses NumPy's default.
+    out:
+        Optional ``(X_buffer, D_buffer)`` to record histories into, e.g. rows of
+        a larger ensemble array. They must hold every row the ``record`` mode
+        can keep (``(timesteps, n_nodes)`` for ``"full"``). The returned
+        ``X_hist``/``D_hist`` are views of these buffers trimmed at death.
+    record:
+        History mode: ``"full"`` keeps every step, ``"every_k"`` every
+        ``record_every``-th step plus the last, ``"endpoints"`` only the first
+        and last, and ``"none"`` nothing (empty histories, endpoints only in
+        ``healthspan``/``lifespan``/``cause_of_death``).
+    record_every:
+        Stride for ``record="every_k"``.
+    backend:
+        ``"numpy"`` (default) or ``"numba"`` to run the whole time loop as one
+        compiled call (see :mod:`aging_network.jit`). Uses the same random
+        stream; falls back to NumPy when Numba is unavailable. The compiled
+        inputs are cached per intervention when the configs are defaults or
+        frozen (:func:`~aging_network.config.freeze`); mutable configs are
+        re-prepared on every call.
+    rng_stream:
+        Random stream layout, see :data:`~aging_network.model.RNG_STREAMS`.
+        ``"block-v1"`` draws all of a run's uniforms and normals in two calls
+        up front instead of three calls per step; ``"event-v1"`` samples
+        geometric waiting times between shocks and draws magnitudes only when
+        a shock lands. All layouts are reproducible for a given seed and
+        statistically equivalent, but give different trajectories.
+        ``"event-v1"`` always runs on the NumPy backend.
+    cache:
+        Optional :class:`~aging_network.cache.ResultCache` (on disk) or
+        :class:`~aging_network.cache.MemoCache` (in process). Runs with a
+        reproducible seed and no ``out`` buffers are looked up by a hash of
+        the intervention name, configs, seed and recording options before
+        simulating, and stored after. Results from a ``MemoCache`` have
+        read-only arrays.
+    observe_at:
+        Ages to report states at instead of a ``record`` history, e.g. cohort
+        wave ages. Only the steps bracketing them are kept, and states are
+        interpolated linearly between them. The history rows are then the
+        initial state, the observations the run lived to, in the given order,
+        and the final (or death) state. An observation counts as reached up
+        to the last step the run completed alive. ``out`` buffers need
+        ``len(unique floor/ceil steps ∪ {0, last}) + 1`` rows.
     """
     sim = sim_config or default_simulation_config()
     system = system_config or default_system_config()
     inter_cfg = intervention_config or default_intervention_config()
+    observe = None if observe_at is None else sim.observation_steps(observe_at)
+    if observe is not None and observe.ndim != 1:
+        raise ValueError(f"run_sim observe_at must be 1-D, got shape {observe.shape}")
+
+    if cache is not None and out is None and seed_key(rng_seed) is not None:
+        key = _run_sim_key(
+            cache, intervention, sim, system, inter_cfg, rng_seed, record, record_every, backend, rng_stream,
+            observe,
+        )
+        hit = cache.get(key)
+        if hit is not None:
+            return SimulationResult(**result_from_arrays(hit))
+        result = run_sim(
+            intervention, sim, system, inter_cfg, rng_seed, None, record, record_every, backend, rng_stream,
+            observe_at=observe_at,
+        )
+        return SimulationResult(**result_from_arrays(cache.put(key, result_to_arrays(result))))
 
-    handler = _select_intervention(intervention)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Valid options: {', '.join(BACKENDS)}")
+    if rng_stream not in RNG_STREAMS:
+        raise ValueError(f"Unknown rng_stream '{rng_stream}'. Valid options: {', '.join(RNG_STREAMS)}")
     rng = np.random.default_rng(rng_seed)
+    n_steps = sim.timesteps
+    block = draw_random_block(rng, n_steps, system.n_nodes) if rng_stream == "block-v1" else None
+    events: Optional[EventShockSampler] = None
+    noise_normal: Optional[Array] = None
+    if rng_stream == "event-v1":
+        noise_normal = rng.standard_normal((n_steps, system.n_nodes))
+        events = EventShockSampler(rng, system.n_nodes)
 
-    X = system.X0.copy()
-    D = system.D0.copy()
-    context = InterventionContext()
+    if backend == "numba" and NUMBA_AVAILABLE and events is None:
+        inputs = _numba_inputs(
+            intervention, (sim_config, system_config, intervention_config), sim, system, inter_cfg
+        )
+        return _run_sim_numba(inputs, sim, rng, out, record, record_every, block, observe)
 
-    history_X = []
-    history_D = []
-    history_age = []
+    schedule = compile_schedule(intervention, sim, system, inter_cfg)
 
-    healthspan_age: Optional[float] = None
+    X = np.array(system.X0, dtype=float)
+    D = np.array(system.D0, dtype=float)
+    ws = StepWorkspace(system.n_nodes, dense_coupling=not is_sparse_coupling(system.C_base))
+    history = _HistoryBuffer(record, record_every, n_steps, system.n_nodes, out, observe)
+    healthspan_age, death_step = _advance(
+        X,
+        D,
+        rng,
+        ws,
+        schedule.adjustments(),
+        sim,
+        system,
+        history,
+        0,
+        n_steps,
+        block=block,
+        events=events,
+        noise_normal=noise_normal,
+    )
     death_age: Optional[float] = None
     cause_of_death: Optional[int] = None
+    if death_step is not None:
+        death_age = sim.start_age + death_step * sim.dt
+        cause_of_death = _sample_cause_of_death(X, sim, rng)
 
-    for t in range(sim.timesteps):
-        age = sim.start_age + t * sim.dt
+    ages, X_hist, D_hist = history.trimmed(sim)
+    return SimulationResult(
+        age=ages,
+        X_hist=X_hist,
+        D_hist=D_hist,
+        healthspan=healthspan_age,
+        lifespan=death_age,
+        cause_of_death=cause_of_death,
+    )
 
-        history_age.append(age)
-        history_X.append(X.copy())
-        history_D.append(D.copy())
 
-        adjustment = handler(age, system, sim, inter_cfg, context)
-        step: StepResult = step_state(X, D, age, sim, system, adjustment, rng)
+def _advance(
+    X: Array,
+    D: Array,
+    rng: np.random.Generator,
+    ws: StepWorkspace,
+    adjustments: Sequence[StepAdjustment],
+    sim: SimulationConfig,
+    system: SystemConfig,
+    history: _HistoryBuffer,
+    start: int,
+    stop: int,
+    healthspan_age: Optional[float] = None,
+    block: Optional[RandomBlock] = None,
+    events: Optional[EventShockSampler] = None,
+    noise_normal: Optional[Array] = None,
+) -> Tuple[Optional[float], Optional[int]]:
+    """
+    Integrate ``X``/``D`` in place over steps ``[start, stop)`` of the NumPy loop.
 
-        if step.replacement_applied:
-            context.organ_done = True
+    Returns the healthspan age (carried over from ``healthspan_age``) and the
+    step at which the run died, or None if it survived to ``stop``.
+    """
+    for t in range(start, stop):
+        age = sim.start_age + t * sim.dt
+
+        history.record_step(t, X, D)
 
-        mean_X = step.X_new.mean()
+        adjustment = adjustments[t]
+        local_shock = None
+        if block is not None:
+            draws = (block.uniform[t], block.shock_normal[t], block.noise_normal[t])
+        elif events is not None:
+            draws = (None, None, noise_normal[t])
+            shock_prob = adjustment.shock_prob if adjustment.shock_prob is not None else system.shock_prob_base
+            shock_mean = adjustment.shock_mean if adjustment.shock_mean is not None else system.shock_mean_base
+            local_shock = events.sample(t, shock_prob, shock_mean, system.shock_std_base)
+        else:
+            draws = None
+        step_state_inplace(X, D, sim, system, adjustment, rng, ws, draws, local_shock)
+
+        mean_X = X.mean()
         if healthspan_age is None and mean_X < sim.func_threshold:
             healthspan_age = age
 
-        if np.any(step.X_new < sim.death_threshold):
-            death_age = age
-            deficits = np.maximum(sim.death_threshold - step.X_new, 0.0)
-            if deficits.sum() > 0:
-                probs = deficits / deficits.sum()
-                cause_idx = int(rng.choice(np.arange(system.n_nodes), p=probs))
-            else:
-                cause_idx = int(np.argmin(step.X_new))
-            cause_of_death = cause_idx
+        if np.any(X < sim.death_threshold):
+            history.record_death(t, X, D)
+            return healthspan_age, t
+    return healthspan_age, None
 
-            history_X[-1] = step.X_new.copy()
-            history_D[-1] = step.D_new.copy()
-            break
 
-        X, D = step.X_new, step.D_new
+def _run_sim_key(
+    cache: ResultCache,
+    intervention: str,
+    sim: SimulationConfig,
+    system: SystemConfig,
+    inter_cfg: InterventionConfig,
+    rng_seed: SeedLike,
+    record: str,
+    record_every: int,
+    backend: str,
+    rng_stream: str,
+    observe: Optional[Array] = None,
+) -> str:
+    # Only observed runs add a field, so keys of recorded runs are unchanged.
+    extra = {} if observe is None else dict(observe_steps=observe.tolist())
+    return cache.key(
+        "run_sim",
+        intervention=intervention,
+        sim=sim,
+        system=system,
+        intervention_config=inter_cfg,
+        seed=seed_key(rng_seed),
+        record=record if observe is None else "observe",
+        record_every=record_every if record == "every_k" and observe is None else None,
+        backend=backend,
+        rng_stream=rng_stream,
+        **extra,
+    )
+
+
+def _sample_cause_of_death(X: Array, sim: SimulationConfig, rng: np.random.Generator) -> int:
+    """Pick the failing node, weighted by each node's deficit below the death threshold."""
+    deficits = np.maximum(sim.death_threshold - X, 0.0)
+    total = deficits.sum()
+    if total > 0:
+        # Same draw as ``rng.choice(n, p=deficits / total)`` without its argument checks.
+        cdf = np.cumsum(deficits / total)
+        return int(np.searchsorted(cdf / cdf[-1], rng.random(), side="right"))
+    return int(np.argmin(X))
+
+
+def _config_token(config: Any) -> Optional[str]:
+    """Cache token of a ``run_sim`` config argument: the digest of a frozen config, ``"default"`` for None."""
+    if config is None:
+        return "default"
+    if isinstance(config, FrozenConfig):
+        return config.digest
+    return None
+
+
+def _numba_inputs(
+    intervention: str,
+    arguments: Tuple[Any, Any, Any],
+    sim: SimulationConfig,
+    system: SystemConfig,
+    inter_cfg: InterventionConfig,
+) -> NumbaInputs:
+    """
+    Compiled-loop inputs of an intervention, reused across runs with the same configs.
 
+    ``arguments`` are the config arguments as passed to ``run_sim``. Defaults
+    and frozen configs are looked up by digest; mutable configs may change
+    between calls and are prepared afresh each time.
+    """
+    tokens = tuple(_config_token(config) for config in arguments)
+    if None in tokens:
+        return prepare_numba(compile_schedule(intervention, sim, system, inter_cfg), sim, system)
+    key = (intervention, select_intervention(intervention)) + tokens
+    inputs = _NUMBA_INPUTS.get(key)
+    if inputs is not None:
+        _NUMBA_INPUTS.move_to_end(key)
+        return inputs
+    inputs = prepare_numba(compile_schedule(intervention, sim, system, inter_cfg), sim, system)
+    _NUMBA_INPUTS[key] = inputs
+    if len(_NUMBA_INPUTS) > NUMBA_INPUT_ENTRIES:
+        _NUMBA_INPUTS.popitem(last=False)
+    return inputs
+
+
+def _run_sim_numba(
+    inputs: NumbaInputs,
+    sim: SimulationConfig,
+    rng: np.random.Generator,
+    out: Optional[Tuple[Array, Array]],
+    record: str,
+    record_every: int,
+    block: Optional[RandomBlock],
+    observe: Optional[Array] = None,
+) -> SimulationResult:
+    """``run_sim`` body for the compiled backend."""
+    n_steps = sim.timesteps
+    history = _HistoryBuffer(record, record_every, n_steps, inputs.n_nodes, out, observe)
+    X, _, X_full, D_full, healthspan_step, death_step = integrate_numba(
+        inputs,
+        rng,
+        record=history.record != "none",
+        out=(history.X, history.D) if history.record == "full" else None,
+        block=block,
+    )
+    history.fill_from(X_full, D_full, death_step + 1 if death_step >= 0 else n_steps, died=death_step >= 0)
+
+    ages, X_hist, D_hist = history.trimmed(sim)
+    died = death_step >= 0
     return SimulationResult(
-        age=np.array(history_age),
-        X_hist=np.array(history_X),
-        D_hist=np.array(history_D),
-        healthspan=healthspan_age,
-        lifespan=death_age,
-        cause_of_death=cause_of_death,
+        age=ages,
+        X_hist=X_hist,
+        D_hist=D_hist,
+        healthspan=sim.start_age + healthspan_step * sim.dt if healthspan_step >= 0 else None,
+        lifespan=sim.start_age + death_step * sim.dt if died else None,
+        cause_of_death=_sample_cause_of_death(X, sim, rng) if died else None,
     )
 
 
+def _ensemble_seed_count(n_runs: int, batched: bool) -> int:
+    """Child seeds ``run_many`` spawns from its seed: one per batch shard, or one per run."""
+    return max(1, -(-n_runs // BATCH_SHARD_RUNS)) if batched else n_runs
+
+
+def _run_many_chunk(
+    intervention: str,
+    seeds: Sequence[np.random.SeedSequence],
+    run_kwargs: Dict[str, Any],
+    aggregator: Optional[EnsembleAggregator] = None,
+) -> Tuple[np.ndarray, np.ndarray, Optional[EnsembleAggregator]]:
+    """Run one shard of a serial ensemble; module-level so process pools can pickle it."""
+    hs = np.full(len(seeds), np.nan)
+    ls = np.full(len(seeds), np.nan)
+    if aggregator is not None:
+        run_kwargs = dict(run_kwargs, record="every_k", record_every=aggregator.bin_every)
+    for i, seed in enumerate(seeds):
+        result = run_sim(intervention, rng_seed=seed, **run_kwargs)
+        if result.healthspan is not None:
+            hs[i] = result.healthspan
+        if result.lifespan is not None:
+            ls[i] = result.lifespan
+        if aggregator is not None:
+            aggregator.add_result(result)
+    return hs, ls, aggregator
+
+
+def _run_batch_shard(
+    intervention: str,
+    n_runs: int,
+    seed: np.random.SeedSequence,
+    run_kwargs: Dict[str, Any],
+    aggregator: Optional[EnsembleAggregator] = None,
+) -> Tuple[np.ndarray, np.ndarray, Optional[EnsembleAggregator]]:
+    """Run one fixed-size shard of a batched ensemble."""
+    batch = run_batch(intervention, n_runs=n_runs, rng_seed=seed, aggregator=aggregator, **run_kwargs)
+    return batch.healthspan, batch.lifespan, aggregator
+
+
 def run_many(
     intervention: str,
     n_runs: int = 100,
     sim_config: Optional[SimulationConfig] = None,
     system_config: Optional[SystemConfig] = None,
     intervention_config: Optional[InterventionConfig] = None,
-    rng_seed: Optional[int] = None,
+    rng_seed: SeedLike = None,
+    batched: bool = False,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    record: str = "none",
+    backend: str = "numpy",
+    rng_stream: str = "stepwise-v1",
+    cache: Optional[ResultCache] = None,
+    aggregator: Optional[EnsembleAggregator] = None,
+    population: Optional[Population] = None,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """
     Run multiple stochastic simulations and collect healthspan/lifespan.
@@ -141,23 +585,116 @@ def run_many(
     sim_config, system_config, intervention_config:
         Optional parameter overrides.
     rng_seed:
-        Seed for reproducibility across the ensemble.
+        Seed for reproducibility across the ensemble. Per-run seeds are
+        spawned from it, so results are identical for any number of workers.
+    batched:
+        If True, advance runs together with :func:`~aging_network.batch.run_batch`
+        in shards of up to ``BATCH_SHARD_RUNS`` runs. Much faster for large
+        ensembles, but each shard draws from one shared random stream, so
+        results differ run-by-run from the serial loop.
+    workers:
+        Number of processes to shard runs across, using a cached pool that is
+        reused between calls. ``None`` or 1 runs in-process.
+    executor:
+        Explicit executor to use instead of the cached pool.
+    record:
+        History mode passed to each ``run_sim`` call. Only endpoints are
+        returned, so the default ``"none"`` skips history bookkeeping and keeps
+        memory constant in ``n_runs``. Batched runs never record histories.
+    backend, rng_stream:
+        Per-run integration backend and random stream layout for the serial
+        loop, as in :func:`run_sim`.
+    cache:
+        Optional :class:`~aging_network.cache.ResultCache`. Ensembles with a
+        reproducible seed are keyed by the intervention name, configs, seed,
+        ``n_runs``, ``batched``, ``backend`` and ``rng_stream``; workers and
+        history mode do not change the endpoints and are not part of the key.
+    aggregator:
+        Optional :class:`~aging_network.aggregate.EnsembleAggregator` that
+        receives per-age statistics of every run. Each shard fills a fresh
+        copy, recording its runs only on the aggregator's bins, and the
+        partials are merged into ``aggregator`` in shard order, so memory
+        stays constant in ``n_runs``. The cache is bypassed, since it only
+        stores endpoints.
+    population:
+        Per-individual parameters (see
+        :class:`~aging_network.population.PopulationSpec`). Implies
+        ``batched``; ``n_runs`` is the population size, and each shard
+        simulates its slice of individuals. The cache is bypassed.
     """
-    hs = []
-    ls = []
-    base_rng = np.random.default_rng(rng_seed)
-    for _ in range(n_runs):
-        seed = int(base_rng.integers(0, 2**32 - 1))
-        result = run_sim(
+    if population is not None:
+        batched = True
+        n_runs = population.size
+    seed = seed_key(rng_seed)
+    if cache is not None and seed is not None and aggregator is None and population is None:
+        key = cache.key(
+            "run_many",
+            intervention=intervention,
+            sim=sim_config or default_simulation_config(),
+            system=system_config or default_system_config(),
+            intervention_config=intervention_config or default_intervention_config(),
+            seed=seed,
+            n_runs=n_runs,
+            batched=batched,
+            backend=backend,
+            rng_stream=rng_stream,
+        )
+        hit = cache.get(key)
+        if hit is not None:
+            if isinstance(rng_seed, np.random.SeedSequence):
+                # Advance the caller's seed exactly as the simulation would have.
+                rng_seed.spawn(_ensemble_seed_count(n_runs, batched))
+            return hit["healthspan"], hit["lifespan"]
+        hs, ls = run_many(
             intervention,
-            sim_config=sim_config,
-            system_config=system_config,
-            intervention_config=intervention_config,
-            rng_seed=seed,
+            n_runs,
+            sim_config,
+            system_config,
+            intervention_config,
+            rng_seed,
+            batched,
+            workers,
+            executor,
+            record,
+            backend,
+            rng_stream,
         )
-        hs.append(result.healthspan if result.healthspan is not None else np.nan)
-        ls.append(result.lifespan if result.lifespan is not None else np.nan)
-    return np.array(hs), np.array(ls)
+        cache.put(key, dict(healthspan=hs, lifespan=ls))
+        return hs, ls
+
+    pool = resolve_executor(workers, executor)
+    configs: Dict[str, Any] = dict(
+        sim_config=sim_config,
+        system_config=system_config,
+        intervention_config=intervention_config,
+    )
+
+    if batched:
+        parts = shard(range(n_runs), _ensemble_seed_count(n_runs, batched))
+        sizes = [len(part) for part in parts]
+        seeds = spawn_seeds(rng_seed, len(sizes))
+        shard_kwargs = [
+            configs if population is None else dict(configs, population=population.subset(slice(p.start, p.stop)))
+            for p in parts
+        ]
+        args = [[intervention] * len(sizes), sizes, seeds, shard_kwargs]
+        fn: Callable[..., Tuple[np.ndarray, np.ndarray, Optional[EnsembleAggregator]]] = _run_batch_shard
+    else:
+        n_shards = 4 * executor_width(pool) if pool is not None else 1
+        chunks = shard(spawn_seeds(rng_seed, n_runs), n_shards)
+        run_kwargs = dict(configs, record=record, backend=backend, rng_stream=rng_stream)
+        args = [[intervention] * len(chunks), chunks, [run_kwargs] * len(chunks)]
+        fn = _run_many_chunk
+    if aggregator is not None:
+        args.append([aggregator.empty_like() for _ in args[0]])
+
+    parts = list(pool.map(fn, *args)) if pool is not None else list(map(fn, *args))
+    if not parts:
+        return np.array([]), np.array([])
+    if aggregator is not None:
+        for _, _, partial in parts:
+            aggregator.merge(partial)
+    return np.concatenate([hs for hs, _, _ in parts]), np.concatenate([ls for _, ls, _ in parts])
 
 
 def run_all_scenarios(
@@ -165,18 +702,52 @@ def run_all_scenarios(
     sim_config: Optional[SimulationConfig] = None,
     system_config: Optional[SystemConfig] = None,
     intervention_config: Optional[InterventionConfig] = None,
-    rng_seed: Optional[int] = None,
+    rng_seed: SeedLike = None,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    record: str = "full",
+    record_every: int = 10,
+    common_random_numbers: bool = False,
+    cache: Optional[ResultCache] = None,
 ) -> Dict[str, SimulationResult]:
-    """Convenience helper to simulate a set of interventions."""
+    """
+    Convenience helper to simulate a set of interventions.
+
+    Each scenario gets a seed spawned from ``rng_seed``; with ``workers`` or
+    ``executor`` the scenarios run in parallel with identical results.
+    ``record``/``record_every`` select the history mode as in :func:`run_sim`.
+    With ``common_random_numbers`` every scenario uses the same seed and so
+    the same shock and noise stream, pairing the runs; see
+    :func:`~aging_network.paired.run_paired` for paired ensembles.
+    With a ``cache`` (see :func:`run_sim`), scenarios are looked up in the
+    calling process and only the misses are simulated.
+    """
+    scenarios = list(scenarios)
+    n = len(scenarios)
+    seeds = spawn_seeds(rng_seed, 1) * n if common_random_numbers else spawn_seeds(rng_seed, n)
+
     results: Dict[str, SimulationResult] = {}
-    base_rng = np.random.default_rng(rng_seed)
-    for scenario in scenarios:
-        seed = int(base_rng.integers(0, 2**32 - 1))
-        results[scenario] = run_sim(
-            scenario,
-            sim_config=sim_config,
-            system_config=system_config,
-            intervention_config=intervention_config,
-            rng_seed=seed,
-        )
-    return results
+    keys: Dict[str, str] = {}
+    if cache is not None:
+        sim = sim_config or default_simulation_config()
+        system = system_config or default_system_config()
+        inter_cfg = intervention_config or default_intervention_config()
+        for name, seed in zip(scenarios, seeds):
+            keys[name] = _run_sim_key(
+                cache, name, sim, system, inter_cfg, seed, record, record_every, "numpy", "stepwise-v1"
+            )
+            hit = cache.get(keys[name])
+            if hit is not None:
+                results[name] = SimulationResult(**result_from_arrays(hit))
+    todo = [(name, seed) for name, seed in zip(scenarios, seeds) if name not in results]
+
+    m = len(todo)
+    args = [[name for name, _ in todo], [sim_config] * m, [system_config] * m, [intervention_config] * m]
+    args += [[seed for _, seed in todo], [None] * m, [record] * m, [record_every] * m]
+    pool = resolve_executor(workers, executor)
+    runs = pool.map(run_sim, *args) if pool is not None else map(run_sim, *args)
+    for (name, _), result in zip(todo, runs):
+        if cache is not None:
+            result = SimulationResult(**result_from_arrays(cache.put(keys[name], result_to_arrays(result))))
+        results[name] = result
+    return {name: results[name] for name in scenarios}
@@ -0,0 +1,303 @@
+"""Survival and competing-risks summaries of ensemble endpoints."""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+from .adaptive import Estimate
+from .config import SimulationConfig, default_simulation_config, default_system_config
+from .parallel import SeedLike
+
+Array = NDArray[np.float64]
+
+BOOTSTRAP_CELLS = 1 << 22
+"""Upper bound on ``replicates x cells`` drawn per bootstrap chunk."""
+
+
+@dataclass
+class EventTable:
+    """
+    Event counts of an ensemble on the simulation time grid.
+
+    ``counts[s, k]`` is the number of runs whose event (death by cause ``k``)
+    happened at step ``s``, i.e. at ``ages[s]``; the last column counts runs
+    censored there. Runs that never have the event are censored at the final
+    row, the end of the simulated age range (age 120 by default). Runs with
+    an event at step ``s`` are at risk up to and including ``s``.
+    """
+
+    ages: Array
+    counts: NDArray[np.int64]
+    causes: Tuple[str, ...]
+    dt: float
+
+    @property
+    def n_runs(self) -> int:
+        return int(self.counts.sum())
+
+
+def event_table(
+    event_age: ArrayLike,
+    cause: Optional[ArrayLike] = None,
+    sim_config: Optional[SimulationConfig] = None,
+    causes: Optional[Sequence[str]] = None,
+) -> EventTable:
+    """
+    Bin per-run event ages and causes into an :class:`EventTable`.
+
+    Parameters
+    ----------
+    event_age:
+        Age of the event per run; ``NaN`` where it never happened (censored
+        at the end of the simulation).
+    cause:
+        Cause index per run, e.g. ``cause_of_death`` from
+        :class:`~aging_network.batch.BatchResult` or
+        :class:`~aging_network.ensemble.EnsembleResult`. Ignored for censored
+        runs. ``None`` pools all events into one cause.
+    sim_config:
+        Time grid the ages lie on.
+    causes:
+        Cause labels; defaults to the node names when ``cause`` is given.
+    """
+    sim = sim_config or default_simulation_config()
+    event_age = np.asarray(event_age, dtype=float)
+    n_steps = sim.timesteps
+    censored = np.isnan(event_age)
+    steps = np.rint((np.where(censored, np.inf, event_age) - sim.start_age) / sim.dt)
+    censored |= steps >= n_steps
+    steps = np.where(censored, n_steps, steps).astype(np.int64)
+
+    if cause is None:
+        labels = tuple(causes) if causes is not None else ("death",)
+        cause_idx = np.zeros(event_age.shape[0], dtype=np.int64)
+    else:
+        labels = tuple(causes) if causes is not None else tuple(default_system_config().node_names)
+        cause_arr = np.asarray(cause, dtype=float)
+        bad = ~censored & ~((cause_arr >= 0) & (cause_arr < len(labels)))
+        if bad.any():
+            raise ValueError(f"{int(bad.sum())} uncensored runs have a cause outside 0..{len(labels) - 1}")
+        cause_idx = np.where(censored, 0, cause_arr).astype(np.int64)
+    n_cols = len(labels) + 1
+    column = np.where(censored, len(labels), cause_idx)
+    counts = np.bincount(steps * n_cols + column, minlength=(n_steps + 1) * n_cols).reshape(n_steps + 1, n_cols)
+    return EventTable(
+        ages=sim.start_age + np.arange(n_steps + 1) * sim.dt,
+        counts=counts,
+        causes=labels,
+        dt=float(sim.dt),
+    )
+
+
+def _at_risk(counts: NDArray[np.int64]) -> Tuple[Array, Array]:
+    """Events of any cause and runs at risk per step, over any leading batch axes."""
+    events = counts[..., :-1].sum(axis=-1).astype(float)
+    leaving = counts.sum(axis=-1)
+    at_risk = leaving.sum(axis=-1, keepdims=True) - np.cumsum(leaving, axis=-1) + leaving
+    return events, at_risk.astype(float)
+
+
+def _survival(counts: NDArray[np.int64]) -> Array:
+    events, at_risk = _at_risk(counts)
+    return np.cumprod(1.0 - events / np.maximum(at_risk, 1.0), axis=-1)
+
+
+def _incidence(counts: NDArray[np.int64]) -> Array:
+    events, at_risk = _at_risk(counts)
+    survival = np.cumprod(1.0 - events / np.maximum(at_risk, 1.0), axis=-1)
+    before = np.concatenate([np.ones_like(survival[..., :1]), survival[..., :-1]], axis=-1)
+    return np.cumsum(before[..., None] * counts[..., :-1] / np.maximum(at_risk, 1.0)[..., None], axis=-2)
+
+
+def _expectancy(counts: NDArray[np.int64], dt: float) -> Array:
+    """Restricted mean time to event from the start age, in years."""
+    return dt * _survival(counts)[..., :-1].sum(axis=-1)
+
+
+def kaplan_meier(table: EventTable) -> Array:
+    """Share of runs without the event after each age of ``table.ages`` (Kaplan–Meier)."""
+    return _survival(table.counts)
+
+
+def cumulative_incidence(table: EventTable) -> Array:
+    """
+    Cumulative incidence per cause at each age, ``(len(ages), n_causes)``.
+
+    Aalen–Johansen estimator: cause-specific events weighted by overall
+    survival just before them, so the causes sum to ``1 - kaplan_meier``.
+    """
+    return _incidence(table.counts)
+
+
+def hazard(table: EventTable, width: float = 1.0) -> Tuple[Array, Array]:
+    """
+    Age-specific event rate per person-year in bands of ``width`` years.
+
+    Returns ``(band_start_ages, rates)``; bands nobody survives into are NaN.
+    """
+    per_band = max(1, int(round(width / table.dt)))
+    events, at_risk = _at_risk(table.counts)
+    events, at_risk = events[:-1], at_risk[:-1]
+    exposure = (at_risk - events) * table.dt
+    starts = np.arange(0, events.shape[0], per_band)
+    band_events = np.add.reduceat(events, starts)
+    band_exposure = np.add.reduceat(exposure, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = np.where(band_exposure + band_events > 0, band_events / band_exposure, np.nan)
+    return table.ages[starts], rates
+
+
+def life_expectancy(table: EventTable) -> float:
+    """Mean years from the start age to the event, restricted to the simulated range."""
+    return float(_expectancy(table.counts, table.dt))
+
+
+def bootstrap_counts(table: EventTable, n_boot: int, rng: np.random.Generator) -> NDArray[np.int64]:
+    """
+    ``n_boot`` resampled count tables, ``(n_boot, *table.counts.shape)``.
+
+    Resampling runs with replacement only changes how many runs land in each
+    cell, so each replicate is one multinomial draw over the non-empty cells.
+    """
+    flat = table.counts.ravel()
+    cells = np.flatnonzero(flat)
+    out = np.zeros((n_boot, flat.size), dtype=np.int64)
+    if cells.size:
+        out[:, cells] = rng.multinomial(table.n_runs, flat[cells] / table.n_runs, size=n_boot)
+    return out.reshape((n_boot,) + table.counts.shape)
+
+
+@dataclass
+class SurvivalAnalysis:
+    """
+    Survival curves and expectancies of an ensemble with bootstrap intervals.
+
+    Curves are on ``ages``; ``*_ci`` arrays stack the lower and upper
+    percentile bounds. Expectancies are years lived from the start age,
+    restricted to the simulated range.
+    """
+
+    ages: Array
+    causes: Tuple[str, ...]
+    survival: Array
+    survival_ci: Array
+    incidence: Array
+    incidence_ci: Array
+    hazard_ages: Array
+    hazard: Array
+    life_expectancy: Estimate
+    healthy_life_expectancy: Optional[Estimate]
+
+    @property
+    def unhealthy_years(self) -> Optional[float]:
+        """Expected years lived below the functional threshold."""
+        if self.healthy_life_expectancy is None:
+            return None
+        return self.life_expectancy.value - self.healthy_life_expectancy.value
+
+
+def _bootstrap(table: EventTable, n_boot: int, rng: np.random.Generator, with_curves: bool):
+    """Percentile samples of the expectancy (and curves) over chunks of replicates."""
+    chunk = max(1, BOOTSTRAP_CELLS // max(1, table.counts.size))
+    expectancy, survival, incidence = [], [], []
+    for start in range(0, n_boot, chunk):
+        counts = bootstrap_counts(table, min(chunk, n_boot - start), rng)
+        expectancy.append(_expectancy(counts, table.dt))
+        if with_curves:
+            survival.append(_survival(counts))
+            incidence.append(_incidence(counts))
+    if not with_curves:
+        return np.concatenate(expectancy), None, None
+    return np.concatenate(expectancy), np.concatenate(survival), np.concatenate(incidence)
+
+
+def analyze_survival(
+    lifespan: ArrayLike,
+    cause_of_death: Optional[ArrayLike] = None,
+    healthspan: Optional[ArrayLike] = None,
+    sim_config: Optional[SimulationConfig] = None,
+    causes: Optional[Sequence[str]] = None,
+    n_boot: int = 1000,
+    confidence: float = 0.95,
+    hazard_width: float = 1.0,
+    rng_seed: SeedLike = None,
+) -> SurvivalAnalysis:
+    """
+    Kaplan–Meier survival, cause-specific incidence, hazard and expectancies.
+
+    Works directly on endpoint arrays, e.g. from ``run_many``,
+    :class:`~aging_network.batch.BatchResult` or
+    :class:`~aging_network.ensemble.EnsembleResult`. Runs still alive at the
+    end of the simulation (``NaN`` lifespan) are right-censored there.
+
+    Parameters
+    ----------
+    lifespan:
+        Age at death per run.
+    cause_of_death:
+        Node index of the cause of death per run; ``None`` gives a single
+        all-cause incidence curve.
+    healthspan:
+        Age at which mean function fell below threshold per run; ``NaN``
+        where it never did, in which case the run was healthy until death.
+        Enables ``healthy_life_expectancy``.
+    sim_config:
+        Time grid the ages lie on.
+    causes:
+        Cause labels; defaults to the node names.
+    n_boot:
+        Bootstrap replicates for the intervals (0 skips them).
+    confidence:
+        Two-sided level of the percentile intervals.
+    hazard_width:
+        Width in years of the hazard bands.
+    rng_seed:
+        Seed of the bootstrap draws.
+    """
+    if not 0.0 < confidence < 1.0:
+        raise ValueError(f"confidence must be in (0, 1), got {confidence}")
+    lifespan = np.asarray(lifespan, dtype=float)
+    deaths = event_table(lifespan, cause_of_death, sim_config, causes)
+    rng = np.random.default_rng(rng_seed)
+    tail = (1.0 - confidence) / 2.0
+    bounds = (100 * tail, 100 * (1.0 - tail))
+
+    survival = kaplan_meier(deaths)
+    incidence = cumulative_incidence(deaths)
+    le = life_expectancy(deaths)
+    if n_boot > 0:
+        le_boot, s_boot, i_boot = _bootstrap(deaths, n_boot, rng, with_curves=True)
+        survival_ci = np.percentile(s_boot, bounds, axis=0)
+        incidence_ci = np.percentile(i_boot, bounds, axis=0)
+        le_est = Estimate(le, *map(float, np.percentile(le_boot, bounds)))
+    else:
+        survival_ci = np.stack([survival, survival])
+        incidence_ci = np.stack([incidence, incidence])
+        le_est = Estimate(le, np.nan, np.nan)
+
+    hle_est = None
+    if healthspan is not None:
+        healthspan = np.asarray(healthspan, dtype=float)
+        healthy = event_table(np.where(np.isnan(healthspan), lifespan, healthspan), None, sim_config)
+        hle = life_expectancy(healthy)
+        if n_boot > 0:
+            hle_boot, _, _ = _bootstrap(healthy, n_boot, rng, with_curves=False)
+            hle_est = Estimate(hle, *map(float, np.percentile(hle_boot, bounds)))
+        else:
+            hle_est = Estimate(hle, np.nan, np.nan)
+
+    hazard_ages, rates = hazard(deaths, hazard_width)
+    return SurvivalAnalysis(
+        ages=deaths.ages,
+        causes=deaths.causes,
+        survival=survival,
+        survival_ci=survival_ci,
+        incidence=incidence,
+        incidence_ci=incidence_ci,
+        hazard_ages=hazard_ages,
+        hazard=rates,
+        life_expectancy=le_est,
+        healthy_life_expectancy=hle_est,
+    )